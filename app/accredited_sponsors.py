@@ -3,8 +3,15 @@ Accredited Sponsor list integration for employer prioritization
 """
 
 import requests
+import numpy as np
 import pandas as pd
+import hashlib
 import logging
+import json
+import os
+from array import array
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
 from typing import List, Dict, Set, Optional
 from datetime import datetime
 import re
@@ -12,6 +19,120 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Stripped from the end of company names, in this order (one pass)
+COMPANY_SUFFIXES = [
+    'pty ltd', 'pty. ltd.', 'pty ltd.', 'pty. ltd',
+    'limited', 'ltd', 'ltd.', 'inc', 'inc.', 'corp', 'corp.',
+    'company', 'co', 'co.', 'group', 'grp', 'australia',
+    'australian', 'au'
+]
+
+# Bump when the snapshot layout or normalization changes
+SNAPSHOT_VERSION = 2
+
+class SponsorNameIndex:
+    """Trigram postings over normalized sponsor names.
+    Fuzzy lookups rank names by shared trigrams and only run SequenceMatcher on
+    the best `max_candidates`; substring lookups intersect the query's trigram
+    postings and verify the survivors. Ids are positions in `names` (load order).
+    """
+
+    def __init__(self, names: List[str], max_candidates: int = 64):
+        self.names = list(names)
+        self.max_candidates = max_candidates
+        postings: Dict[str, List[int]] = defaultdict(list)
+        self.gram_counts = array('I')
+        for idx, name in enumerate(self.names):
+            grams = self.trigrams(name)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                postings[gram].append(idx)
+        # Compact unsigned arrays keep the index small in memory and in snapshots
+        self.postings: Dict[str, array] = {gram: array('I', ids) for gram, ids in postings.items()}
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Postings flattened into plain arrays (grams, offsets into ids) for the snapshot"""
+        grams = list(self.postings)
+        lengths = np.array([len(self.postings[gram]) for gram in grams], dtype=np.int64)
+        ids = np.frombuffer(b''.join(self.postings[gram].tobytes() for gram in grams), dtype=np.uint32)
+        return {
+            'grams': np.array(grams, dtype=str),
+            'offsets': np.concatenate(([0], np.cumsum(lengths))),
+            'ids': ids,
+            'gram_counts': np.frombuffer(self.gram_counts.tobytes(), dtype=np.uint32),
+        }
+
+    @classmethod
+    def from_arrays(cls, names: List[str], arrays, max_candidates: int = 64) -> "SponsorNameIndex":
+        index = cls([], max_candidates)
+        index.names = list(names)
+        index.gram_counts = array('I', arrays['gram_counts'].astype(np.uint32).tobytes())
+        ids = arrays['ids'].astype(np.uint32)
+        offsets = arrays['offsets']
+        index.postings = {
+            gram: array('I', ids[offsets[i]:offsets[i + 1]].tobytes())
+            for i, gram in enumerate(arrays['grams'].tolist())
+        }
+        return index
+
+    @staticmethod
+    def trigrams(name: str) -> Set[str]:
+        padded = f"  {name} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def similar(self, name: str, threshold: float, limit: Optional[int] = None) -> List[tuple]:
+        """(similarity, name) pairs with SequenceMatcher ratio >= threshold, best first"""
+        if not name or not self.names:
+            return []
+        grams = self.trigrams(name)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        # Dice coefficient on trigram sets decides which names are worth scoring
+        ranked = sorted(
+            shared.items(),
+            key=lambda item: (-2.0 * item[1] / (len(grams) + self.gram_counts[item[0]]), item[0])
+        )[:self.max_candidates]
+
+        matches = []
+        matcher = SequenceMatcher(None, name)
+        for idx, _ in ranked:
+            candidate = self.names[idx]
+            matcher.set_seq2(candidate)
+            # Both quick ratios are upper bounds on ratio(), so these skips are exact
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                continue
+            similarity = matcher.ratio()
+            if similarity >= threshold:
+                matches.append((similarity, candidate))
+        matches.sort(key=lambda match: -match[0])
+        return matches[:limit] if limit else matches
+
+    def containing(self, query: str) -> List[str]:
+        """Names containing `query`, in load order"""
+        if not query:
+            return list(self.names)
+        if len(query) >= 3:
+            lists = [self.postings.get(query[i:i + 3]) for i in range(len(query) - 2)]
+            if not all(lists):
+                return []
+            lists.sort(key=len)
+            candidates = set(lists[0])
+            for ids in lists[1:]:
+                candidates.intersection_update(ids)
+                if not candidates:
+                    return []
+        else:
+            # Every occurrence of a 1-2 character query lies inside some padded trigram
+            candidates = set()
+            for gram, ids in self.postings.items():
+                if query in gram:
+                    candidates.update(ids)
+        return [self.names[idx] for idx in sorted(candidates) if query in self.names[idx]]
+
 class AccreditedSponsorManager:
     """Manage Australian accredited sponsor data"""
     
@@ -21,31 +142,38 @@ class AccreditedSponsorManager:
         self.sponsors_file = self.data_dir / "accredited_sponsors.csv"
         self.sponsors_set = set()
         self.sponsors_data = {}
+        self.name_index = SponsorNameIndex([])
+        self._load_attempted = False
         
     def load_sponsors_from_csv(self, csv_path: str = None) -> bool:
-        """Load sponsors from CSV file"""
+        """Load sponsors from CSV file, reusing the compiled snapshot while the CSV is unchanged"""
         try:
-            file_path = csv_path or self.sponsors_file
-            if not Path(file_path).exists():
+            file_path = Path(csv_path or self.sponsors_file)
+            if not file_path.exists():
                 logger.warning(f"Sponsors file not found: {file_path}")
                 return False
             
-            df = pd.read_csv(file_path)
-            
-            # Expected columns: company_name, abn, status, approval_date, etc.
-            for _, row in df.iterrows():
-                company_name = str(row.get('company_name', '')).strip()
-                if company_name:
-                    normalized_name = self.normalize_company_name(company_name)
-                    self.sponsors_set.add(normalized_name)
-                    self.sponsors_data[normalized_name] = {
-                        'original_name': company_name,
-                        'abn': row.get('abn', ''),
-                        'status': row.get('status', 'active'),
-                        'approval_date': row.get('approval_date', ''),
-                        'location': row.get('location', '')
-                    }
+            digest = self._file_digest(file_path)
+            snapshot = self._read_snapshot(file_path, digest)
+            if snapshot is None:
+                df = pd.read_csv(file_path)
+                sponsors = self._sponsors_from_frame(df)
+                snapshot = {
+                    'version': SNAPSHOT_VERSION,
+                    'csv_sha256': digest,
+                    'sponsors': sponsors,
+                    'index': SponsorNameIndex(list(sponsors)),
+                }
+                self._write_snapshot(file_path, snapshot)
             
+            if self.sponsors_data:
+                # Merging into an already loaded list needs a fresh index
+                self.sponsors_data.update(snapshot['sponsors'])
+                self.name_index = SponsorNameIndex(list(self.sponsors_data))
+            else:
+                self.sponsors_data = dict(snapshot['sponsors'])
+                self.name_index = snapshot['index']
+            self.sponsors_set = set(self.sponsors_data)
             logger.info(f"Loaded {len(self.sponsors_set)} accredited sponsors")
             return True
             
@@ -53,6 +181,93 @@ class AccreditedSponsorManager:
             logger.error(f"Error loading sponsors from CSV: {e}")
             return False
     
+    def _sponsors_from_frame(self, df: pd.DataFrame) -> Dict[str, Dict]:
+        """Normalized name -> sponsor metadata for every named row (later rows win)"""
+        # Expected columns: company_name, abn, status, approval_date, etc.
+        if 'company_name' not in df:
+            return {}
+        names = df['company_name'].fillna('').astype(str).str.strip()
+        named = names != ''
+        df, names = df[named], names[named]
+        normalized = self.normalize_company_names(names)
+        
+        def column(name: str, default):
+            return df[name].tolist() if name in df else [default] * len(df)
+        
+        return {
+            normalized_name: {
+                'original_name': company_name,
+                'abn': abn,
+                'status': status,
+                'approval_date': approval_date,
+                'location': location
+            }
+            for normalized_name, company_name, abn, status, approval_date, location in zip(
+                normalized.tolist(), names.tolist(), column('abn', ''), column('status', 'active'),
+                column('approval_date', ''), column('location', '')
+            )
+        }
+    
+    @staticmethod
+    def _file_digest(file_path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _snapshot_path(file_path: Path) -> Path:
+        return file_path.with_name(f"{file_path.stem}.snapshot.npz")
+    
+    @staticmethod
+    def _json_array(value) -> np.ndarray:
+        return np.frombuffer(json.dumps(value, default=str).encode(), dtype=np.uint8)
+    
+    def _read_snapshot(self, file_path: Path, digest: str) -> Optional[Dict]:
+        """Snapshot for this CSV digest, or None. Plain arrays and JSON only (never pickle),
+        and the header is checked before the rest of the file is read.
+        """
+        snapshot_path = self._snapshot_path(file_path)
+        if not snapshot_path.exists():
+            return None
+        try:
+            with np.load(snapshot_path, allow_pickle=False) as data:
+                header = json.loads(data['header'].tobytes())
+                if header.get('version') != SNAPSHOT_VERSION or header.get('csv_sha256') != digest:
+                    return None
+                sponsors = json.loads(data['sponsors'].tobytes())
+                index = SponsorNameIndex.from_arrays(list(sponsors), data)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable sponsors snapshot {snapshot_path}: {e}")
+            return None
+        return {**header, 'sponsors': sponsors, 'index': index}
+    
+    def _write_snapshot(self, file_path: Path, snapshot: Dict):
+        snapshot_path = self._snapshot_path(file_path)
+        tmp_path = snapshot_path.with_name(f"{snapshot_path.name}.{os.getpid()}.tmp")
+        try:
+            header = {'version': snapshot['version'], 'csv_sha256': snapshot['csv_sha256']}
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    header=self._json_array(header),
+                    sponsors=self._json_array(snapshot['sponsors']),
+                    **snapshot['index'].to_arrays()
+                )
+            os.replace(tmp_path, snapshot_path)
+        except Exception as e:
+            logger.warning(f"Could not write sponsors snapshot {snapshot_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+    
+    def ensure_loaded(self):
+        """Load the default sponsors file on first use, if there is one"""
+        if self._load_attempted:
+            return
+        self._load_attempted = True
+        if not self.sponsors_data and self.sponsors_file.exists():
+            self.load_sponsors_from_csv()
+    
     def download_sponsors_data(self) -> bool:
         """
         Download latest accredited sponsors data from Department of Home Affairs
@@ -95,14 +310,7 @@ class AccreditedSponsorManager:
         normalized = company_name.lower().strip()
         
         # Remove common company suffixes
-        suffixes = [
-            'pty ltd', 'pty. ltd.', 'pty ltd.', 'pty. ltd',
-            'limited', 'ltd', 'ltd.', 'inc', 'inc.', 'corp', 'corp.',
-            'company', 'co', 'co.', 'group', 'grp', 'australia',
-            'australian', 'au'
-        ]
-        
-        for suffix in suffixes:
+        for suffix in COMPANY_SUFFIXES:
             if normalized.endswith(f' {suffix}'):
                 normalized = normalized[:-len(f' {suffix}')].strip()
         
@@ -112,6 +320,17 @@ class AccreditedSponsorManager:
         
         return normalized
     
+    def normalize_company_names(self, names: pd.Series) -> pd.Series:
+        """Vectorized normalize_company_name over a Series of names"""
+        normalized = names.fillna('').astype(str).str.lower().str.strip()
+        for suffix in COMPANY_SUFFIXES:
+            tail = f' {suffix}'
+            matched = normalized.str.endswith(tail)
+            if matched.any():
+                normalized.loc[matched] = normalized[matched].str[:-len(tail)].str.strip()
+        normalized = normalized.str.replace(r'[^\w\s]', ' ', regex=True)
+        return normalized.str.replace(r'\s+', ' ', regex=True).str.strip()
+    
     def is_accredited_sponsor(self, company_name: str) -> bool:
         """Check if a company is an accredited sponsor"""
         if not company_name:
@@ -120,32 +339,20 @@ class AccreditedSponsorManager:
         normalized = self.normalize_company_name(company_name)
         return normalized in self.sponsors_set
     
-    def find_similar_sponsors(self, company_name: str, threshold: float = 0.8) -> List[Dict]:
-        """Find similar sponsor names using fuzzy matching"""
-        try:
-            from difflib import SequenceMatcher
-        except ImportError:
-            logger.warning("difflib not available for fuzzy matching")
-            return []
-        
+    def find_similar_sponsors(self, company_name: str, threshold: float = 0.8, limit: Optional[int] = None) -> List[Dict]:
+        """Find similar sponsor names using fuzzy matching over the trigram index"""
         if not company_name:
             return []
         
         normalized_input = self.normalize_company_name(company_name)
-        matches = []
-        
-        for sponsor_name in self.sponsors_set:
-            similarity = SequenceMatcher(None, normalized_input, sponsor_name).ratio()
-            if similarity >= threshold:
-                matches.append({
-                    'sponsor_name': sponsor_name,
-                    'similarity': similarity,
-                    'data': self.sponsors_data.get(sponsor_name, {})
-                })
-        
-        # Sort by similarity descending
-        matches.sort(key=lambda x: x['similarity'], reverse=True)
-        return matches
+        return [
+            {
+                'sponsor_name': sponsor_name,
+                'similarity': similarity,
+                'data': self.sponsors_data.get(sponsor_name, {})
+            }
+            for similarity, sponsor_name in self.name_index.similar(normalized_input, threshold, limit)
+        ]
     
     def get_sponsor_info(self, company_name: str) -> Optional[Dict]:
         """Get detailed sponsor information"""
@@ -162,29 +369,27 @@ class AccreditedSponsorManager:
             return []
         
         query_normalized = self.normalize_company_name(query)
-        results = []
-        
-        for sponsor_name, data in self.sponsors_data.items():
-            if query_normalized in sponsor_name:
-                results.append({
-                    'sponsor_name': sponsor_name,
-                    'data': data
-                })
-        
-        return results
+        return [
+            {
+                'sponsor_name': sponsor_name,
+                'data': self.sponsors_data[sponsor_name]
+            }
+            for sponsor_name in self.name_index.containing(query_normalized)
+        ]
 
 # Global instance
 sponsor_manager = AccreditedSponsorManager()
 
 def check_company_sponsor_status(company_name: str) -> Dict:
     """Check if a company is an accredited sponsor and get details"""
+    sponsor_manager.ensure_loaded()
     is_sponsor = sponsor_manager.is_accredited_sponsor(company_name)
     sponsor_info = sponsor_manager.get_sponsor_info(company_name) if is_sponsor else None
     
     # If not exact match, try fuzzy matching
     similar_sponsors = []
     if not is_sponsor:
-        similar_sponsors = sponsor_manager.find_similar_sponsors(company_name, threshold=0.7)
+        similar_sponsors = sponsor_manager.find_similar_sponsors(company_name, threshold=0.7, limit=3)
         if similar_sponsors:
             # Consider it a potential sponsor if high similarity match found
             best_match = similar_sponsors[0]
@@ -5,6 +5,8 @@ from typing import List, Optional
 from app.database import get_db
 from app.schemas import Job, JobFilter, JobSearchResponse, VisaKeyword, VisaKeywordCreate
 from app.services import JobService, ScrapingService
+from app.search_index import apply_full_text_search
+from app.pagination import keyset_order, fetch_page, encode_cursor, job_count_cache, count_cache_key
 from .auth import AuthService, get_current_user
 import logging
 
@@ -48,27 +50,31 @@ async def search_jobs(
     industry: Optional[str] = Query(None, description="Company industry"),
     salary_min: Optional[float] = Query(None, description="Minimum salary filter"),
     salary_max: Optional[float] = Query(None, description="Maximum salary filter"),
+    sort: str = Query("relevance", pattern="^(relevance|newest)$", description="relevance (when searching) or newest"),
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page (keyset pagination)"),
     db: Session = Depends(get_db)
 ):
-    """Search jobs with various filters"""
+    """Search jobs with various filters.
+    Pass `cursor` (the previous response's next_cursor) for O(page) infinite scroll.
+    """
     try:
         from app.models import Job as JobModel, Company as CompanyModel
         
+        ranked = bool(search) and sort == "relevance"
+        if cursor and ranked:
+            raise HTTPException(status_code=400, detail="Cursor pagination requires sort=newest when searching")
+        
         query_obj = db.query(JobModel).filter(
             JobModel.is_active == True,
+            JobModel.is_duplicate.isnot(True),
             JobModel.source_website.in_(ALLOWED_SOURCES)
         )
         
         if search:
-            query_obj = query_obj.filter(
-                or_(
-                    JobModel.title.contains(search),
-                    JobModel.description.contains(search),
-                    JobModel.required_skills.contains(search)
-                )
-            )
+            # Full-text index (FTS5 / tsvector) with BM25-style ranking
+            query_obj = apply_full_text_search(query_obj, db, search, order_by_rank=ranked)
         
         if location:
             query_obj = query_obj.filter(
@@ -155,21 +161,47 @@ async def search_jobs(
                     )
                 )
         
-        # Get total count
-        total = query_obj.count()
-        
-        # Apply pagination
-        offset = (page - 1) * per_page
-        jobs = query_obj.offset(offset).limit(per_page).all()
+        if not ranked:
+            query_obj = keyset_order(query_obj)
+
+        if cursor:
+            # Keyset mode: total is cached per filter set so later pages never rescan
+            cache_key = count_cache_key(db, {
+                "search": search, "title": title, "location": location, "state": state, "city": city,
+                "visa_sponsorship": visa_sponsorship, "student_friendly": student_friendly,
+                "employment_type": employment_type, "category": category, "remote": remote,
+                "visa_types": visa_types, "industry": industry,
+                "salary_min": salary_min, "salary_max": salary_max,
+            })
+            total = job_count_cache.get_or_compute(cache_key, query_obj.order_by(None).count)
+            try:
+                jobs, next_cursor = fetch_page(query_obj, per_page, cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        else:
+            # Get total count
+            total = query_obj.order_by(None).count()
+            
+            # Apply pagination
+            offset = (page - 1) * per_page
+            jobs = query_obj.offset(offset).limit(per_page + 1).all()
+            next_cursor = None
+            if len(jobs) > per_page:
+                jobs = jobs[:per_page]
+                if not ranked:
+                    next_cursor = encode_cursor(jobs[-1])
         
         return {
             "jobs": jobs,
             "total": total,
             "page": page,
             "per_page": per_page,
-            "total_pages": (total + per_page - 1) // per_page
+            "total_pages": (total + per_page - 1) // per_page,
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error searching jobs: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -179,76 +211,19 @@ async def search_jobs(
 async def get_job_statistics(db: Session = Depends(get_db)):
     """Get comprehensive job statistics for dashboard"""
     try:
-        from app.models import Job as JobModel
+        from app.job_stats import job_stats
         
-        # Total jobs
-        total_jobs = db.query(JobModel).filter(
-            JobModel.is_active == True,
-            JobModel.source_website.in_(ALLOWED_SOURCES)
-        ).count()
-        
-        # Visa-friendly jobs
-        visa_friendly_jobs = db.query(JobModel).filter(
-            JobModel.is_active == True,
-            JobModel.visa_sponsorship == True,
-            JobModel.source_website.in_(ALLOWED_SOURCES)
-        ).count()
-        
-        # Student-friendly jobs
-        student_friendly_jobs = db.query(JobModel).filter(
-            JobModel.is_active == True,
-            JobModel.international_student_friendly == True,
-            JobModel.source_website.in_(ALLOWED_SOURCES)
-        ).count()
-        
-        # Jobs by state
-        jobs_by_state = dict(
-            db.query(JobModel.state, func.count(JobModel.id))
-            .filter(
-                JobModel.is_active == True,
-                JobModel.source_website.in_(ALLOWED_SOURCES)
-            )
-            .group_by(JobModel.state)
-            .all()
-        )
-        
-        # Jobs by employment type
-        jobs_by_employment_type = dict(
-            db.query(JobModel.employment_type, func.count(JobModel.id))
-            .filter(
-                JobModel.is_active == True,
-                JobModel.source_website.in_(ALLOWED_SOURCES)
-            )
-            .group_by(JobModel.employment_type)
-            .all()
-        )
-        
-        # Jobs by experience level
-        jobs_by_experience = dict(
-            db.query(JobModel.experience_level, func.count(JobModel.id))
-            .filter(
-                JobModel.is_active == True,
-                JobModel.source_website.in_(ALLOWED_SOURCES)
-            )
-            .group_by(JobModel.experience_level)
-            .all()
-        )
-        
-        # Average visa confidence
-        avg_visa_confidence = db.query(func.avg(JobModel.visa_sponsorship_confidence)).filter(
-            JobModel.is_active == True,
-            JobModel.visa_sponsorship_confidence.isnot(None),
-            JobModel.source_website.in_(ALLOWED_SOURCES)
-        ).scalar() or 0.0
+        # Served from the materialized aggregate (reconciled periodically)
+        stats = job_stats.snapshot(db, ALLOWED_SOURCES)
         
         return {
-            "total_jobs": total_jobs,
-            "visa_friendly_jobs": visa_friendly_jobs,
-            "student_friendly_jobs": student_friendly_jobs,
-            "jobs_by_state": jobs_by_state,
-            "jobs_by_employment_type": jobs_by_employment_type,
-            "jobs_by_experience": jobs_by_experience,
-            "avg_visa_confidence": round(float(avg_visa_confidence), 2)
+            "total_jobs": stats['total_jobs'],
+            "visa_friendly_jobs": stats['visa_friendly_jobs'],
+            "student_friendly_jobs": stats['student_friendly_jobs'],
+            "jobs_by_state": stats['jobs_by_state'],
+            "jobs_by_employment_type": stats['jobs_by_employment_type'],
+            "jobs_by_experience": stats['jobs_by_experience'],
+            "avg_visa_confidence": round(float(stats['avg_visa_confidence']), 2)
         }
         
     except Exception as e:
@@ -261,6 +236,7 @@ async def get_visa_friendly_jobs(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     min_confidence: float = Query(0.5, ge=0.0, le=1.0, description="Minimum confidence score"),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page"),
     db: Session = Depends(get_db)
 ):
     """Get jobs that are visa-friendly"""
@@ -268,7 +244,7 @@ async def get_visa_friendly_jobs(
         job_service = JobService(db)
         
         filters = JobFilter(visa_sponsorship=True)
-        result = job_service.search_jobs(filters, page, per_page)
+        result = job_service.search_jobs(filters, page, per_page, cursor=cursor)
         
         # Filter by confidence if specified
         if min_confidence > 0:
@@ -281,6 +257,8 @@ async def get_visa_friendly_jobs(
         
         return result
         
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.error(f"Error getting visa friendly jobs: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -290,6 +268,7 @@ async def get_visa_friendly_jobs(
 async def get_student_friendly_jobs(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page"),
     db: Session = Depends(get_db)
 ):
     """Get jobs that are friendly to international students"""
@@ -297,8 +276,10 @@ async def get_student_friendly_jobs(
         job_service = JobService(db)
         
         filters = JobFilter(international_student_friendly=True)
-        return job_service.search_jobs(filters, page, per_page)
+        return job_service.search_jobs(filters, page, per_page, cursor=cursor)
         
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.error(f"Error getting student-friendly jobs: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -318,28 +299,14 @@ def get_recommended_jobs(
     if not user or user.role.value != "student":
         return []
     
-    # Build recommendation query
-    from app.models import Job as JobModel
-    query_obj = db.query(JobModel).filter(
-        JobModel.is_active == True,
-        JobModel.source_website.in_(ALLOWED_SOURCES)
-    )
-    
-    # Score jobs based on profile matching
-    jobs = query_obj.all()
-    scored_jobs = []
-    
-    for job in jobs:
-        score = calculate_job_match_score(user, job)
-        if score > 0:
-            scored_jobs.append((job, score))
-    
-    # Sort by score and return top matches
-    scored_jobs.sort(key=lambda x: x[1], reverse=True)
-    return [job for job, score in scored_jobs[:limit]]
+    # Score every active job in one vectorized pass and hydrate only the top matches
+    from app.recommendations import recommendation_engine
+    return recommendation_engine.recommend(db, user, max(0, limit), ALLOWED_SOURCES)
 
 def calculate_job_match_score(user, job):
-    """Calculate how well a job matches a user's profile"""
+    """Calculate how well a job matches a user's profile.
+    Per-job reference for the vectorized scoring in app.recommendations.
+    """
     score = 0
     
     # Base score for all jobs
@@ -502,29 +469,23 @@ async def create_visa_keyword(
 
 # Cleanup endpoint
 @router.delete("/jobs/cleanup")
-async def cleanup_old_jobs(
-    days: int = Query(30, description="Delete jobs older than this many days"),
+def cleanup_old_jobs(
+    days: int = Query(30, description="Archive jobs scraped more than this many days ago"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Clean up old inactive jobs"""
+    """Archive expired jobs in batches (runs in the threadpool, off the event loop)"""
     try:
-        from app.models import Job as JobModel
+        from app.job_archive import archive_expired_jobs
         from datetime import datetime, timedelta
         
         cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Delete old jobs
-        deleted_count = db.query(JobModel).filter(
-            JobModel.created_at < cutoff_date,
-            JobModel.is_active == False
-        ).delete()
-        
-        db.commit()
+        result = archive_expired_jobs(db, days=days)
         
         return {
-            "message": f"Cleaned up {deleted_count} old jobs",
-            "deleted_count": deleted_count,
+            "message": f"Cleaned up {result['archived']} old jobs",
+            "deleted_count": result['archived'],
+            "deactivated_count": result['deactivated'],
             "cutoff_date": cutoff_date.isoformat()
         }
     except Exception as e:
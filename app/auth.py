@@ -18,6 +18,7 @@ from app.database import get_db
 from app.auth_models import User, UserSession, UserRole
 from app.auth_schemas import UserCreate, UserLogin, TokenResponse
 from app.session_service import SessionService
+from app.principal_cache import CachedPrincipal, principal_cache
 
 logger = logging.getLogger(__name__)
 
@@ -144,6 +145,7 @@ class AuthService:
             "role": user.role.value,
             "exp": expire,
             "iat": datetime.utcnow(),
+            "jti": secrets.token_urlsafe(16),
             "type": "access"
         }
         
@@ -282,34 +284,46 @@ def get_current_user(
         payload = auth_service.verify_token(credentials.credentials)
         user_id = int(payload.get("sub"))
         
-        # Try to get user with retry logic
-        user = None
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                user = auth_service.get_user_by_id(user_id)
-                break
-            except Exception as e:
-                logger.warning(f"Database error getting user {user_id} (attempt {attempt + 1}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(0.1 * (attempt + 1))
-                    # Try to refresh the database session
-                    try:
-                        db.rollback()
-                    except:
-                        pass
-                else:
-                    logger.error(f"Failed to get user {user_id} after {max_retries} attempts")
-                    # If we can't get the user from database, create a minimal user object from token
-                    # This prevents database issues from logging out users
-                    user = User(
-                        id=user_id,
-                        email=payload.get("email", ""),
-                        role=payload.get("role", "student"),
-                        is_active=True,
-                        is_verified=True
-                    )
-                    logger.info(f"Created minimal user object for user {user_id} due to database issues")
+        # Tokens issued before access tokens carried a jti fall back to iat
+        token_id = payload.get("jti") or payload.get("iat")
+        bind_key = str(db.get_bind().url)
+        cached = principal_cache.get(user_id, token_id, bind_key)
+        if cached is not None:
+            user = cached.attach(db)
+            has_active_session = cached.has_active_session
+        else:
+            user = None
+            has_active_session = None
+            cacheable = True
+
+            # Try to get user with retry logic
+            max_retries = 3
+            for attempt in range(max_retries):
+                try:
+                    user = auth_service.get_user_by_id(user_id)
+                    break
+                except Exception as e:
+                    logger.warning(f"Database error getting user {user_id} (attempt {attempt + 1}): {e}")
+                    if attempt < max_retries - 1:
+                        time.sleep(0.1 * (attempt + 1))
+                        # Try to refresh the database session
+                        try:
+                            db.rollback()
+                        except:
+                            pass
+                    else:
+                        logger.error(f"Failed to get user {user_id} after {max_retries} attempts")
+                        # If we can't get the user from database, create a minimal user object from token
+                        # This prevents database issues from logging out users
+                        user = User(
+                            id=user_id,
+                            email=payload.get("email", ""),
+                            role=payload.get("role", "student"),
+                            is_active=True,
+                            is_verified=True
+                        )
+                        cacheable = False
+                        logger.info(f"Created minimal user object for user {user_id} due to database issues")
         
         if not user:
             raise HTTPException(
@@ -320,8 +334,12 @@ def get_current_user(
         # For all tokens, check if user has any active sessions
         # This ensures that logged out users can't continue using tokens
         try:
-            active_sessions = session_service.get_user_sessions(user_id)
-            if not active_sessions:
+            if has_active_session is None:
+                has_active_session = session_service.has_active_session(user_id)
+                if cacheable:
+                    principal_cache.put(user_id, token_id,
+                                        CachedPrincipal.from_user(user, bind_key, has_active_session))
+            if not has_active_session:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="No active sessions - please login again"
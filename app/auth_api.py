@@ -2,7 +2,7 @@
 Authentication API Endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File, Query
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
@@ -25,16 +25,24 @@ from .auth_schemas import (
 from .models import Job, Company, JobDraft
 from .schemas import Job as JobSchema, JobDraft as JobDraftSchema, JobDraftCreate, JobDraftUpdate
 from .session_service import SessionService
+from .candidate_index import candidate_index, parse_tokens
+from .job_analytics import collect_job_analytics
+from .view_ingest import job_view_buffer
 import logging
 import uuid
 from pathlib import Path
-from sqlalchemy import text
+from sqlalchemy import exists, text
 from .supabase_utils import (
     upload_resume as supabase_upload_resume,
     upload_company_logo as supabase_upload_company_logo,
     upload_job_document as supabase_upload_job_document,
+    stage_upload,
+    UploadTooLarge,
+    run_storage_io,
+    resolve_storage_url_async,
     supabase_configured,
     resolve_storage_url,
+    resolve_storage_urls,
 )
 
 logger = logging.getLogger(__name__)
@@ -472,12 +480,14 @@ def get_current_user_profile(current_user: User = Depends(get_current_user)):
     """Get current user profile with resolved media URLs"""
     # Resolve potentially private storage URLs
     try:
-        if hasattr(current_user, "resume_url"):
-            current_user.resume_url = resolve_storage_url(getattr(current_user, "resume_url", None))
-        if hasattr(current_user, "company_logo_url"):
-            current_user.company_logo_url = resolve_storage_url(getattr(current_user, "company_logo_url", None))
-        if hasattr(current_user, "vevo_document_url"):
-            current_user.vevo_document_url = resolve_storage_url(getattr(current_user, "vevo_document_url", None))
+        media_fields = [
+            field for field in ("resume_url", "company_logo_url", "vevo_document_url")
+            if hasattr(current_user, field)
+        ]
+        resolved = resolve_storage_urls(getattr(current_user, field, None) for field in media_fields)
+        for field in media_fields:
+            value = getattr(current_user, field, None)
+            setattr(current_user, field, resolved.get(value) if value else None)
     except Exception:
         logger.exception("Failed to resolve user media URLs in /auth/me")
     return current_user
@@ -485,49 +495,64 @@ def get_current_user_profile(current_user: User = Depends(get_current_user)):
 # Student-specific endpoints
 student_router = APIRouter(prefix="/student", tags=["student"])
 
+def _paginate(query, limit: Optional[int], offset: int):
+    """Apply optional limit/offset paging to a listing query"""
+    if offset:
+        query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
 @student_router.get("/favorites", response_model=List[JobFavoriteWithJob])
 def get_student_favorites(
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size (all when omitted)"),
+    offset: int = Query(0, ge=0),
     current_user: User = Depends(get_current_student),
     db: Session = Depends(get_db)
 ):
     """Get student's favorite jobs"""
-    favorites = db.query(JobFavorite).filter(
+    # One joined query projecting only the listed columns
+    rows = _paginate(db.query(
+        JobFavorite.id, JobFavorite.job_id, JobFavorite.notes, JobFavorite.created_at,
+        Job.title, Job.description, Job.location, Job.city, Job.state,
+        Job.salary_min, Job.salary_max, Job.employment_type,
+        Job.visa_sponsorship, Job.international_student_friendly,
+        Job.source_website, Job.source_url,
+        Company.name.label("company_name"), Company.website.label("company_website"),
+    ).join(Job, Job.id == JobFavorite.job_id).outerjoin(
+        Company, Company.id == Job.company_id
+    ).filter(
         JobFavorite.user_id == current_user.id
-    ).all()
+    ).order_by(JobFavorite.id), limit, offset).all()
     
-    result = []
-    for favorite in favorites:
-        job = db.query(Job).filter(Job.id == favorite.job_id).first()
-        if job:
-            job_dict = {
-                "id": job.id,
-                "title": job.title,
-                "description": job.description,
-                "location": job.location,
-                "city": job.city,
-                "state": job.state,
-                "salary_min": job.salary_min,
-                "salary_max": job.salary_max,
-                "employment_type": job.employment_type,
-                "visa_sponsorship": job.visa_sponsorship,
-                "international_student_friendly": job.international_student_friendly,
-                "source_website": job.source_website,
-                "source_url": job.source_url,
+    return [
+        JobFavoriteWithJob(
+            id=row.id,
+            job_id=row.job_id,
+            notes=row.notes,
+            created_at=row.created_at,
+            job={
+                "id": row.job_id,
+                "title": row.title,
+                "description": row.description,
+                "location": row.location,
+                "city": row.city,
+                "state": row.state,
+                "salary_min": row.salary_min,
+                "salary_max": row.salary_max,
+                "employment_type": row.employment_type,
+                "visa_sponsorship": row.visa_sponsorship,
+                "international_student_friendly": row.international_student_friendly,
+                "source_website": row.source_website,
+                "source_url": row.source_url,
                 "company": {
-                    "name": job.company.name if job.company else "Unknown",
-                    "website": job.company.website if job.company else None
+                    "name": row.company_name or "Unknown",
+                    "website": row.company_website
                 }
             }
-            
-            result.append(JobFavoriteWithJob(
-                id=favorite.id,
-                job_id=favorite.job_id,
-                notes=favorite.notes,
-                created_at=favorite.created_at,
-                job=job_dict
-            ))
-    
-    return result
+        )
+        for row in rows
+    ]
 
 @student_router.post("/favorites", response_model=JobFavoriteResponse)
 def add_job_favorite(
@@ -622,40 +647,53 @@ def submit_job_application(
 
 @student_router.get("/applications", response_model=List[JobApplicationWithJob])
 def list_student_applications(
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size (all when omitted)"),
+    offset: int = Query(0, ge=0),
     current_user: User = Depends(get_current_student),
     db: Session = Depends(get_db)
 ):
     """List applications submitted by the current student with job info."""
-    apps = db.query(JobApplication).filter(JobApplication.user_id == current_user.id).all()
-    results: List[JobApplicationWithJob] = []
-    for app in apps:
-        job = db.query(Job).filter(Job.id == app.job_id).first()
-        if not job:
-            continue
-        job_dict = {
-            "id": job.id,
-            "title": job.title,
-            "location": job.location,
-            "city": job.city,
-            "state": job.state,
-            "company": {
-                "id": job.company.id if job.company else None,
-                "name": job.company.name if job.company else None,
-                "website": job.company.website if job.company else None,
+    rows = _paginate(db.query(
+        JobApplication.id, JobApplication.job_id, JobApplication.status,
+        JobApplication.applied_at, JobApplication.updated_at, JobApplication.cover_letter,
+        JobApplication.resume_url, JobApplication.notes,
+        Job.title, Job.location, Job.city, Job.state,
+        Company.id.label("company_id"), Company.name.label("company_name"),
+        Company.website.label("company_website"),
+    ).join(Job, Job.id == JobApplication.job_id).outerjoin(
+        Company, Company.id == Job.company_id
+    ).filter(
+        JobApplication.user_id == current_user.id
+    ).order_by(JobApplication.id), limit, offset).all()
+
+    # Sign the page's resumes in one storage call
+    resume_urls = resolve_storage_urls(row.resume_url for row in rows)
+    
+    return [
+        JobApplicationWithJob(
+            id=row.id,
+            job_id=row.job_id,
+            status=row.status,
+            applied_at=row.applied_at,
+            updated_at=row.updated_at,
+            cover_letter=row.cover_letter,
+            resume_url=resume_urls.get(row.resume_url),
+            notes=row.notes,
+            job={
+                "id": row.job_id,
+                "title": row.title,
+                "location": row.location,
+                "city": row.city,
+                "state": row.state,
+                "company": {
+                    "id": row.company_id,
+                    "name": row.company_name,
+                    "website": row.company_website,
+                },
             },
-        }
-        results.append(JobApplicationWithJob(
-            id=app.id,
-            job_id=app.job_id,
-            status=app.status,
-            applied_at=app.applied_at,
-            updated_at=app.updated_at,
-            cover_letter=app.cover_letter,
-            resume_url=resolve_storage_url(app.resume_url),
-            notes=app.notes,
-            job=job_dict,
-        ))
-    return results
+        )
+        for row in rows
+    ]
 
  
 
@@ -700,54 +738,25 @@ def recommended_candidates(
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    # Prepare job skill sets (skills are no longer collected in job posting)
-    req_skills = set()
-    pref_skills = set()
-
-    # Fetch students
-    from .auth_models import UserRole
-    students = db.query(User).filter(User.role == UserRole.STUDENT).all()
-
-    def parse_skills(s: str | None) -> set[str]:
-        if not s:
-            return set()
-        try:
-            # stored as comma-separated or JSON; try JSON first
-            import json
-            if s.strip().startswith('['):
-                return set(x.strip().lower() for x in json.loads(s) if isinstance(x, str))
-        except Exception:
-            pass
-        # fallback: comma-separated
-        return set(x.strip().lower() for x in s.split(',') if x.strip())
-
-    def score_user(u: User) -> float:
-        score = 0.0
-        u_skills = parse_skills(getattr(u, 'skills', None))
-        # required skills: +3 each
-        score += 3.0 * len(u_skills & set(map(str.lower, req_skills)))
-        # preferred skills: +1 each
-        score += 1.0 * len(u_skills & set(map(str.lower, pref_skills)))
-        # visa/international fit
-        if job.international_student_friendly:
-            score += 0.5
-        if job.visa_sponsorship and (getattr(u, 'work_authorization', '') or '').lower() in {"student_visa", "work_visa"}:
-            score += 0.5
-        # location preference simple boost
-        try:
-            prefs = parse_skills(getattr(u, 'preferred_locations', None))
-            loc_tokens = {t.strip().lower() for t in [job.city or '', job.state or '', job.location or ''] if t}
-            if prefs and (prefs & loc_tokens):
-                score += 0.5
-        except Exception:
-            pass
-        return score
+    # Score only students sharing a token with the job (see app.candidate_index)
+    ranked_ids = candidate_index.top_candidates(
+        db,
+        limit=max(1, min(limit, 100)),
+        required_skills=parse_tokens(job.required_skills),
+        preferred_skills=parse_tokens(job.preferred_skills),
+        location_tokens=[job.city or '', job.state or '', job.location or ''],
+        student_friendly=bool(job.international_student_friendly),
+        visa_sponsorship=bool(job.visa_sponsorship),
+    )
+    
+    # Hydrate only the winners, keeping rank order
+    students = {
+        u.id: u for u in db.query(User).filter(User.id.in_([user_id for _, user_id in ranked_ids]))
+    } if ranked_ids else {}
+    ranked = [(sc, students[user_id]) for sc, user_id in ranked_ids if user_id in students]
 
-    ranked = []
-    for stu in students:
-        ranked.append((score_user(stu), stu))
-    ranked.sort(key=lambda x: x[0], reverse=True)
-    ranked = [r for r in ranked if r[0] > 0][: max(1, min(limit, 100))]
+    # Sign every resume in one storage call
+    resume_urls = resolve_storage_urls(getattr(stu, 'resume_url', None) for _, stu in ranked)
 
     results = []
     for sc, stu in ranked:
@@ -761,7 +770,7 @@ def recommended_candidates(
                 "degree": getattr(stu, 'degree', None),
                 "graduation_year": getattr(stu, 'graduation_year', None),
                 "skills": getattr(stu, 'skills', None),
-                "resume_url": resolve_storage_url(getattr(stu, 'resume_url', None)),
+                "resume_url": resume_urls.get(stu.resume_url) if stu.resume_url else None,
             }
         })
     return {"job_id": job.id, "count": len(results), "items": results}
@@ -897,40 +906,41 @@ async def upload_employer_job_document(
     # Save file
     unique_name = f"jobdoc_{uuid.uuid4()}{ext}"
     file_path = base_dir / unique_name
-    # Read once
+    # The storage client streams the spooled upload as is
     try:
-        content = await file.read()
+        staged = await stage_upload(file, max_bytes=None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read file: {str(e)}")
 
     # Use Supabase storage with master bucket
-    if supabase_configured():
-        try:
-            doc_url_value = await supabase_upload_job_document(current_user.id, job_id, content, file.filename)
-            if not doc_url_value:
-                raise HTTPException(status_code=500, detail="Failed to upload job document")
-        except Exception as e:
-            logger.error(f"Supabase upload error: {e}")
-            raise HTTPException(status_code=500, detail="Storage upload failed")
-    else:
-        logger.error("Supabase not configured - missing environment variables")
-        raise HTTPException(
-            status_code=503, 
-            detail="File upload service is currently unavailable. Please contact support or try again later."
-        )
+    with staged:
+        if supabase_configured():
+            try:
+                doc_url_value = await supabase_upload_job_document(current_user.id, job_id, staged, file.filename)
+                if not doc_url_value:
+                    raise HTTPException(status_code=500, detail="Failed to upload job document")
+            except Exception as e:
+                logger.error(f"Supabase upload error: {e}")
+                raise HTTPException(status_code=500, detail="Storage upload failed")
+        else:
+            logger.error("Supabase not configured - missing environment variables")
+            raise HTTPException(
+                status_code=503, 
+                detail="File upload service is currently unavailable. Please contact support or try again later."
+            )
 
     # Update DB
     job.job_document_url = doc_url_value
     db.commit()
     db.refresh(job)
 
-    resolved_url = resolve_storage_url(job.job_document_url)
+    resolved_url = await resolve_storage_url_async(job.job_document_url)
     logger.info(f"Employer {current_user.id} uploaded document for job {job_id}")
     return {
         "job_id": job.id,
         "job_document_url": resolved_url,
         "file_name": file.filename,
-        "file_size": len(content)
+        "file_size": staged.size
     }
 
 @employer_router.get("/jobs", response_model=List[JobSchema])
@@ -1352,55 +1362,69 @@ def publish_job_draft(
 
 @employer_router.get("/applications", response_model=List[EmployerApplicationWithUser])
 def list_employer_applications(
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size (all when omitted)"),
+    offset: int = Query(0, ge=0),
     current_user: User = Depends(get_current_employer),
     db: Session = Depends(get_db)
 ):
     """List applications for all jobs posted by the current employer, including applicant info."""
-    # Fetch applications joined with jobs owned by employer
-    applications = db.query(JobApplication).join(Job, JobApplication.job_id == Job.id).filter(
+    # Applications joined with the employer's jobs, their companies and the applicants in one query
+    rows = _paginate(db.query(
+        JobApplication.id, JobApplication.job_id, JobApplication.status,
+        JobApplication.applied_at, JobApplication.updated_at, JobApplication.cover_letter,
+        JobApplication.resume_url, JobApplication.notes,
+        Job.title, Job.location, Job.city, Job.state,
+        Company.id.label("company_id"), Company.name.label("company_name"),
+        Company.website.label("company_website"),
+        User.id.label("user_id"), User.full_name, User.email, User.university, User.degree,
+        User.graduation_year, User.resume_url.label("user_resume_url"),
+    ).join(Job, JobApplication.job_id == Job.id).join(
+        User, User.id == JobApplication.user_id
+    ).outerjoin(
+        Company, Company.id == Job.company_id
+    ).filter(
         Job.posted_by_user_id == current_user.id
-    ).all()
+    ).order_by(JobApplication.id), limit, offset).all()
 
-    results: List[EmployerApplicationWithUser] = []
-    for app in applications:
-        job = db.query(Job).filter(Job.id == app.job_id).first()
-        user = db.query(User).filter(User.id == app.user_id).first()
-        if not job or not user:
-            continue
-        job_dict = {
-            "id": job.id,
-            "title": job.title,
-            "location": job.location,
-            "city": job.city,
-            "state": job.state,
-            "company": {
-                "id": job.company.id if job.company else None,
-                "name": job.company.name if job.company else (current_user.company_name or "Unknown"),
-                "website": job.company.website if job.company else None,
+    # Sign the page's application and profile resumes in one storage call
+    resume_urls = resolve_storage_urls(
+        url for row in rows for url in (row.resume_url, row.user_resume_url)
+    )
+
+    return [
+        EmployerApplicationWithUser(
+            id=row.id,
+            job_id=row.job_id,
+            status=row.status,
+            applied_at=row.applied_at,
+            updated_at=row.updated_at,
+            cover_letter=row.cover_letter,
+            resume_url=resume_urls.get(row.resume_url),
+            notes=row.notes,
+            job={
+                "id": row.job_id,
+                "title": row.title,
+                "location": row.location,
+                "city": row.city,
+                "state": row.state,
+                "company": {
+                    "id": row.company_id,
+                    "name": row.company_name if row.company_id else (current_user.company_name or "Unknown"),
+                    "website": row.company_website,
+                },
             },
-        }
-        user_dict = {
-            "id": user.id,
-            "full_name": user.full_name,
-            "email": user.email,
-            "university": user.university,
-            "degree": user.degree,
-            "graduation_year": user.graduation_year,
-            "resume_url": resolve_storage_url(getattr(user, "resume_url", None)),
-        }
-        results.append(EmployerApplicationWithUser(
-            id=app.id,
-            job_id=app.job_id,
-            status=app.status,
-            applied_at=app.applied_at,
-            updated_at=app.updated_at,
-            cover_letter=app.cover_letter,
-            resume_url=resolve_storage_url(app.resume_url),
-            notes=app.notes,
-            job=job_dict,
-            user=user_dict,
-        ))
-    return results
+            user={
+                "id": row.user_id,
+                "full_name": row.full_name,
+                "email": row.email,
+                "university": row.university,
+                "degree": row.degree,
+                "graduation_year": row.graduation_year,
+                "resume_url": resume_urls.get(row.user_resume_url),
+            },
+        )
+        for row in rows
+    ]
 
 @employer_router.put("/applications/{application_id}/status", response_model=JobApplicationResponse)
 def update_application_status(
@@ -1501,21 +1525,18 @@ async def upload_user_resume(
     if any(char in file.filename for char in ['..', '/', '\\', '<', '>', ':', '"', '|', '?', '*']):
         raise HTTPException(status_code=400, detail="Invalid filename characters")
 
-    # Read content once
+    # Enforce the 10MB limit on the spooled upload without copying it
     try:
-        content = await file.read()
+        staged = await stage_upload(file)
+    except UploadTooLarge:
+        raise HTTPException(status_code=400, detail="File size exceeds 10MB limit")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read file: {str(e)}")
     
-    # Validate file size (10MB limit)
-    max_size = 10 * 1024 * 1024  # 10MB in bytes
-    if len(content) > max_size:
-        raise HTTPException(status_code=400, detail="File size exceeds 10MB limit")
-    
     # Validate MIME type for additional security (optional)
     try:
         import magic
-        mime_type = magic.from_buffer(content, mime=True)
+        mime_type = await run_storage_io(magic.from_buffer, staged.head, mime=True)
         if mime_type not in allowed_mime_types:
             logger.warning(f"Invalid MIME type detected: {mime_type}")
             # Don't fail for MIME type mismatch, just log it
@@ -1527,21 +1548,22 @@ async def upload_user_resume(
         # Continue without MIME validation if it fails
 
     # Use Supabase storage with master bucket
-    if supabase_configured():
-        try:
-            resume_url_value = await supabase_upload_resume(current_user.id, content, file.filename)
-            if not resume_url_value:
-                logger.error("Supabase upload returned None - client creation or upload failed")
+    with staged:
+        if supabase_configured():
+            try:
+                resume_url_value = await supabase_upload_resume(current_user.id, staged, file.filename)
+                if not resume_url_value:
+                    logger.error("Supabase upload returned None - client creation or upload failed")
+                    raise HTTPException(status_code=500, detail="File upload service is temporarily unavailable. Please try again later.")
+            except Exception as e:
+                logger.error(f"Supabase upload error: {e}")
                 raise HTTPException(status_code=500, detail="File upload service is temporarily unavailable. Please try again later.")
-        except Exception as e:
-            logger.error(f"Supabase upload error: {e}")
-            raise HTTPException(status_code=500, detail="File upload service is temporarily unavailable. Please try again later.")
-    else:
-        logger.error("Supabase not configured - missing environment variables")
-        raise HTTPException(
-            status_code=503, 
-            detail="File upload service is currently unavailable. Please contact support or try again later."
-        )
+        else:
+            logger.error("Supabase not configured - missing environment variables")
+            raise HTTPException(
+                status_code=503, 
+                detail="File upload service is currently unavailable. Please contact support or try again later."
+            )
 
     # Update user profile
     try:
@@ -1560,14 +1582,14 @@ async def upload_user_resume(
             raise HTTPException(status_code=500, detail=f"Database error updating resume URL: {str(e)}")
 
     # For response, resolve to public/signed URL
-    resolved_url = resolve_storage_url(current_user.resume_url)
+    resolved_url = await resolve_storage_url_async(current_user.resume_url)
     logger.info(f"User {current_user.id} uploaded resume: {resolved_url}")
     logger.info(f"Stored URL: {current_user.resume_url}")
     logger.info(f"Resolved URL: {resolved_url}")
     return {
         "resume_url": resolved_url,
         "file_name": file.filename,
-        "file_size": len(content)
+        "file_size": staged.size
     }
 
 @router.get("/resume/view")
@@ -1580,7 +1602,7 @@ async def view_resume(
     
     try:
         # Always resolve to master bucket
-        resolved_url = resolve_storage_url(current_user.resume_url)
+        resolved_url = await resolve_storage_url_async(current_user.resume_url)
         logger.info(f"Resolving resume URL for user {current_user.id}: {current_user.resume_url} -> {resolved_url}")
         
         if not resolved_url:
@@ -1608,39 +1630,40 @@ async def upload_employer_company_logo(
     ext = Path(file.filename).suffix.lower()
     if ext not in allowed_extensions:
         raise HTTPException(status_code=400, detail="Unsupported file type")
-    # Read once
+    # The storage client streams the spooled upload as is
     try:
-        content = await file.read()
+        staged = await stage_upload(file, max_bytes=None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read file: {str(e)}")
 
     # Use Supabase storage with master bucket
-    if supabase_configured():
-        try:
-            logo_url_value = await supabase_upload_company_logo(current_user.id, content, file.filename)
-            if not logo_url_value:
-                raise HTTPException(status_code=500, detail="Failed to upload company logo")
-        except Exception as e:
-            logger.error(f"Supabase upload error: {e}")
-            raise HTTPException(status_code=500, detail="Storage upload failed")
-    else:
-        logger.error("Supabase not configured - missing environment variables")
-        raise HTTPException(
-            status_code=503, 
-            detail="File upload service is currently unavailable. Please contact support or try again later."
-        )
+    with staged:
+        if supabase_configured():
+            try:
+                logo_url_value = await supabase_upload_company_logo(current_user.id, staged, file.filename)
+                if not logo_url_value:
+                    raise HTTPException(status_code=500, detail="Failed to upload company logo")
+            except Exception as e:
+                logger.error(f"Supabase upload error: {e}")
+                raise HTTPException(status_code=500, detail="Storage upload failed")
+        else:
+            logger.error("Supabase not configured - missing environment variables")
+            raise HTTPException(
+                status_code=503, 
+                detail="File upload service is currently unavailable. Please contact support or try again later."
+            )
 
     # Update user profile
     current_user.company_logo_url = logo_url_value
     db.commit()
     db.refresh(current_user)
 
-    resolved_url = resolve_storage_url(current_user.company_logo_url)
+    resolved_url = await resolve_storage_url_async(current_user.company_logo_url)
     logger.info(f"Employer {current_user.id} uploaded company logo: {resolved_url}")
     return {
         "company_logo_url": resolved_url,
         "file_name": file.filename,
-        "file_size": len(content)
+        "file_size": staged.size
     }
 
 # Job View Tracking
@@ -1651,24 +1674,26 @@ def track_job_view(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Track job view for analytics"""
-    # Check if job exists
-    job = db.query(Job).filter(Job.id == job_id).first()
-    if not job:
+    """Track job view for analytics (queued and written in bulk by job_view_buffer)"""
+    # Check if job exists (a primary key probe; the view itself is written behind)
+    if not db.query(exists().where(Job.id == job_id)).scalar():
         raise HTTPException(status_code=404, detail="Job not found")
     
-    # Create job view record
-    job_view = JobView(
+    viewed_at = datetime.utcnow()
+    job_view_buffer.submit(
         job_id=job_id,
         user_id=current_user.id,
-        referrer=view_data.referrer
+        referrer=view_data.referrer,
+        viewed_at=viewed_at
     )
     
-    db.add(job_view)
-    db.commit()
-    db.refresh(job_view)
-    
-    return job_view
+    return JobViewResponse(
+        id=None,
+        job_id=job_id,
+        user_id=current_user.id,
+        viewed_at=viewed_at,
+        referrer=view_data.referrer
+    )
 
 # Employer Analytics
 @employer_router.get("/analytics/jobs", response_model=List[JobAnalytics])
@@ -1677,73 +1702,17 @@ def get_job_analytics(
     db: Session = Depends(get_db)
 ):
     """Get analytics for employer's job postings"""
-    from sqlalchemy import func
-    from datetime import datetime, timedelta
-    
-    # Get employer's jobs with analytics
-    jobs = db.query(Job).filter(Job.posted_by_user_id == current_user.id).all()
+    jobs = db.query(Job.id, Job.title).filter(Job.posted_by_user_id == current_user.id).all()
+    if not jobs:
+        return []
     
-    analytics = []
-    for job in jobs:
-        # Total views
-        total_views = db.query(JobView).filter(JobView.job_id == job.id).count()
-        
-        # Unique views (distinct users)
-        unique_views = db.query(func.count(func.distinct(JobView.user_id))).filter(
-            JobView.job_id == job.id,
-            JobView.user_id.isnot(None)
-        ).scalar() or 0
-        
-        # Student views (users with student role)
-        student_views = db.query(JobView).join(User).filter(
-            JobView.job_id == job.id,
-            User.role == "STUDENT"
-        ).count()
-        
-        # Anonymous views
-        anonymous_views = db.query(JobView).filter(
-            JobView.job_id == job.id,
-            JobView.user_id.is_(None)
-        ).count()
-        
-        # Views by referrer
-        referrer_data = db.query(
-            JobView.referrer,
-            func.count(JobView.id).label('count')
-        ).filter(JobView.job_id == job.id).group_by(JobView.referrer).all()
-        
-        views_by_referrer = {ref or 'direct': count for ref, count in referrer_data}
-        
-        # Views by date (last 30 days)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        date_data = db.query(
-            func.date(JobView.viewed_at).label('date'),
-            func.count(JobView.id).label('count')
-        ).filter(
-            JobView.job_id == job.id,
-            JobView.viewed_at >= thirty_days_ago
-        ).group_by(func.date(JobView.viewed_at)).all()
-        
-        views_by_date = {str(date): count for date, count in date_data}
-        
-        # Applications and favorites count
-        applications_count = len(job.applications)
-        favorites_count = len(job.favorited_by)
-        
-        analytics.append(JobAnalytics(
-            job_id=job.id,
-            title=job.title,
-            total_views=total_views,
-            unique_views=unique_views,
-            student_views=student_views,
-            anonymous_views=anonymous_views,
-            views_by_referrer=views_by_referrer,
-            views_by_date=views_by_date,
-            applications_count=applications_count,
-            favorites_count=favorites_count
-        ))
+    # Grouped aggregates over all of the employer's jobs at once
+    job_analytics = collect_job_analytics(db, [job.id for job in jobs])
     
-    return analytics
+    return [
+        JobAnalytics(job_id=job.id, title=job.title, **job_analytics[job.id])
+        for job in jobs
+    ]
 
 @employer_router.put("/jobs/{job_id}", response_model=JobSchema)
 def update_job_posting(
@@ -2,7 +2,7 @@
 Authentication and User Management Models
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Text, Enum, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -184,6 +184,41 @@ class JobView(Base):
     job = relationship("Job", back_populates="views")
     user = relationship("User")
 
+class JobViewRollup(Base):
+    """Daily view counts per job, referrer and viewer role, compacted from job_views"""
+    __tablename__ = "job_view_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False, index=True)
+    bucket = Column(Date, nullable=False)
+    referrer = Column(String(500), nullable=False, default="")  # "" for direct views
+    role = Column(String(20), nullable=False)  # student, employer, admin, anonymous, unknown
+    view_count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint("job_id", "bucket", "referrer", "role", name="uq_job_view_rollup"),
+    )
+
+class JobViewViewer(Base):
+    """First view of a job by a signed-in user; keeps unique-viewer counts exact after pruning"""
+    __tablename__ = "job_view_viewers"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    first_viewed_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint("job_id", "user_id", name="uq_job_view_viewer"),
+    )
+
+class JobViewRollupState(Base):
+    """Compaction watermark: job_views before `compacted_until` are in the rollups"""
+    __tablename__ = "job_view_rollup_state"
+    
+    name = Column(String(50), primary_key=True)
+    compacted_until = Column(DateTime, nullable=False)
+
 class UserSession(Base):
     __tablename__ = "user_sessions"
     
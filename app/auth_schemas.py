@@ -303,7 +303,7 @@ class JobViewCreate(BaseModel):
     referrer: Optional[str] = None
 
 class JobViewResponse(BaseModel):
-    id: int
+    id: Optional[int] = None  # assigned when the buffered view is written
     job_id: int
     user_id: Optional[int]
     viewed_at: datetime
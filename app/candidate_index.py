@@ -0,0 +1,232 @@
+"""
+Inverted index of student skill and location tokens for employer candidate recommendations
+"""
+
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.auth_models import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "candidate_index_pending"
+
+VISA_WORK_AUTHORIZATIONS = {"student_visa", "work_visa"}
+
+# Scoring weights (see score breakdown in CandidateIndex.top_candidates)
+REQUIRED_SKILL_WEIGHT = 3.0
+PREFERRED_SKILL_WEIGHT = 1.0
+STUDENT_FRIENDLY_BONUS = 0.5
+VISA_BONUS = 0.5
+LOCATION_BONUS = 0.5
+
+
+def parse_tokens(value) -> Set[str]:
+    """Normalize a JSON list or comma-separated string into lowercase tokens"""
+    if not value:
+        return set()
+    if isinstance(value, (list, tuple, set)):
+        return {x.strip().lower() for x in value if isinstance(x, str) and x.strip()}
+    try:
+        # stored as comma-separated or JSON; try JSON first
+        if value.strip().startswith('['):
+            return {x.strip().lower() for x in json.loads(value) if isinstance(x, str)}
+    except Exception:
+        pass
+    # fallback: comma-separated
+    return {x.strip().lower() for x in value.split(',') if x.strip()}
+
+
+class IndexedProfile(NamedTuple):
+    """The indexed columns of a user, captured at flush time"""
+    id: int
+    role: Optional[UserRole]
+    skills: Optional[str]
+    preferred_locations: Optional[str]
+    work_authorization: Optional[str]
+
+    @classmethod
+    def from_user(cls, user: User) -> "IndexedProfile":
+        return cls(user.id, user.role, user.skills, user.preferred_locations, user.work_authorization)
+
+
+class CandidateIndex:
+    """Token -> student id postings, maintained on profile changes.
+    Rebuilt from the database on first use and after `ttl_seconds`, which also
+    picks up changes made by other worker processes.
+    """
+
+    def __init__(self, ttl_seconds: int = 600):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._built_at: Optional[float] = None
+        self._bind_key: Optional[str] = None
+        self._skills: Dict[str, Set[int]] = defaultdict(set)
+        self._locations: Dict[str, Set[int]] = defaultdict(set)
+        self._visa_students: Set[int] = set()
+        self._students: Dict[int, Tuple[frozenset, frozenset]] = {}
+        self._sorted_ids: Optional[List[int]] = None
+
+    def ensure_built(self, db: Session):
+        with self._lock:
+            if (self._built_at is None
+                    or self._bind_key != str(db.get_bind().url)
+                    or time.monotonic() - self._built_at > self.ttl_seconds):
+                self.rebuild(db)
+
+    def rebuild(self, db: Session):
+        """Load the index from the database (only the indexed columns)"""
+        rows = db.query(
+            User.id, User.skills, User.preferred_locations, User.work_authorization
+        ).filter(User.role == UserRole.STUDENT).all()
+        with self._lock:
+            self._skills.clear()
+            self._locations.clear()
+            self._visa_students.clear()
+            self._students.clear()
+            self._sorted_ids = None
+            for row in rows:
+                self._add(row.id, row.skills, row.preferred_locations, row.work_authorization)
+            self._built_at = time.monotonic()
+            self._bind_key = str(db.get_bind().url)
+        logger.info(f"Candidate index built for {len(rows)} students")
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def _add(self, user_id: int, skills, preferred_locations, work_authorization):
+        skill_tokens = frozenset(parse_tokens(skills))
+        location_tokens = frozenset(parse_tokens(preferred_locations))
+        for token in skill_tokens:
+            self._skills[token].add(user_id)
+        for token in location_tokens:
+            self._locations[token].add(user_id)
+        if (work_authorization or '').lower() in VISA_WORK_AUTHORIZATIONS:
+            self._visa_students.add(user_id)
+        self._students[user_id] = (skill_tokens, location_tokens)
+        self._sorted_ids = None
+
+    def _remove(self, user_id: int):
+        entry = self._students.pop(user_id, None)
+        if entry is None:
+            return
+        skill_tokens, location_tokens = entry
+        for postings, tokens in ((self._skills, skill_tokens), (self._locations, location_tokens)):
+            for token in tokens:
+                postings[token].discard(user_id)
+                if not postings[token]:
+                    del postings[token]
+        self._visa_students.discard(user_id)
+        self._sorted_ids = None
+
+    def update_user(self, user: Union[User, IndexedProfile], bind_key: Optional[str] = None):
+        """Re-index one user after a profile change (drops non-students)"""
+        with self._lock:
+            if self._built_at is None or (bind_key and bind_key != self._bind_key):
+                return
+            self._remove(user.id)
+            if user.role == UserRole.STUDENT:
+                self._add(user.id, user.skills, user.preferred_locations, user.work_authorization)
+
+    def remove_user(self, user_id: int, bind_key: Optional[str] = None):
+        with self._lock:
+            if self._built_at is not None and (not bind_key or bind_key == self._bind_key):
+                self._remove(user_id)
+
+    def top_candidates(self,
+                       db: Session,
+                       limit: int,
+                       required_skills: Iterable[str] = (),
+                       preferred_skills: Iterable[str] = (),
+                       location_tokens: Iterable[str] = (),
+                       student_friendly: bool = False,
+                       visa_sponsorship: bool = False) -> List[Tuple[float, int]]:
+        """Top `limit` (score, student_id) pairs with score > 0, best first (ties by id).
+        Only students sharing a token with the job are scored; when the job is
+        student friendly every student scores the flat bonus and the remainder is
+        filled in id order.
+        """
+        self.ensure_built(db)
+        required = {s.strip().lower() for s in required_skills if s}
+        preferred = {s.strip().lower() for s in preferred_skills if s}
+        locations = {t.strip().lower() for t in location_tokens if t}
+        base = STUDENT_FRIENDLY_BONUS if student_friendly else 0.0
+
+        with self._lock:
+            scores: Dict[int, float] = defaultdict(float)
+            for token in required:
+                for user_id in self._skills.get(token, ()):
+                    scores[user_id] += REQUIRED_SKILL_WEIGHT
+            for token in preferred:
+                for user_id in self._skills.get(token, ()):
+                    scores[user_id] += PREFERRED_SKILL_WEIGHT
+            if visa_sponsorship:
+                for user_id in self._visa_students:
+                    scores[user_id] += VISA_BONUS
+            located = set()
+            for token in locations:
+                located.update(self._locations.get(token, ()))
+            for user_id in located:
+                scores[user_id] += LOCATION_BONUS
+
+            top = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+            ranked = [(score + base, user_id) for user_id, score in top]
+
+            if base and len(ranked) < limit:
+                if self._sorted_ids is None:
+                    self._sorted_ids = sorted(self._students)
+                for user_id in self._sorted_ids:
+                    if len(ranked) >= limit:
+                        break
+                    if user_id not in scores:
+                        ranked.append((base, user_id))
+        return ranked
+
+
+candidate_index = CandidateIndex(ttl_seconds=int(os.getenv("CANDIDATE_INDEX_TTL", "600")))
+
+
+def _pending(session: Session) -> Dict[int, Optional[IndexedProfile]]:
+    return session.info.setdefault(_PENDING_KEY, {})
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+def _stage_user(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        _pending(session)[target.id] = IndexedProfile.from_user(target)
+
+
+@event.listens_for(User, "after_delete")
+def _stage_user_removal(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        _pending(session)[target.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        bind_key = str(session.get_bind().url)
+        for user_id, profile in pending.items():
+            if profile is None:
+                candidate_index.remove_user(user_id, bind_key)
+            else:
+                candidate_index.update_user(profile, bind_key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,153 @@
+"""
+Company resolution cache: normalized company name -> Company id and sponsor
+status, shared across scraping runs so repeated names skip the DB lookup and the
+accredited sponsor check. Companies created in a transaction only become visible
+to other sessions once it commits.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import Company, company_key
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "company_cache_pending"
+
+
+class CachedCompany:
+    """The parts of a Company row that scrapers need to attach jobs to it"""
+
+    __slots__ = ("id", "name", "is_accredited_sponsor", "sponsor_confidence")
+
+    def __init__(self, id: int, name: str, is_accredited_sponsor: bool, sponsor_confidence: float):
+        self.id = id
+        self.name = name
+        self.is_accredited_sponsor = is_accredited_sponsor
+        self.sponsor_confidence = sponsor_confidence
+
+    @classmethod
+    def from_company(cls, company: Company) -> "CachedCompany":
+        return cls(company.id, company.name, bool(company.is_accredited_sponsor), company.sponsor_confidence or 0.0)
+
+
+class CompanyCache:
+    """TTL + LRU cache of CachedCompany entries keyed by (bind, normalized name)"""
+
+    def __init__(self, ttl_seconds: int = 3600, max_entries: int = 50000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, CachedCompany]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bind_key(db: Session) -> str:
+        return str(db.get_bind().url)
+
+    def get(self, bind_key: str, key: str) -> Optional[CachedCompany]:
+        with self._lock:
+            entry = self._entries.get((bind_key, key))
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[(bind_key, key)]
+                return None
+            self._entries.move_to_end((bind_key, key))
+            return entry[1]
+
+    def put(self, bind_key: str, key: str, company: CachedCompany):
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[(bind_key, key)] = (time.monotonic() + self.ttl_seconds, company)
+            self._entries.move_to_end((bind_key, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def lookup(self, db: Session, names: Iterable[str]) -> Dict[str, CachedCompany]:
+        """Resolve normalized names to companies: this session's uncommitted
+        companies, then the cache, then one IN query on companies.normalized_name
+        """
+        bind_key = self._bind_key(db)
+        pending = db.info.get(_PENDING_KEY, {})
+        found: Dict[str, CachedCompany] = {}
+        missing = set()
+        for key in names:
+            company = pending.get(key) or self.get(bind_key, key)
+            if company is not None:
+                found[key] = company
+            else:
+                missing.add(key)
+
+        if missing:
+            rows = db.query(
+                Company.id, Company.name, Company.normalized_name,
+                Company.is_accredited_sponsor, Company.sponsor_confidence
+            ).filter(Company.normalized_name.in_(missing)).order_by(Company.id).all()
+            for row in rows:
+                if row.normalized_name in found:
+                    continue
+                company = CachedCompany(row.id, row.name, bool(row.is_accredited_sponsor), row.sponsor_confidence or 0.0)
+                found[row.normalized_name] = company
+                self.put(bind_key, row.normalized_name, company)
+        return found
+
+    def stage(self, db: Session, company: Company):
+        """Remember a flushed, uncommitted company; it is cached when `db` commits"""
+        db.info.setdefault(_PENDING_KEY, {})[company.normalized_name] = CachedCompany.from_company(company)
+
+    def invalidate(self, key: Optional[str]):
+        if key is None:
+            return
+        with self._lock:
+            for entry_key in [entry_key for entry_key in self._entries if entry_key[1] == key]:
+                del self._entries[entry_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+company_cache = CompanyCache(
+    ttl_seconds=int(os.getenv("COMPANY_CACHE_TTL", "3600")),
+    max_entries=int(os.getenv("COMPANY_CACHE_MAX_ENTRIES", "50000")),
+)
+
+
+def resolve_company(db: Session, company_name: str) -> Optional[CachedCompany]:
+    """Cached lookup of a single company by name"""
+    key = company_key(company_name)
+    return company_cache.lookup(db, [key]).get(key)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        bind_key = CompanyCache._bind_key(session)
+        for key, company in pending.items():
+            company_cache.put(bind_key, key, company)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+@event.listens_for(Company, "after_update")
+@event.listens_for(Company, "after_delete")
+def _company_changed(mapper, connection, target):
+    company_cache.invalidate(target.normalized_name)
+    # A rename leaves the old name pointing at this company too
+    for old_key in inspect(target).attrs.normalized_name.history.deleted:
+        company_cache.invalidate(old_key)
@@ -0,0 +1,262 @@
+"""
+Set-based job view analytics: one grouped pass per metric across a set of jobs
+instead of a round of queries per job.
+
+Raw job_views are periodically compacted into daily rollups keyed by
+(job_id, bucket, referrer, role) and pruned once outside the retention window;
+reads combine the rollups with the live tail of raw views after the watermark.
+"""
+
+import logging
+import os
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.auth_models import (
+    JobApplication, JobFavorite, JobView, JobViewRollup, JobViewRollupState, JobViewViewer, User, UserRole
+)
+
+logger = logging.getLogger(__name__)
+
+VIEWS_BY_DATE_DAYS = 30
+
+# Raw views younger than this are left for the next run (buffered inserts may still land)
+ROLLUP_LAG_MINUTES = int(os.getenv("JOB_VIEW_ROLLUP_LAG_MINUTES", "60"))
+# Raw views are kept this long, and only deleted once rolled up
+RAW_VIEW_RETENTION_DAYS = int(os.getenv("JOB_VIEW_RETENTION_DAYS", "30"))
+# Compaction commits after every window of raw views, and pruning after every batch of rows
+COMPACTION_WINDOW_HOURS = int(os.getenv("JOB_VIEW_COMPACTION_WINDOW_HOURS", "24"))
+PRUNE_BATCH_SIZE = int(os.getenv("JOB_VIEW_PRUNE_BATCH_SIZE", "5000"))
+
+ROLLUP_STATE_NAME = "job_views"
+ANONYMOUS_ROLE = "anonymous"
+UNKNOWN_ROLE = "unknown"
+
+
+def _empty_analytics() -> Dict:
+    return {
+        'total_views': 0,
+        'unique_views': 0,
+        'student_views': 0,
+        'anonymous_views': 0,
+        'views_by_referrer': {},
+        'views_by_date': {},
+        'applications_count': 0,
+        'favorites_count': 0,
+    }
+
+
+def _as_date(value) -> date:
+    # func.date() yields strings on SQLite and dates on PostgreSQL
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def rollup_watermark(db: Session) -> Optional[datetime]:
+    """Views before this instant are in the rollups (None before the first compaction)"""
+    return db.query(JobViewRollupState.compacted_until).filter(
+        JobViewRollupState.name == ROLLUP_STATE_NAME
+    ).scalar()
+
+
+def _roll_up_window(db: Session, start: datetime, end: datetime) -> Dict[str, int]:
+    """Add raw views in [start, end) to the daily rollups and the viewer set (not committed)"""
+    window = [JobView.viewed_at >= start, JobView.viewed_at < end]
+
+    bucket = func.date(JobView.viewed_at)
+    rows = db.query(
+        JobView.job_id, bucket, JobView.referrer, JobView.user_id.is_(None), User.role, func.count(JobView.id)
+    ).outerjoin(User, User.id == JobView.user_id).filter(*window).group_by(
+        JobView.job_id, bucket, JobView.referrer, JobView.user_id.is_(None), User.role
+    ).all()
+
+    counts = Counter()
+    for job_id, day, referrer, anonymous, role, count in rows:
+        if anonymous:
+            role_name = ANONYMOUS_ROLE
+        else:
+            role_name = role.value if role is not None else UNKNOWN_ROLE
+        counts[(job_id, _as_date(day), referrer or "", role_name)] += count
+
+    if counts:
+        job_ids = {key[0] for key in counts}
+        buckets = {key[1] for key in counts}
+        existing = {
+            (r.job_id, r.bucket, r.referrer, r.role): r
+            for r in db.query(JobViewRollup).filter(
+                JobViewRollup.job_id.in_(job_ids), JobViewRollup.bucket.in_(buckets)
+            )
+        }
+        for key, count in counts.items():
+            rollup = existing.get(key)
+            if rollup is not None:
+                rollup.view_count += count
+            else:
+                db.add(JobViewRollup(job_id=key[0], bucket=key[1], referrer=key[2], role=key[3], view_count=count))
+
+    # Signed-in viewers not seen before, for exact unique-viewer counts
+    viewer_rows = db.query(
+        JobView.job_id, JobView.user_id, func.min(JobView.viewed_at)
+    ).filter(*window, JobView.user_id.isnot(None)).group_by(JobView.job_id, JobView.user_id).all()
+    new_viewers = 0
+    if viewer_rows:
+        seen = set(db.query(JobViewViewer.job_id, JobViewViewer.user_id).filter(
+            JobViewViewer.job_id.in_({job_id for job_id, _, _ in viewer_rows})
+        ).all())
+        for job_id, user_id, first_viewed_at in viewer_rows:
+            if (job_id, user_id) not in seen:
+                db.add(JobViewViewer(job_id=job_id, user_id=user_id, first_viewed_at=first_viewed_at))
+                new_viewers += 1
+
+    return {'rolled_up': sum(counts.values()), 'buckets': len(counts), 'viewers': new_viewers}
+
+
+def compact_job_views(db: Session,
+                      lag_minutes: int = ROLLUP_LAG_MINUTES,
+                      retention_days: int = RAW_VIEW_RETENTION_DAYS,
+                      window_hours: int = COMPACTION_WINDOW_HOURS,
+                      prune_batch_size: int = PRUNE_BATCH_SIZE) -> Dict[str, int]:
+    """Roll raw views between the watermark and now - lag into the daily rollups,
+    then prune rolled-up views older than the retention window. Each `window_hours`
+    slice is rolled up and moves the watermark in its own transaction, and pruning
+    deletes `prune_batch_size` rows per commit, so a large backlog never holds
+    locks for the whole run.
+    """
+    now = datetime.utcnow()
+    state = db.get(JobViewRollupState, ROLLUP_STATE_NAME)
+    start = state.compacted_until if state else None
+    end = now - timedelta(minutes=lag_minutes)
+    if start is not None and end <= start:
+        return {'rolled_up': 0, 'buckets': 0, 'viewers': 0, 'pruned': 0}
+
+    if start is None:
+        # First compaction: start at the oldest raw view
+        start = min(db.query(func.min(JobView.viewed_at)).scalar() or end, end)
+        state = JobViewRollupState(name=ROLLUP_STATE_NAME, compacted_until=start)
+        db.add(state)
+        db.commit()
+
+    result = Counter({'rolled_up': 0, 'buckets': 0, 'viewers': 0})
+    step = timedelta(hours=window_hours)
+    while start < end:
+        window_end = min(start + step, end)
+        result.update(_roll_up_window(db, start, window_end))
+        state.compacted_until = window_end
+        db.commit()
+        start = window_end
+
+    # Only views already in the rollups are deleted
+    prune_before = min(state.compacted_until, now - timedelta(days=retention_days))
+    pruned = 0
+    while True:
+        view_ids = [view_id for (view_id,) in db.query(JobView.id).filter(
+            JobView.viewed_at < prune_before
+        ).order_by(JobView.id).limit(prune_batch_size)]
+        if not view_ids:
+            break
+        pruned += db.query(JobView).filter(JobView.id.in_(view_ids)).delete(synchronize_session=False)
+        db.commit()
+        if len(view_ids) < prune_batch_size:
+            break
+
+    result = {**result, 'pruned': pruned}
+    logger.info(f"Compacted job views up to {end.isoformat()}: {result}")
+    return result
+
+
+def collect_job_analytics(db: Session, job_ids) -> Dict[int, Dict]:
+    """Analytics for every job in `job_ids`, keyed by job id (rollups plus live tail)"""
+    analytics: Dict[int, Dict] = defaultdict(_empty_analytics)
+    since = datetime.utcnow() - timedelta(days=VIEWS_BY_DATE_DAYS)
+    watermark = rollup_watermark(db)
+
+    tail = [JobView.job_id.in_(job_ids)]
+    if watermark is not None:
+        tail.append(JobView.viewed_at >= watermark)
+
+        rollup_rows = db.query(
+            JobViewRollup.job_id, JobViewRollup.role, func.sum(JobViewRollup.view_count)
+        ).filter(JobViewRollup.job_id.in_(job_ids)).group_by(JobViewRollup.job_id, JobViewRollup.role).all()
+        for job_id, role, count in rollup_rows:
+            entry = analytics[job_id]
+            entry['total_views'] += int(count)
+            if role == UserRole.STUDENT.value:
+                entry['student_views'] += int(count)
+            elif role == ANONYMOUS_ROLE:
+                entry['anonymous_views'] += int(count)
+
+        referrer_rows = db.query(
+            JobViewRollup.job_id, JobViewRollup.referrer, func.sum(JobViewRollup.view_count)
+        ).filter(JobViewRollup.job_id.in_(job_ids)).group_by(JobViewRollup.job_id, JobViewRollup.referrer).all()
+        for job_id, referrer, count in referrer_rows:
+            views_by_referrer = analytics[job_id]['views_by_referrer']
+            key = referrer or 'direct'
+            views_by_referrer[key] = views_by_referrer.get(key, 0) + int(count)
+
+        date_rows = db.query(
+            JobViewRollup.job_id, JobViewRollup.bucket, func.sum(JobViewRollup.view_count)
+        ).filter(
+            JobViewRollup.job_id.in_(job_ids),
+            JobViewRollup.bucket >= since.date()
+        ).group_by(JobViewRollup.job_id, JobViewRollup.bucket).all()
+        for job_id, day, count in date_rows:
+            views_by_date = analytics[job_id]['views_by_date']
+            key = str(_as_date(day))
+            views_by_date[key] = views_by_date.get(key, 0) + int(count)
+
+    view_rows = db.query(
+        JobView.job_id,
+        func.count(JobView.id),
+        func.sum(case((User.role == UserRole.STUDENT, 1), else_=0)),
+        func.sum(case((JobView.user_id.is_(None), 1), else_=0)),
+    ).outerjoin(User, User.id == JobView.user_id).filter(*tail).group_by(JobView.job_id).all()
+    for job_id, total, students, anonymous in view_rows:
+        entry = analytics[job_id]
+        entry['total_views'] += total
+        entry['student_views'] += int(students or 0)
+        entry['anonymous_views'] += int(anonymous or 0)
+
+    referrer_rows = db.query(
+        JobView.job_id, JobView.referrer, func.count(JobView.id)
+    ).filter(*tail).group_by(JobView.job_id, JobView.referrer).all()
+    for job_id, referrer, count in referrer_rows:
+        views_by_referrer = analytics[job_id]['views_by_referrer']
+        key = referrer or 'direct'
+        views_by_referrer[key] = views_by_referrer.get(key, 0) + count
+
+    view_date = func.date(JobView.viewed_at)
+    date_rows = db.query(
+        JobView.job_id, view_date, func.count(JobView.id)
+    ).filter(*tail, JobView.viewed_at >= since).group_by(JobView.job_id, view_date).all()
+    for job_id, day, count in date_rows:
+        views_by_date = analytics[job_id]['views_by_date']
+        key = str(_as_date(day))
+        views_by_date[key] = views_by_date.get(key, 0) + count
+
+    # Distinct signed-in viewers: compacted viewers plus those in the live tail
+    viewers = db.query(
+        JobView.job_id.label('job_id'), JobView.user_id.label('user_id')
+    ).filter(*tail, JobView.user_id.isnot(None)).distinct()
+    if watermark is not None:
+        viewers = viewers.union(
+            db.query(JobViewViewer.job_id, JobViewViewer.user_id).filter(JobViewViewer.job_id.in_(job_ids))
+        )
+    viewers = viewers.subquery()
+    for job_id, unique in db.query(viewers.c.job_id, func.count()).group_by(viewers.c.job_id).all():
+        analytics[job_id]['unique_views'] = unique
+
+    for model, field in ((JobApplication, 'applications_count'), (JobFavorite, 'favorites_count')):
+        rows = db.query(model.job_id, func.count(model.id)).filter(
+            model.job_id.in_(job_ids)
+        ).group_by(model.job_id).all()
+        for job_id, count in rows:
+            analytics[job_id][field] = count
+
+    return analytics
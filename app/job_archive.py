@@ -0,0 +1,119 @@
+"""
+Chunked archival of expired jobs.
+
+A job is expired once its expires_at has passed, or, when it has no expiry,
+once it was scraped more than the retention window ago. Expired jobs are
+copied into archived_jobs and removed together with their favorites, views,
+view rollups and near-duplicate buckets, one bounded batch per transaction
+with a short pause in between so API writes can take the write lock. Jobs
+that students applied to are only deactivated, keeping application history
+intact.
+"""
+
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import and_, delete, exists, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.auth_models import JobApplication, JobFavorite, JobView, JobViewRollup, JobViewViewer
+from app.models import ArchivedJob, Job, JobSimhashBand
+from app.recommendations import recommendation_engine
+
+logger = logging.getLogger(__name__)
+
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("JOB_ARCHIVE_BATCH_SIZE", "500"))
+# Pause between batches (seconds) so other writers are not starved
+ARCHIVE_BATCH_PAUSE = float(os.getenv("JOB_ARCHIVE_BATCH_PAUSE", "0.05"))
+
+# Rows that reference jobs and go with them
+_DEPENDENTS = (JobFavorite, JobView, JobViewRollup, JobViewViewer, JobSimhashBand)
+
+
+def expired_job_filter(days: int = JOB_RETENTION_DAYS, now: Optional[datetime] = None):
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=days)
+    return or_(
+        Job.expires_at < now,
+        and_(Job.expires_at.is_(None), Job.scraped_at < cutoff),
+    )
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _archive_rows(db: Session, job_ids: List[int]) -> int:
+    table = Job.__table__
+    rows = db.execute(select(table).where(table.c.id.in_(job_ids))).mappings().all()
+    if rows:
+        db.execute(insert(ArchivedJob), [
+            {
+                'job_id': row['id'],
+                'company_id': row['company_id'],
+                'title': row['title'],
+                'source_url': row['source_url'],
+                'scraped_at': row['scraped_at'],
+                'expires_at': row['expires_at'],
+                'data': {column: _json_value(value) for column, value in row.items()},
+            }
+            for row in rows
+        ])
+    return len(rows)
+
+
+def _expired_batches(db: Session, criteria, batch_size: int, pause: float) -> Iterator[List[int]]:
+    """Ids of jobs matching `criteria` in id order, `batch_size` at a time, pausing between batches"""
+    last_id = 0
+    while True:
+        job_ids = [job_id for (job_id,) in db.query(Job.id).filter(
+            criteria, Job.id > last_id
+        ).order_by(Job.id).limit(batch_size)]
+        if not job_ids:
+            return
+        last_id = job_ids[-1]
+        yield job_ids
+        if len(job_ids) < batch_size:
+            return
+        if pause > 0:
+            time.sleep(pause)
+
+
+def archive_expired_jobs(db: Session,
+                         days: int = JOB_RETENTION_DAYS,
+                         batch_size: int = ARCHIVE_BATCH_SIZE,
+                         pause: float = ARCHIVE_BATCH_PAUSE) -> Dict[str, int]:
+    """Archive expired jobs in batches of `batch_size`, committing after each batch.
+    Jobs with applications are excluded by the selection itself and only deactivated
+    once, so kept jobs are not rescanned on every run.
+    """
+    expired = expired_job_filter(days)
+    has_applications = exists().where(JobApplication.job_id == Job.id)
+
+    deactivated = 0
+    for job_ids in _expired_batches(db, and_(expired, has_applications, Job.is_active.isnot(False)),
+                                    batch_size, pause):
+        deactivated += db.execute(
+            update(Job).where(Job.id.in_(job_ids)).values(is_active=False)
+        ).rowcount
+        db.commit()
+
+    archived = 0
+    for job_ids in _expired_batches(db, and_(expired, ~has_applications), batch_size, pause):
+        archived += _archive_rows(db, job_ids)
+        for model in _DEPENDENTS:
+            db.execute(delete(model).where(model.job_id.in_(job_ids)))
+        db.execute(delete(Job).where(Job.id.in_(job_ids)))
+        db.commit()
+
+    if archived or deactivated:
+        recommendation_engine.invalidate()
+    result = {'archived': archived, 'deactivated': deactivated}
+    logger.info(f"Archived expired jobs: {result}")
+    return result
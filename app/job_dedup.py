@@ -0,0 +1,217 @@
+"""
+Near-duplicate job detection.
+
+Every job carries a fingerprint: `dedup_key`, a hash of its company and
+normalized title, and a 64-bit SimHash of its title and description. The
+SimHash is split into eight 8-bit bands, each hashed with the company into a
+row of job_simhash_bands (an LSH table), so any job within
+SIMHASH_MAX_DISTANCE (<= 7) bits of another from the same company shares at
+least one band key with it. A lookup is a couple of indexed IN probes plus a
+Hamming check on the few candidates.
+"""
+
+import hashlib
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import delete, event, insert, inspect, or_, update
+from sqlalchemy.orm import Session
+
+from app.models import Job, JobSimhashBand
+
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 8
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+# Band keys only guarantee recall up to SIMHASH_BANDS - 1 differing bits
+SIMHASH_MAX_DISTANCE = min(int(os.getenv("JOB_SIMHASH_MAX_DISTANCE", "6")), SIMHASH_BANDS - 1)
+# Word bigrams: small rewordings move few features, unrelated postings stay ~20+ bits apart
+SHINGLE_SIZE = 2
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class JobFingerprint(NamedTuple):
+    dedup_key: str
+    simhash: Optional[int]
+    bands: Sequence[int]
+
+    def columns(self) -> Dict:
+        """Job column values for this fingerprint"""
+        return {'dedup_key': self.dedup_key, 'description_simhash': self.simhash}
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+
+def _signed64(value: int) -> int:
+    # BIGINT columns are signed
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def normalize_title(title: Optional[str]) -> str:
+    return " ".join(_WORD_RE.findall((title or "").lower()))
+
+
+def simhash(text: Optional[str]) -> Optional[int]:
+    """64-bit SimHash over word shingles (unsigned); None for text without words"""
+    words = _WORD_RE.findall((text or "").lower())
+    if not words:
+        return None
+    size = min(SHINGLE_SIZE, len(words))
+    shingles = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    hashes = np.array([_hash64(shingle) for shingle in shingles], dtype="<u8")
+    bits = np.unpackbits(hashes.view(np.uint8), bitorder="little").reshape(len(shingles), SIMHASH_BITS)
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int(np.packbits(majority, bitorder="little").view("<u8")[0])
+
+
+def hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & ((1 << SIMHASH_BITS) - 1)).count("1")
+
+
+def band_keys(company_id: Optional[int], signature: Optional[int]) -> List[int]:
+    """LSH bucket keys of a (signed or unsigned) SimHash, scoped to the company"""
+    if signature is None:
+        return []
+    mask = (1 << _BAND_BITS) - 1
+    return [
+        _signed64(_hash64(f"{company_id}|{band}|{(signature >> (band * _BAND_BITS)) & mask}"))
+        for band in range(SIMHASH_BANDS)
+    ]
+
+
+def job_fingerprint(company_id: Optional[int], title: Optional[str], description: Optional[str]) -> JobFingerprint:
+    normalized = normalize_title(title)
+    dedup_key = hashlib.blake2b(f"{company_id}|{normalized}".encode(), digest_size=16).hexdigest()
+    signature = simhash(f"{title or ''}\n{description or ''}")
+    return JobFingerprint(
+        dedup_key,
+        _signed64(signature) if signature is not None else None,
+        band_keys(company_id, signature),
+    )
+
+
+def _matches(fingerprint: JobFingerprint, dedup_key: str, signature: Optional[int]) -> bool:
+    if fingerprint.dedup_key == dedup_key:
+        return True
+    return (fingerprint.simhash is not None and signature is not None
+            and hamming(fingerprint.simhash, signature) <= SIMHASH_MAX_DISTANCE)
+
+
+def find_duplicates(db: Session, fingerprints: List[JobFingerprint]) -> Dict[int, Optional[int]]:
+    """Positions in `fingerprints` that duplicate an active stored job (-> its id)
+    or an earlier entry of the same list (-> None). Two queries for the whole list.
+    """
+    duplicates: Dict[int, Optional[int]] = {}
+    if not fingerprints:
+        return duplicates
+
+    keys = {fp.dedup_key for fp in fingerprints}
+    bands = {band for fp in fingerprints for band in fp.bands}
+    band_rows = db.query(JobSimhashBand.job_id, JobSimhashBand.band_key).filter(
+        JobSimhashBand.band_key.in_(bands)
+    ).all() if bands else []
+    candidate_ids = {job_id for job_id, _ in band_rows}
+    conditions = [Job.dedup_key.in_(keys)]
+    if candidate_ids:
+        conditions.append(Job.id.in_(candidate_ids))
+    candidates = {
+        row.id: row for row in db.query(Job.id, Job.dedup_key, Job.description_simhash).filter(
+            Job.is_active == True,
+            or_(*conditions)
+        ).order_by(Job.id)
+    }
+
+    by_probe: Dict[object, List] = {}
+    for row in candidates.values():
+        by_probe.setdefault(row.dedup_key, []).append(row)
+    for job_id, band in band_rows:
+        if job_id in candidates:
+            by_probe.setdefault(band, []).append(candidates[job_id])
+
+    seen: Dict[object, List[JobFingerprint]] = {}
+    for position, fp in enumerate(fingerprints):
+        probes = [fp.dedup_key, *fp.bands]
+        matches = [
+            row for probe in probes for row in by_probe.get(probe, ())
+            if _matches(fp, row.dedup_key, row.description_simhash)
+        ]
+        if matches:
+            duplicates[position] = min(row.id for row in matches)
+        elif any(_matches(fp, earlier.dedup_key, earlier.simhash) for probe in probes for earlier in seen.get(probe, ())):
+            duplicates[position] = None
+        for probe in probes:
+            seen.setdefault(probe, []).append(fp)
+    return duplicates
+
+
+def find_duplicate(db: Session, fingerprint: JobFingerprint) -> Optional[int]:
+    """Id of an active job this fingerprint duplicates, if any"""
+    return find_duplicates(db, [fingerprint]).get(0)
+
+
+def index_job_bands(db: Session, jobs: Iterable):
+    """Add LSH rows for jobs inserted outside the ORM, from (id, company_id, description_simhash) rows"""
+    bands = [
+        {'job_id': job_id, 'band_key': band}
+        for job_id, company_id, signature in jobs
+        for band in band_keys(company_id, signature)
+    ]
+    if bands:
+        db.execute(insert(JobSimhashBand), bands)
+
+
+def _replace_bands(connection, job_id: int, company_id: Optional[int], signature: Optional[int]):
+    connection.execute(delete(JobSimhashBand).where(JobSimhashBand.job_id == job_id))
+    bands = band_keys(company_id, signature)
+    if bands:
+        connection.execute(insert(JobSimhashBand), [{'job_id': job_id, 'band_key': band} for band in bands])
+
+
+def backfill_fingerprints(db: Session, batch_size: int = 500) -> int:
+    """Fingerprint and index stored jobs that predate near-duplicate detection"""
+    filled = 0
+    last_id = 0
+    while True:
+        rows = db.query(Job.id, Job.company_id, Job.title, Job.description).filter(
+            Job.id > last_id, Job.dedup_key.is_(None)
+        ).order_by(Job.id).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        fingerprints = {row.id: job_fingerprint(row.company_id, row.title, row.description) for row in rows}
+        # ORM bulk UPDATE by primary key: one executemany per batch
+        db.execute(update(Job), [{'id': job_id, **fp.columns()} for job_id, fp in fingerprints.items()])
+        db.execute(delete(JobSimhashBand).where(JobSimhashBand.job_id.in_(fingerprints)))
+        index_job_bands(db, ((row.id, row.company_id, fingerprints[row.id].simhash) for row in rows))
+        db.commit()
+        filled += len(rows)
+    logger.info(f"Backfilled fingerprints for {filled} jobs")
+    return filled
+
+
+@event.listens_for(Job, "before_insert")
+def _fingerprint_new_job(mapper, connection, target):
+    if target.dedup_key is None:
+        for column, value in job_fingerprint(target.company_id, target.title, target.description).columns().items():
+            setattr(target, column, value)
+
+
+@event.listens_for(Job, "after_insert")
+def _index_new_job(mapper, connection, target):
+    _replace_bands(connection, target.id, target.company_id, target.description_simhash)
+
+
+@event.listens_for(Job, "before_update")
+def _refingerprint_job(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[attr].history.has_changes() for attr in ('title', 'description', 'company_id')):
+        for column, value in job_fingerprint(target.company_id, target.title, target.description).columns().items():
+            setattr(target, column, value)
+        _replace_bands(connection, target.id, target.company_id, target.description_simhash)
@@ -0,0 +1,222 @@
+"""
+Materialized job statistics: in-memory counters over active jobs, updated
+incrementally from committed ORM changes and fully reconciled periodically
+(and after bulk statements, which bypass the ORM unit of work)
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+# Columns that affect the aggregate; changes to anything else are ignored
+TRACKED_COLUMNS = (
+    'is_active', 'source_website', 'state', 'employment_type', 'experience_level',
+    'visa_sponsorship', 'international_student_friendly', 'visa_sponsorship_confidence',
+)
+
+_PENDING_KEY = 'job_stats_pending'
+
+
+def job_contribution(values: Dict) -> Counter:
+    """Counter keys a single job adds to the aggregate (empty for inactive jobs)"""
+    contribution = Counter()
+    if not values.get('is_active'):
+        return contribution
+    source = values.get('source_website')
+    contribution[('total', source)] += 1
+    if values.get('visa_sponsorship'):
+        contribution[('visa', source)] += 1
+    if values.get('international_student_friendly'):
+        contribution[('student', source)] += 1
+    contribution[('state', source, values.get('state'))] += 1
+    contribution[('employment_type', source, values.get('employment_type'))] += 1
+    contribution[('experience_level', source, values.get('experience_level'))] += 1
+    confidence = values.get('visa_sponsorship_confidence')
+    if confidence is not None:
+        contribution[('confidence_sum', source)] += confidence
+        contribution[('confidence_count', source)] += 1
+    return contribution
+
+
+def _current_values(job: Job) -> Dict:
+    return {column: getattr(job, column) for column in TRACKED_COLUMNS}
+
+
+def _previous_values(job: Job) -> Optional[Dict]:
+    """Tracked column values as they were before the pending flush, or None when
+    a column was assigned while expired (its old value was never loaded)
+    """
+    state = inspect(job)
+    values = {}
+    for column in TRACKED_COLUMNS:
+        history = state.attrs[column].history
+        if history.deleted:
+            values[column] = history.deleted[0]
+        elif history.unchanged:
+            values[column] = history.unchanged[0]
+        elif history.added:
+            return None
+        else:
+            values[column] = getattr(job, column)
+    return values
+
+
+class JobStatsAggregate:
+    """Per-source counters for active jobs; reads fold the allowed sources"""
+
+    def __init__(self, reconcile_seconds: int = 300):
+        self.reconcile_seconds = reconcile_seconds
+        self._lock = threading.Lock()
+        self._counters: Counter = Counter()
+        self._bind_key: Optional[str] = None
+        self._built_at: Optional[float] = None
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def reconcile(self, db: Session):
+        """Rebuild the counters with one grouped scan of active jobs"""
+        rows = db.query(
+            Job.source_website, Job.state, Job.employment_type, Job.experience_level,
+            Job.visa_sponsorship, Job.international_student_friendly,
+            func.count(Job.id),
+            func.sum(Job.visa_sponsorship_confidence),
+            func.count(Job.visa_sponsorship_confidence),
+        ).filter(Job.is_active == True).group_by(
+            Job.source_website, Job.state, Job.employment_type, Job.experience_level,
+            Job.visa_sponsorship, Job.international_student_friendly,
+        ).all()
+
+        counters = Counter()
+        for source, state, employment_type, experience_level, visa, student, count, conf_sum, conf_count in rows:
+            counters[('total', source)] += count
+            if visa:
+                counters[('visa', source)] += count
+            if student:
+                counters[('student', source)] += count
+            counters[('state', source, state)] += count
+            counters[('employment_type', source, employment_type)] += count
+            counters[('experience_level', source, experience_level)] += count
+            if conf_count:
+                counters[('confidence_sum', source)] += float(conf_sum or 0.0)
+                counters[('confidence_count', source)] += conf_count
+
+        with self._lock:
+            self._counters = counters
+            self._bind_key = str(db.get_bind().url)
+            self._built_at = time.monotonic()
+        logger.info(f"Job stats reconciled from {len(rows)} groups")
+
+    def apply(self, delta: Counter, bind_key: str):
+        """Add a committed delta (ignored while stale or for another database)"""
+        with self._lock:
+            if self._built_at is None or bind_key != self._bind_key:
+                return
+            self._counters.update(delta)
+
+    def _counters_for(self, db: Session) -> Counter:
+        with self._lock:
+            if (self._built_at is not None
+                    and self._bind_key == str(db.get_bind().url)
+                    and time.monotonic() - self._built_at <= self.reconcile_seconds):
+                return self._counters.copy()
+        self.reconcile(db)
+        with self._lock:
+            return self._counters.copy()
+
+    def snapshot(self, db: Session, allowed_sources: Sequence[str]) -> Dict:
+        """Totals and breakdowns over active jobs from the allowed sources"""
+        allowed = set(allowed_sources)
+        totals = Counter()
+        breakdowns: Dict[str, Counter] = {
+            'state': Counter(), 'employment_type': Counter(),
+            'experience_level': Counter(), 'source': Counter(),
+        }
+        for key, value in self._counters_for(db).items():
+            if key[1] not in allowed or not value:
+                continue
+            if len(key) == 3:
+                breakdowns[key[0]][key[2]] += value
+            else:
+                totals[key[0]] += value
+                if key[0] == 'total':
+                    breakdowns['source'][key[1]] += value
+
+        confidence_count = totals['confidence_count']
+        return {
+            'total_jobs': totals['total'],
+            'visa_friendly_jobs': totals['visa'],
+            'student_friendly_jobs': totals['student'],
+            'avg_visa_confidence': totals['confidence_sum'] / confidence_count if confidence_count else 0.0,
+            'jobs_by_state': dict(breakdowns['state']),
+            'jobs_by_employment_type': dict(breakdowns['employment_type']),
+            'jobs_by_experience': dict(breakdowns['experience_level']),
+            'jobs_by_source': dict(breakdowns['source']),
+        }
+
+
+job_stats = JobStatsAggregate(reconcile_seconds=int(os.getenv("JOB_STATS_RECONCILE_SECONDS", "300")))
+
+
+def _pending(session: Session) -> Dict:
+    return session.info.setdefault(_PENDING_KEY, {'delta': Counter(), 'stale': False})
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_job_deltas(session, flush_context):
+    jobs_new = [obj for obj in session.new if isinstance(obj, Job)]
+    jobs_dirty = [obj for obj in session.dirty if isinstance(obj, Job)]
+    jobs_deleted = [obj for obj in session.deleted if isinstance(obj, Job)]
+    if not (jobs_new or jobs_dirty or jobs_deleted):
+        return
+    pending = _pending(session)
+    delta = pending['delta']
+    for job in jobs_new:
+        delta.update(job_contribution(_current_values(job)))
+    for job in jobs_dirty + jobs_deleted:
+        if job in session.dirty and not any(
+                inspect(job).attrs[column].history.has_changes() for column in TRACKED_COLUMNS):
+            continue
+        previous = _previous_values(job)
+        if previous is None:
+            pending['stale'] = True
+            continue
+        delta.subtract(job_contribution(previous))
+        if job not in session.deleted:
+            delta.update(job_contribution(_current_values(job)))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _detect_bulk_job_statements(orm_execute_state):
+    if orm_execute_state.is_select:
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is not None and getattr(table, 'name', None) == Job.__tablename__:
+        _pending(orm_execute_state.session)['stale'] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_job_deltas(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if pending['stale']:
+        job_stats.invalidate()
+    elif pending['delta']:
+        job_stats.apply(pending['delta'], str(session.get_bind().url))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_job_deltas(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Boolean, DateTime, ForeignKey, Text, JSON, UniqueConstraint
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -11,11 +11,16 @@ from app.visa_models import VisaVerification, VisaVerificationHistory, VEVOApiLo
 from datetime import datetime
 from typing import List, Optional
 
+def company_key(name: Optional[str]) -> str:
+    """Lookup key for company names: case-insensitive, whitespace-collapsed"""
+    return " ".join((name or "").split()).lower()
+
 class Company(Base):
     __tablename__ = "companies"
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
+    normalized_name = Column(String(255), index=True)  # company_key(name), kept in sync with name
     website = Column(String(500))
     size = Column(String(50))  # startup, small, medium, large, enterprise
     industry = Column(String(100))
@@ -37,6 +42,11 @@ class Company(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     jobs = relationship("Job", back_populates="company")
+    
+    @validates("name")
+    def _sync_normalized_name(self, key, name):
+        self.normalized_name = company_key(name)
+        return name
 
 class Job(Base):
     __tablename__ = "jobs"
@@ -93,6 +103,10 @@ class Job(Base):
     is_active = Column(Boolean, default=True)
     is_duplicate = Column(Boolean, default=False)
     
+    # Near-duplicate fingerprint (see app/job_dedup.py)
+    dedup_key = Column(String(32), index=True)  # hash of company + normalized title
+    description_simhash = Column(BigInteger)  # 64-bit SimHash of title + description
+    
     # Relationships
     company = relationship("Company", back_populates="jobs")
     posted_by_user = relationship("User", back_populates="posted_jobs")
@@ -111,6 +125,27 @@ class Job(Base):
         except (json.JSONDecodeError, TypeError):
             return []
 
+class JobSimhashBand(Base):
+    """LSH buckets for near-duplicate lookup: one row per SimHash band of each job"""
+    __tablename__ = "job_simhash_bands"
+    
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    band_key = Column(BigInteger, primary_key=True, index=True)  # hash of company, band number and band bits
+
+class ArchivedJob(Base):
+    """Expired job moved out of `jobs` by app/job_archive.py; `data` holds the full original row"""
+    __tablename__ = "archived_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, index=True)  # original jobs.id (ids can be reused after deletion)
+    company_id = Column(Integer, index=True)
+    title = Column(String(255))
+    source_url = Column(String(1000))
+    scraped_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    data = Column(JSON)
+
 class JobDraft(Base):
     __tablename__ = "job_drafts"
     
@@ -179,3 +214,17 @@ class ScrapingLog(Base):
     completed_at = Column(DateTime(timezone=True))
     status = Column(String(50), default="running")  # running, completed, failed
     error_details = Column(Text)
+
+class BoardSnapshot(Base):
+    """Last seen state of one company board, used for incremental scraping"""
+    __tablename__ = "board_snapshots"
+    __table_args__ = (UniqueConstraint("source", "board", name="uq_board_snapshots_source_board"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String(50), nullable=False)  # greenhouse, lever, workable, smartrecruiters
+    board = Column(String(255), nullable=False)  # company token / name on the ATS
+    fingerprint = Column(String(64), nullable=False)  # hash over all job versions on the board
+    job_versions = Column(JSON)  # {source_url: version hash}
+    job_count = Column(Integer, default=0)
+    checked_at = Column(DateTime(timezone=True), server_default=func.now())
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,109 @@
+"""
+Keyset (cursor) pagination and cached result counts for job listings
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query, Session
+
+from app.models import Job
+
+
+def keyset_order(query: Query) -> Query:
+    """Order jobs newest first with a unique tiebreaker so cursors are stable"""
+    return query.order_by(Job.posted_date.desc().nulls_last(), Job.id.desc())
+
+
+def encode_cursor(job) -> str:
+    """Build an opaque cursor pointing just after the given job"""
+    payload = {
+        "d": job.posted_date.isoformat() if job.posted_date else None,
+        "i": job.id,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Decode a cursor into (posted_date, id); raises ValueError if malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        posted_date = datetime.fromisoformat(payload["d"]) if payload.get("d") else None
+        return posted_date, int(payload["i"])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def apply_cursor(query: Query, cursor: str) -> Query:
+    """Restrict a keyset-ordered query to rows after the cursor position"""
+    posted_date, job_id = decode_cursor(cursor)
+    if posted_date is None:
+        # Already in the NULLS LAST tail: only older ids remain
+        return query.filter(Job.posted_date.is_(None), Job.id < job_id)
+    return query.filter(
+        or_(
+            Job.posted_date < posted_date,
+            and_(Job.posted_date == posted_date, Job.id < job_id),
+            Job.posted_date.is_(None),
+        )
+    )
+
+
+def fetch_page(query: Query, per_page: int, cursor: Optional[str] = None) -> Tuple[List[Job], Optional[str]]:
+    """Fetch one keyset page; returns the rows and the cursor for the next page"""
+    if cursor:
+        query = apply_cursor(query, cursor)
+    rows = query.limit(per_page + 1).all()
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+
+class CountCache:
+    """Small TTL + LRU cache for filtered result counts"""
+
+    def __init__(self, ttl_seconds: int = 60, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Any, Tuple[float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Any, compute: Callable[[], int]) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+job_count_cache = CountCache(ttl_seconds=int(os.getenv("JOB_COUNT_CACHE_TTL", "60")))
+
+
+def count_cache_key(db: Session, filters: Dict[str, Any]) -> tuple:
+    """Cache key for a filter set (scoped to the database the session points at)"""
+    items = tuple(sorted((k, repr(v)) for k, v in filters.items() if v is not None))
+    return (str(db.get_bind().url), items)
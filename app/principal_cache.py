@@ -0,0 +1,102 @@
+"""
+Short-lived cache of authenticated principals for get_current_user: a user row
+snapshot plus the active-session bit, keyed by (user_id, token id)
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.auth_models import User
+
+logger = logging.getLogger(__name__)
+
+
+class CachedPrincipal:
+    """Column values of a User row and whether the user had an active session"""
+
+    __slots__ = ("bind_key", "values", "has_active_session")
+
+    def __init__(self, bind_key: str, values: Dict[str, Any], has_active_session: bool):
+        self.bind_key = bind_key
+        self.values = values
+        self.has_active_session = has_active_session
+
+    @classmethod
+    def from_user(cls, user: User, bind_key: str, has_active_session: bool) -> "CachedPrincipal":
+        values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+        return cls(bind_key, values, has_active_session)
+
+    def attach(self, db: Session) -> User:
+        """Rebuild the User and attach it to `db` without querying, so lazy
+        relationships load and handler changes are flushed as usual
+        """
+        user = User(**self.values)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+
+class PrincipalCache:
+    """TTL + LRU cache of CachedPrincipal entries, invalidated per user"""
+
+    def __init__(self, ttl_seconds: int = 30, max_entries: int = 4096):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, Hashable], Tuple[float, CachedPrincipal]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, token_id: Hashable, bind_key: str) -> Optional[CachedPrincipal]:
+        key = (user_id, token_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic() or principal.bind_key != bind_key:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return principal
+
+    def put(self, user_id: int, token_id: Hashable, principal: CachedPrincipal):
+        if self.ttl_seconds <= 0:
+            return
+        key = (user_id, token_id)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: Optional[int]):
+        """Drop every cached token of a user (logout, session or profile change)"""
+        if user_id is None:
+            return
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=int(os.getenv("PRINCIPAL_CACHE_TTL", "30")),
+    max_entries=int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "4096")),
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
@@ -0,0 +1,193 @@
+"""
+Vectorized job recommendation engine: compact NumPy feature arrays for all active
+jobs, scored for a user in one pass with argpartition top-k
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.candidate_index import parse_tokens
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "recommendation_jobs_changed"
+
+# Score components (kept in line with the original per-job calculate_job_match_score)
+BASE_SCORE = 10
+VISA_MATCH_SCORE = 30
+STUDENT_FRIENDLY_SCORE = 25
+SKILL_MATCH_SCORE = 5
+NO_SPONSORSHIP_NEEDED_SCORE = 10
+SPONSORSHIP_AVAILABLE_SCORE = 25
+
+
+class JobFeatureMatrix:
+    """Feature arrays for a set of jobs, ordered by id.
+    Skills are stored as a sparse job x token incidence list (row, column pairs).
+    """
+
+    def __init__(self, ids: np.ndarray, visa: np.ndarray, student_friendly: np.ndarray,
+                 skill_rows: np.ndarray, skill_cols: np.ndarray, vocabulary: Dict[str, int]):
+        self.ids = ids
+        self.visa = visa
+        self.student_friendly = student_friendly
+        self.skill_rows = skill_rows
+        self.skill_cols = skill_cols
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def from_rows(cls, rows: Sequence) -> "JobFeatureMatrix":
+        """Build from (id, visa_sponsorship, international_student_friendly, required_skills) rows"""
+        rows = sorted(rows, key=lambda row: row[0])
+        vocabulary: Dict[str, int] = {}
+        skill_rows: List[int] = []
+        skill_cols: List[int] = []
+        for position, row in enumerate(rows):
+            for token in parse_tokens(row[3]):
+                skill_rows.append(position)
+                skill_cols.append(vocabulary.setdefault(token, len(vocabulary)))
+        return cls(
+            ids=np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+            visa=np.fromiter((bool(row[1]) for row in rows), dtype=bool, count=len(rows)),
+            student_friendly=np.fromiter((bool(row[2]) for row in rows), dtype=bool, count=len(rows)),
+            skill_rows=np.asarray(skill_rows, dtype=np.int32),
+            skill_cols=np.asarray(skill_cols, dtype=np.int32),
+            vocabulary=vocabulary,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def score(self, user) -> np.ndarray:
+        """Match score of every job for a user, in one vectorized pass"""
+        scores = np.full(len(self.ids), BASE_SCORE, dtype=np.int32)
+
+        if user.visa_status in ('student_visa', 'work_visa'):
+            scores += VISA_MATCH_SCORE * self.visa
+        if user.visa_status == 'student_visa':
+            scores += STUDENT_FRIENDLY_SCORE * self.student_friendly
+
+        user_cols = [self.vocabulary[t] for t in parse_tokens(user.skills) if t in self.vocabulary]
+        if user_cols and len(self.skill_cols):
+            hits = np.isin(self.skill_cols, user_cols)
+            scores += SKILL_MATCH_SCORE * np.bincount(self.skill_rows[hits], minlength=len(self.ids)).astype(np.int32)
+
+        if user.work_authorization in ('citizen', 'pr'):
+            scores += NO_SPONSORSHIP_NEEDED_SCORE * ~self.visa
+        elif user.work_authorization == 'requires_sponsorship':
+            scores += SPONSORSHIP_AVAILABLE_SCORE * self.visa
+
+        return scores
+
+    def top_k(self, user, k: int) -> List[int]:
+        """Ids of the k best-scoring jobs, best first (ties broken by lowest id)"""
+        n = len(self.ids)
+        if n == 0 or k <= 0:
+            return []
+        scores = self.score(user)
+        if k < n:
+            # argpartition finds the k-th best score; keep every job tied with it
+            kth = np.argpartition(-scores, k - 1)[:k]
+            candidates = np.flatnonzero(scores >= scores[kth].min())
+        else:
+            candidates = np.arange(n)
+        order = np.lexsort((self.ids[candidates], -scores[candidates]))
+        return self.ids[candidates[order[:k]]].tolist()
+
+
+class RecommendationEngine:
+    """Process-wide job feature matrix, refreshed after `ttl_seconds` or once job
+    changes are committed. A matrix whose build overlapped an invalidation is
+    used for that request only, never cached.
+    """
+
+    def __init__(self, ttl_seconds: int = 300):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._matrix: Optional[JobFeatureMatrix] = None
+        self._key = None
+        self._built_at = 0.0
+        self._generation = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._matrix = None
+            self._generation += 1
+
+    def matrix(self, db: Session, allowed_sources: Sequence[str]) -> JobFeatureMatrix:
+        key = (str(db.get_bind().url), tuple(allowed_sources))
+        with self._lock:
+            if (self._matrix is not None and self._key == key
+                    and time.monotonic() - self._built_at <= self.ttl_seconds):
+                return self._matrix
+            generation = self._generation
+
+        rows = db.query(
+            Job.id, Job.visa_sponsorship, Job.international_student_friendly, Job.required_skills
+        ).filter(
+            Job.is_active == True,
+            Job.is_duplicate.isnot(True),
+            Job.source_website.in_(allowed_sources)
+        ).all()
+        matrix = JobFeatureMatrix.from_rows(rows)
+        logger.info(f"Recommendation matrix built for {len(matrix)} jobs ({len(matrix.vocabulary)} skills)")
+
+        with self._lock:
+            if self._generation == generation:
+                self._matrix, self._key, self._built_at = matrix, key, time.monotonic()
+        return matrix
+
+    def recommend(self, db: Session, user, limit: int, allowed_sources: Sequence[str]) -> List[Job]:
+        """Top `limit` jobs for a user, hydrating only the winning rows"""
+        top_ids = self.matrix(db, allowed_sources).top_k(user, limit)
+        if not top_ids:
+            return []
+        jobs = {
+            job.id: job for job in db.query(Job).filter(Job.id.in_(top_ids), Job.is_active == True)
+        }
+        return [jobs[job_id] for job_id in top_ids if job_id in jobs]
+
+
+recommendation_engine = RecommendationEngine(ttl_seconds=int(os.getenv("RECOMMENDATION_MATRIX_TTL", "300")))
+
+
+def _mark_jobs_changed(session: Session):
+    session.info[_PENDING_KEY] = True
+
+
+@event.listens_for(Job, "after_insert")
+@event.listens_for(Job, "after_update")
+@event.listens_for(Job, "after_delete")
+def _jobs_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        _mark_jobs_changed(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _detect_bulk_job_statements(orm_execute_state):
+    # Core/bulk INSERT, UPDATE and DELETE on jobs (scraper inserts, archival) bypass the mapper events
+    if orm_execute_state.is_select:
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is not None and getattr(table, 'name', None) == Job.__tablename__:
+        _mark_jobs_changed(orm_execute_state.session)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop(_PENDING_KEY, False):
+        recommendation_engine.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
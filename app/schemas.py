@@ -155,6 +155,8 @@ class JobSearchResponse(BaseModel):
     page: int
     per_page: int
     total_pages: int
+    # Opaque keyset cursor for the next page (None on the last page)
+    next_cursor: Optional[str] = None
 
 class VisaKeywordBase(BaseModel):
     keyword: str
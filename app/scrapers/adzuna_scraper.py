@@ -6,6 +6,7 @@ import requests
 import logging
 from typing import List, Dict, Optional
 from datetime import datetime
+from urllib.parse import urlencode
 from .ats_scraper import ATSScraper
 
 logger = logging.getLogger(__name__)
@@ -23,6 +24,17 @@ class AdzunaScraper(ATSScraper):
     def parse_job_details(self, job_element) -> Dict:
         """Parse individual job details from API response"""
         return self._process_adzuna_job(job_element)
+    
+    def board_url(self, what: str) -> str:
+        """Adzuna has no company boards: the first results page for a search term"""
+        params = {'app_id': self.app_id, 'app_key': self.app_key, 'results_per_page': 50, 'what': what}
+        return f"{self.base_url}/{self.country}/search/1?{urlencode(params)}"
+    
+    def _board_postings(self, payload) -> List[Dict]:
+        return payload.get('results', [])
+    
+    def _process_job(self, job_data: Dict, company: str) -> Optional[Dict]:
+        return self._process_adzuna_job(job_data)
         
     def search_jobs(self, 
                    what: str = "", 
@@ -56,7 +68,7 @@ class AdzunaScraper(ATSScraper):
             data = response.json()
             jobs = []
             
-            for job_data in data.get('results', []):
+            for job_data in self._board_postings(data):
                 processed_job = self._process_adzuna_job(job_data)
                 if processed_job:
                     jobs.append(processed_job)
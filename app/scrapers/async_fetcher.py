@@ -0,0 +1,134 @@
+"""
+Async HTTP fetch layer for ATS APIs: one shared connection pool and a
+token-bucket rate limiter per host, so different boards and vendors are
+fetched concurrently while each host still sees polite request rates
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from .http_cache import HTTPCache, PendingCacheWrites
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+class TokenBucket:
+    """Token bucket: `rate` requests per second with bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncFetcher:
+    """Shared httpx.AsyncClient with per-host rate limiting, retry/backoff and
+    optional conditional requests against an HTTPCache. Fresh responses only enter
+    the cache through `pending_cache_writes.commit(url)`, once the caller saved them.
+    """
+
+    def __init__(self,
+                 rate_per_host: float = 1.0,
+                 burst: int = 2,
+                 max_connections: int = 20,
+                 max_retries: int = 3,
+                 backoff_factor: float = 2.0,
+                 timeout: float = 30.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None,
+                 cache: Optional[HTTPCache] = None):
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.cache = cache
+        self.pending_cache_writes = PendingCacheWrites(cache)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=timeout,
+            follow_redirects=True,
+            transport=transport,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def _bucket_for(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+        return bucket
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[httpx.Response]:
+        """GET with per-host rate limiting; returns None once retries are exhausted.
+        A 304 against the cache yields the cached body with `from_cache` set.
+        """
+        entry = self.cache.get(url) if self.cache else None
+        if entry is not None:
+            headers = {**(headers or {}), **self.cache.conditional_headers(entry)}
+        
+        bucket = self._bucket_for(url)
+        for attempt in range(self.max_retries):
+            await bucket.acquire()
+            try:
+                response = await self.client.get(url, headers=headers)
+                if response.status_code == 304 and entry is not None:
+                    self.cache.touch(url)
+                    cached = httpx.Response(200, content=entry.body, request=response.request)
+                    cached.from_cache = True
+                    return cached
+                # Client errors other than rate limiting will not improve on retry
+                if 400 <= response.status_code < 500 and response.status_code != 429:
+                    logger.warning(f"Request failed for {url}: HTTP {response.status_code}")
+                    return None
+                response.raise_for_status()
+                self.pending_cache_writes.add(url, response.headers, response.content)
+                return response
+            except httpx.HTTPError as e:
+                logger.warning(f"Request attempt {attempt + 1} failed for {url}: {e}")
+                if attempt == self.max_retries - 1:
+                    logger.error(f"All {self.max_retries} attempts failed for {url}")
+                    return None
+                await asyncio.sleep(self.backoff_factor ** attempt)
+        return None
+
+    async def get_json(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[Any]:
+        response = await self.get(url, headers=headers)
+        if response is None:
+            return None
+        try:
+            return response.json()
+        except ValueError as e:
+            logger.error(f"Invalid JSON from {url}: {e}")
+            return None
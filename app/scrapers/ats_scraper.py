@@ -3,7 +3,9 @@ ATS API Scrapers for legitimate job data collection
 Supports Greenhouse, Lever, Workable, and SmartRecruiters APIs
 """
 
+import asyncio
 import requests
+from abc import abstractmethod
 import time
 import logging
 from typing import List, Dict, Optional, Set
@@ -11,14 +13,20 @@ from datetime import datetime, timezone
 import json
 from urllib.parse import urljoin, quote
 from .base_scraper import BaseScraper
+from .async_fetcher import AsyncFetcher
+from .http_cache import PendingCacheWrites, get_http_cache, is_not_modified
 
 logger = logging.getLogger(__name__)
 
 class ATSScraper(BaseScraper):
     """Base class for ATS API scrapers"""
     
+    vendor = "ATS"
+    
     def __init__(self, delay: int = 1):
         super().__init__(delay)
+        self.http_cache = get_http_cache()
+        self.pending_cache_writes = PendingCacheWrites(self.http_cache)
         self.visa_keywords = self._load_visa_keywords()
         
     def _load_visa_keywords(self) -> Dict[str, List[str]]:
@@ -70,11 +78,99 @@ class ATSScraper(BaseScraper):
         is_student_friendly = any(kw in text for kw in ['student', 'graduate', 'internship', 'trainee'])
         
         return is_visa_friendly, confidence, is_student_friendly
-
+    
+    @abstractmethod
+    def board_url(self, company: str) -> str:
+        """API URL listing all jobs for a company on this ATS"""
+        pass
+    
+    @abstractmethod
+    def _board_postings(self, payload) -> List[Dict]:
+        """Extract the raw job postings from a board API payload"""
+        pass
+    
+    @abstractmethod
+    def _process_job(self, job_data: Dict, company: str) -> Optional[Dict]:
+        """Turn one raw posting into a job dict, or None to drop it"""
+        pass
+    
+    def request_headers(self) -> Dict[str, str]:
+        """Extra headers sent with board requests"""
+        return {}
+    
+    def parse_board(self, payload, company: str) -> List[Dict]:
+        """Turn a board API payload into processed job dicts"""
+        jobs = []
+        for job in self._board_postings(payload):
+            processed_job = self._process_job(job, company)
+            if processed_job:
+                jobs.append(processed_job)
+        
+        logger.info(f"Found {len(jobs)} jobs from {self.vendor} company {company}")
+        return jobs
+    
+    def get_company_jobs(self, company: str) -> List[Dict]:
+        """Get all jobs for a specific company (blocking). Once they are saved, call
+        pending_cache_writes.commit(board_url(company)) so the next fetch can revalidate.
+        """
+        try:
+            response = self.make_request(self.board_url(company))
+            if not response:
+                return []
+            if is_not_modified(response):
+                logger.info(f"{self.vendor} company {company} unchanged since last fetch, skipping")
+                return []
+            return self.parse_board(response.json(), company)
+        except Exception as e:
+            logger.error(f"Error scraping {self.vendor} company {company}: {e}")
+            return []
+    
+    def scrape_jobs(self, companies: List[str], location: str = "Australia") -> List[Dict]:
+        """Scrape jobs from multiple companies one after another"""
+        all_jobs = []
+        
+        for company in companies:
+            jobs = self.get_company_jobs(company)
+            all_jobs.extend(jobs)
+            time.sleep(self.delay)
+        
+        return all_jobs
+    
+    async def fetch_board(self, fetcher: AsyncFetcher, company: str) -> Optional[List[Dict]]:
+        """Current jobs on a company board, or None when the fetch failed or the board
+        is unchanged since the last fetch (so callers must not treat it as empty)
+        """
+        try:
+            response = await fetcher.get(self.board_url(company), headers=self.request_headers())
+            if response is None:
+                return None
+            if is_not_modified(response):
+                logger.info(f"{self.vendor} company {company} unchanged since last fetch, skipping")
+                return None
+            return self.parse_board(response.json(), company)
+        except Exception as e:
+            logger.error(f"Error scraping {self.vendor} company {company}: {e}")
+            return None
+    
+    async def fetch_company_jobs(self, fetcher: AsyncFetcher, company: str) -> List[Dict]:
+        """Get all jobs for a specific company through the shared async fetcher"""
+        return await self.fetch_board(fetcher, company) or []
+    
+    async def fetch_boards_async(self, fetcher: AsyncFetcher, companies: List[str]) -> Dict[str, Optional[List[Dict]]]:
+        """Fetch multiple company boards concurrently, keyed by company (see fetch_board)"""
+        results = await asyncio.gather(*(self.fetch_board(fetcher, company) for company in companies))
+        return dict(zip(companies, results))
+    
+    async def scrape_jobs_async(self, fetcher: AsyncFetcher, companies: List[str]) -> List[Dict]:
+        """Scrape jobs from multiple companies concurrently (rate limited per host by the fetcher)"""
+        boards = await self.fetch_boards_async(fetcher, companies)
+        return [job for jobs in boards.values() if jobs for job in jobs]
 
 class GreenhouseScraper(ATSScraper):
     """Scraper for Greenhouse Job Board API"""
     
+    vendor = "Greenhouse"
+    
     def __init__(self, delay: int = 1):
         super().__init__(delay)
         self.base_url = "https://boards-api.greenhouse.io/v1/boards"
@@ -83,29 +179,15 @@ class GreenhouseScraper(ATSScraper):
         """Parse individual job details from API response"""
         return self._process_greenhouse_job(job_element, "")
     
-    def get_company_jobs(self, company_token: str) -> List[Dict]:
-        """Get all jobs for a specific company from Greenhouse"""
-        url = f"{self.base_url}/{company_token}/jobs"
-        
-        try:
-            response = self.make_request(url)
-            if not response:
-                return []
-            
-            jobs_data = response.json()
-            jobs = []
-            
-            for job in jobs_data.get('jobs', []):
-                processed_job = self._process_greenhouse_job(job, company_token)
-                if processed_job:
-                    jobs.append(processed_job)
-            
-            logger.info(f"Found {len(jobs)} jobs from Greenhouse company {company_token}")
-            return jobs
-            
-        except Exception as e:
-            logger.error(f"Error scraping Greenhouse company {company_token}: {e}")
-            return []
+    def board_url(self, company_token: str) -> str:
+        """API URL listing all jobs for a specific company on Greenhouse"""
+        return f"{self.base_url}/{company_token}/jobs"
+    
+    def _board_postings(self, payload) -> List[Dict]:
+        return payload.get('jobs', [])
+    
+    def _process_job(self, job_data: Dict, company_token: str) -> Optional[Dict]:
+        return self._process_greenhouse_job(job_data, company_token)
     
     def _process_greenhouse_job(self, job_data: Dict, company_token: str) -> Optional[Dict]:
         """Process individual Greenhouse job"""
@@ -146,22 +228,13 @@ class GreenhouseScraper(ATSScraper):
         except Exception as e:
             logger.error(f"Error processing Greenhouse job: {e}")
             return None
-    
-    def scrape_jobs(self, company_tokens: List[str], location: str = "Australia") -> List[Dict]:
-        """Scrape jobs from multiple Greenhouse companies"""
-        all_jobs = []
-        
-        for token in company_tokens:
-            jobs = self.get_company_jobs(token)
-            all_jobs.extend(jobs)
-            time.sleep(self.delay)
-        
-        return all_jobs
 
 
 class LeverScraper(ATSScraper):
     """Scraper for Lever Postings API"""
     
+    vendor = "Lever"
+    
     def __init__(self, delay: int = 1):
         super().__init__(delay)
         self.base_url = "https://api.lever.co/v0/postings"
@@ -170,29 +243,15 @@ class LeverScraper(ATSScraper):
         """Parse individual job details from API response"""
         return self._process_lever_job(job_element, "")
     
-    def get_company_jobs(self, company_name: str) -> List[Dict]:
-        """Get all jobs for a specific company from Lever"""
-        url = f"{self.base_url}/{company_name}"
-        
-        try:
-            response = self.make_request(url)
-            if not response:
-                return []
-            
-            jobs_data = response.json()
-            jobs = []
-            
-            for job in jobs_data:
-                processed_job = self._process_lever_job(job, company_name)
-                if processed_job:
-                    jobs.append(processed_job)
-            
-            logger.info(f"Found {len(jobs)} jobs from Lever company {company_name}")
-            return jobs
-            
-        except Exception as e:
-            logger.error(f"Error scraping Lever company {company_name}: {e}")
-            return []
+    def board_url(self, company_name: str) -> str:
+        """API URL listing all jobs for a specific company on Lever"""
+        return f"{self.base_url}/{company_name}"
+    
+    def _board_postings(self, payload) -> List[Dict]:
+        return payload
+    
+    def _process_job(self, job_data: Dict, company_name: str) -> Optional[Dict]:
+        return self._process_lever_job(job_data, company_name)
     
     def _process_lever_job(self, job_data: Dict, company_name: str) -> Optional[Dict]:
         """Process individual Lever job"""
@@ -231,22 +290,13 @@ class LeverScraper(ATSScraper):
         except Exception as e:
             logger.error(f"Error processing Lever job: {e}")
             return None
-    
-    def scrape_jobs(self, company_names: List[str], location: str = "Australia") -> List[Dict]:
-        """Scrape jobs from multiple Lever companies"""
-        all_jobs = []
-        
-        for company in company_names:
-            jobs = self.get_company_jobs(company)
-            all_jobs.extend(jobs)
-            time.sleep(self.delay)
-        
-        return all_jobs
 
 
 class WorkableScraper(ATSScraper):
     """Scraper for Workable Jobs API"""
     
+    vendor = "Workable"
+    
     def __init__(self, api_token: str = None, delay: int = 1):
         super().__init__(delay)
         self.api_token = api_token
@@ -260,30 +310,19 @@ class WorkableScraper(ATSScraper):
         """Parse individual job details from API response"""
         return self._process_workable_job(job_element, "")
     
-    def get_company_jobs(self, company_subdomain: str) -> List[Dict]:
-        """Get all jobs for a specific company from Workable"""
+    def board_url(self, company_subdomain: str) -> str:
+        """API URL listing all jobs for a specific company on Workable"""
         # Public endpoint (no auth required)
-        url = f"https://{company_subdomain}.workable.com/api/v1/published"
-        
-        try:
-            response = self.make_request(url)
-            if not response:
-                return []
-            
-            jobs_data = response.json()
-            jobs = []
-            
-            for job in jobs_data.get('jobs', []):
-                processed_job = self._process_workable_job(job, company_subdomain)
-                if processed_job:
-                    jobs.append(processed_job)
-            
-            logger.info(f"Found {len(jobs)} jobs from Workable company {company_subdomain}")
-            return jobs
-            
-        except Exception as e:
-            logger.error(f"Error scraping Workable company {company_subdomain}: {e}")
-            return []
+        return f"https://{company_subdomain}.workable.com/api/v1/published"
+    
+    def _board_postings(self, payload) -> List[Dict]:
+        return payload.get('jobs', [])
+    
+    def _process_job(self, job_data: Dict, company_subdomain: str) -> Optional[Dict]:
+        return self._process_workable_job(job_data, company_subdomain)
+    
+    def request_headers(self) -> Dict[str, str]:
+        return {'Authorization': f'Bearer {self.api_token}'} if self.api_token else {}
     
     def _process_workable_job(self, job_data: Dict, company_subdomain: str) -> Optional[Dict]:
         """Process individual Workable job"""
@@ -322,22 +361,13 @@ class WorkableScraper(ATSScraper):
         except Exception as e:
             logger.error(f"Error processing Workable job: {e}")
             return None
-    
-    def scrape_jobs(self, company_subdomains: List[str], location: str = "Australia") -> List[Dict]:
-        """Scrape jobs from multiple Workable companies"""
-        all_jobs = []
-        
-        for subdomain in company_subdomains:
-            jobs = self.get_company_jobs(subdomain)
-            all_jobs.extend(jobs)
-            time.sleep(self.delay)
-        
-        return all_jobs
 
 
 class SmartRecruitersScaper(ATSScraper):
     """Scraper for SmartRecruiters Jobs API"""
     
+    vendor = "SmartRecruiters"
+    
     def __init__(self, delay: int = 1):
         super().__init__(delay)
         self.base_url = "https://api.smartrecruiters.com/v1"
@@ -346,29 +376,15 @@ class SmartRecruitersScaper(ATSScraper):
         """Parse individual job details from API response"""
         return self._process_smartrecruiters_job(job_element, "")
     
-    def get_company_jobs(self, company_id: str) -> List[Dict]:
-        """Get all jobs for a specific company from SmartRecruiters"""
-        url = f"{self.base_url}/companies/{company_id}/postings"
-        
-        try:
-            response = self.make_request(url)
-            if not response:
-                return []
-            
-            jobs_data = response.json()
-            jobs = []
-            
-            for job in jobs_data.get('content', []):
-                processed_job = self._process_smartrecruiters_job(job, company_id)
-                if processed_job:
-                    jobs.append(processed_job)
-            
-            logger.info(f"Found {len(jobs)} jobs from SmartRecruiters company {company_id}")
-            return jobs
-            
-        except Exception as e:
-            logger.error(f"Error scraping SmartRecruiters company {company_id}: {e}")
-            return []
+    def board_url(self, company_id: str) -> str:
+        """API URL listing all jobs for a specific company on SmartRecruiters"""
+        return f"{self.base_url}/companies/{company_id}/postings"
+    
+    def _board_postings(self, payload) -> List[Dict]:
+        return payload.get('content', [])
+    
+    def _process_job(self, job_data: Dict, company_id: str) -> Optional[Dict]:
+        return self._process_smartrecruiters_job(job_data, company_id)
     
     def _process_smartrecruiters_job(self, job_data: Dict, company_id: str) -> Optional[Dict]:
         """Process individual SmartRecruiters job"""
@@ -408,17 +424,6 @@ class SmartRecruitersScaper(ATSScraper):
         except Exception as e:
             logger.error(f"Error processing SmartRecruiters job: {e}")
             return None
-    
-    def scrape_jobs(self, company_ids: List[str], location: str = "Australia") -> List[Dict]:
-        """Scrape jobs from multiple SmartRecruiters companies"""
-        all_jobs = []
-        
-        for company_id in company_ids:
-            jobs = self.get_company_jobs(company_id)
-            all_jobs.extend(jobs)
-            time.sleep(self.delay)
-        
-        return all_jobs
 
 
 # Shared utility methods for all ATS scrapers
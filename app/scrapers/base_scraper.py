@@ -10,6 +10,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import os
+from .http_cache import PendingCacheWrites
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,10 @@ class BaseScraper(ABC):
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        # Optional conditional-request cache (see app.scrapers.http_cache)
+        self.http_cache = None
+        # Responses from make_request awaiting commit(url) once their jobs are saved
+        self.pending_cache_writes = PendingCacheWrites(None)
         
     def get_selenium_driver(self) -> webdriver.Chrome:
         """Initialize Selenium Chrome driver with headless options"""
@@ -36,12 +41,22 @@ class BaseScraper(ABC):
         return webdriver.Chrome(options=chrome_options)
     
     def make_request(self, url: str) -> Optional[requests.Response]:
-        """Make HTTP request with error handling and rate limiting"""
+        """Make HTTP request with error handling and rate limiting.
+        With an http_cache, sends a conditional request and serves the cached body on 304.
+        Fresh responses are only cached via pending_cache_writes.commit(url).
+        """
+        entry = self.http_cache.get(url) if self.http_cache else None
+        headers = self.http_cache.conditional_headers(entry) if entry else None
+        
         for attempt in range(self.max_retries):
             try:
                 time.sleep(self.delay * (self.backoff_factor ** attempt))
-                response = self.session.get(url, timeout=30)
+                response = self.session.get(url, timeout=30, headers=headers)
+                if response.status_code == 304 and entry is not None:
+                    self.http_cache.touch(url)
+                    return self._cached_response(url, entry)
                 response.raise_for_status()
+                self.pending_cache_writes.add(url, response.headers, response.content)
                 return response
             except requests.RequestException as e:
                 logger.warning(f"Request attempt {attempt + 1} failed for {url}: {e}")
@@ -50,6 +65,17 @@ class BaseScraper(ABC):
                     return None
         return None
     
+    @staticmethod
+    def _cached_response(url: str, entry) -> requests.Response:
+        """Rebuild a 200 response from a revalidated cache entry"""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = entry.body
+        response.encoding = 'utf-8'
+        response.from_cache = True
+        return response
+    
     def parse_html(self, html_content: str) -> BeautifulSoup:
         """Parse HTML content with BeautifulSoup"""
         return BeautifulSoup(html_content, 'html.parser')
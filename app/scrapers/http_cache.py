@@ -0,0 +1,206 @@
+"""
+On-disk conditional HTTP cache for scraper requests (ETag / Last-Modified).
+Bodies are stored zlib-compressed in a small SQLite database keyed by URL;
+entries expire after a TTL and the least recently used are evicted once the
+cache grows past its size bound.
+
+Fetchers hold fresh 200 responses as pending writes (PendingCacheWrites) until
+the caller has saved what it parsed from them: a cached validator for content
+that never reached the database would turn every later fetch into a 304 and
+the content would be skipped for good.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join("data", "http_cache.sqlite3")
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: bytes
+    stored_at: float
+
+
+class HTTPCache:
+    """URL-keyed response cache holding validators and compressed bodies"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH,
+                 ttl_seconds: int = 7 * 24 * 3600,
+                 max_bytes: int = 100 * 1024 * 1024):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_last_used ON http_cache(last_used)")
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Cached entry for a URL, or None if missing or older than the TTL"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, body, stored_at FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[3] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+                self._conn.commit()
+                return None
+        return CacheEntry(url, row[0], row[1], zlib.decompress(row[2]), row[3])
+
+    def conditional_headers(self, entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """Request headers that let the server answer 304 Not Modified"""
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def store(self, url: str, response_headers: Mapping[str, str], body: bytes) -> bool:
+        """Cache a 200 response body if the server sent validators for it"""
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return False
+
+        compressed = zlib.compress(body)
+        if len(compressed) > self.max_bytes:
+            return False
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO http_cache (url, etag, last_modified, body, size, stored_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag, last_modified = excluded.last_modified,
+                    body = excluded.body, size = excluded.size,
+                    stored_at = excluded.stored_at, last_used = excluded.last_used
+                """,
+                (url, etag, last_modified, compressed, len(compressed), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+        return True
+
+    def touch(self, url: str):
+        """Mark an entry used after the server answered 304. stored_at is kept, so an
+        entry that keeps revalidating still expires one TTL after it was stored and the
+        next fetch after that is unconditional.
+        """
+        with self._lock:
+            self._conn.execute("UPDATE http_cache SET last_used = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM http_cache WHERE stored_at < ?", (now - self.ttl_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until back under the bound
+        for url, size in self._conn.execute(
+            "SELECT url, size FROM http_cache ORDER BY last_used"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+            total -= size
+        logger.info(f"HTTP cache evicted entries down to {total} bytes")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM http_cache")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PendingCacheWrites:
+    """200 responses waiting to be cached until their content has been saved"""
+
+    def __init__(self, cache: Optional[HTTPCache]):
+        self.cache = cache
+        self._pending: Dict[str, Tuple[Dict[str, str], bytes]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, url: str, response_headers: Mapping[str, str], body: bytes):
+        if self.cache is None:
+            return
+        validators = {name: response_headers[name] for name in ('ETag', 'Last-Modified') if response_headers.get(name)}
+        if validators:
+            with self._lock:
+                self._pending[url] = (validators, body)
+
+    def commit(self, url: str) -> bool:
+        """Cache the pending response for `url`; call once its content is saved"""
+        with self._lock:
+            pending = self._pending.pop(url, None)
+        if pending is None or self.cache is None:
+            return False
+        return self.cache.store(url, *pending)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+_shared_cache: Optional[HTTPCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HTTPCache]:
+    """Shared scraper cache configured from the environment (None when disabled)"""
+    global _shared_cache
+    if os.getenv("SCRAPER_HTTP_CACHE", "true").lower() != "true":
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            try:
+                _shared_cache = HTTPCache(
+                    path=os.getenv("SCRAPER_HTTP_CACHE_PATH", DEFAULT_CACHE_PATH),
+                    ttl_seconds=int(os.getenv("SCRAPER_HTTP_CACHE_TTL", str(7 * 24 * 3600))),
+                    max_bytes=int(os.getenv("SCRAPER_HTTP_CACHE_MAX_MB", "100")) * 1024 * 1024,
+                )
+            except Exception as e:
+                logger.warning(f"Scraper HTTP cache unavailable: {e}")
+                return None
+        return _shared_cache
+
+
+def is_not_modified(response) -> bool:
+    """True when a response was served from the cache after a 304 revalidation"""
+    return getattr(response, 'from_cache', False)
@@ -2,30 +2,65 @@
 Comprehensive scraping orchestrator for legitimate ATS APIs and job sources
 """
 
+import hashlib
+import json
 import logging
 import asyncio
-from typing import List, Dict, Optional, Set
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, List, Dict, Optional, Set, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, case, func
+from sqlalchemy.dialects import postgresql, sqlite
 
 from app.database import get_db
-from app.models import Job, Company, ScrapingLog
-from app.visa_keywords import analyze_job_visa_friendliness
+from app.models import Job, Company, ScrapingLog, BoardSnapshot, company_key
+from app.visa_keywords import analyze_jobs_visa_friendliness
 from app.accredited_sponsors import check_company_sponsor_status
+from app.company_cache import CachedCompany, company_cache
+from app.job_dedup import find_duplicates, index_job_bands, job_fingerprint
+from app.recommendations import recommendation_engine
 
 from .ats_scraper import GreenhouseScraper, LeverScraper, WorkableScraper, SmartRecruitersScaper
 from .adzuna_scraper import AdzunaScraper
+from .async_fetcher import AsyncFetcher
+from .http_cache import get_http_cache
 
 logger = logging.getLogger(__name__)
 
+# Scraped jobs staged per bulk write
+SAVE_BATCH_SIZE = 500
+
+# Job fields whose change on the board means the stored job needs refreshing
+VERSIONED_FIELDS = ('title', 'description', 'location', 'employment_type', 'posted_date')
+
+
+def job_version(job_data: Dict) -> str:
+    """Short content hash of one scraped job"""
+    payload = json.dumps([job_data.get(field) for field in VERSIONED_FIELDS], default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def board_fingerprint(versions: Dict[str, str]) -> str:
+    """Hash over a board's sorted (source_url, version) pairs"""
+    digest = hashlib.sha256()
+    for source_url, version in sorted(versions.items()):
+        digest.update(f"{source_url}\0{version}\n".encode())
+    return digest.hexdigest()
+
+
 class JobScrapingOrchestrator:
     """Orchestrate job scraping from multiple legitimate sources"""
     
     def __init__(self, 
                  adzuna_app_id: str = None,
                  adzuna_app_key: str = None,
-                 workable_token: str = None):
+                 workable_token: str = None,
+                 rate_per_host: float = 1.0):
+        
+        # Requests per second allowed against any single host
+        self.rate_per_host = rate_per_host
         
         # Initialize scrapers
         self.greenhouse_scraper = GreenhouseScraper()
@@ -71,31 +106,34 @@ class JobScrapingOrchestrator:
         db = next(get_db())
         
         try:
-            # Scrape from each ATS
-            for ats_type, companies in self.target_companies.items():
-                if not companies:
-                    continue
-                
-                logger.info(f"Starting {ats_type} scraping for {len(companies)} companies")
-                
-                jobs = self._scrape_ats_source(ats_type, companies, location)
-                processed_count = self._process_and_save_jobs(db, jobs, ats_type)
-                
-                results['sources'][ats_type] = processed_count
-                results['total_jobs'] += processed_count
-                
-                logger.info(f"Completed {ats_type}: {processed_count} jobs processed")
+            # Fetch every board across all sources concurrently, then save source by source
+            fetcher = AsyncFetcher(rate_per_host=self.rate_per_host, cache=get_http_cache())
+            fetched = self._run_async(self._fetch_all_sources(location, fetcher))
             
-            # Scrape from Adzuna if available
-            if self.adzuna_scraper:
-                logger.info("Starting Adzuna visa-friendly job search")
-                adzuna_jobs = self.adzuna_scraper.search_visa_friendly_jobs(location)
-                processed_count = self._process_and_save_jobs(db, adzuna_jobs, 'adzuna')
+            for source, jobs in fetched.items():
+                try:
+                    if source == 'adzuna':
+                        # Search results, not whole boards: nothing to diff against
+                        processed_count = self._process_and_save_jobs(db, jobs, source)
+                    else:
+                        # Board responses are cached only once the board's jobs are committed
+                        scraper = self._scraper_for(source)
+                        processed_count = self._process_board_deltas(
+                            db, source, jobs,
+                            on_board_saved=lambda board, scraper=scraper: fetcher.pending_cache_writes.commit(
+                                scraper.board_url(board)
+                            )
+                        )
+                except Exception as e:
+                    # One failing source must not skip the rest
+                    logger.error(f"Error saving {source} jobs: {e}")
+                    db.rollback()
+                    processed_count = 0
                 
-                results['sources']['adzuna'] = processed_count
+                results['sources'][source] = processed_count
                 results['total_jobs'] += processed_count
                 
-                logger.info(f"Completed Adzuna: {processed_count} jobs processed")
+                logger.info(f"Completed {source}: {processed_count} jobs processed")
             
             # Update statistics
             visa_friendly_count = db.query(Job).filter(Job.visa_sponsorship == True).count()
@@ -116,130 +154,384 @@ class JobScrapingOrchestrator:
         
         return results
     
-    def _scrape_ats_source(self, ats_type: str, companies: List[str], location: str) -> List[Dict]:
-        """Scrape jobs from a specific ATS source"""
+    def _scraper_for(self, ats_type: str):
+        return {
+            'greenhouse': self.greenhouse_scraper,
+            'lever': self.lever_scraper,
+            'workable': self.workable_scraper,
+            'smartrecruiters': self.smartrecruiters_scraper,
+        }.get(ats_type)
+    
+    async def _fetch_all_sources(self, location: str, fetcher: AsyncFetcher) -> Dict:
+        """Fetch all ATS boards and Adzuna concurrently over one shared connection pool.
+        Wall-clock time is bounded by the slowest host rather than the sum of all delays.
+        ATS sources map to {board: jobs or None}; Adzuna maps to a list of jobs.
+        """
+        tasks = {}
+        
+        async with fetcher:
+            for ats_type, companies in self.target_companies.items():
+                if not companies:
+                    continue
+                scraper = self._scraper_for(ats_type)
+                if scraper is None:
+                    logger.warning(f"Unknown ATS type: {ats_type}")
+                    continue
+                logger.info(f"Starting {ats_type} scraping for {len(companies)} companies")
+                tasks[ats_type] = scraper.fetch_boards_async(fetcher, companies)
+            
+            if self.adzuna_scraper:
+                logger.info("Starting Adzuna visa-friendly job search")
+                tasks['adzuna'] = asyncio.to_thread(self.adzuna_scraper.search_visa_friendly_jobs, location)
+            
+            outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        
+        fetched = {}
+        for source, outcome in zip(tasks, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error scraping {source}: {outcome}")
+                outcome = [] if source == 'adzuna' else {}
+            fetched[source] = outcome
+        return fetched
+    
+    @staticmethod
+    def _run_async(coro):
+        """Run a coroutine from sync code, even when called inside a running event loop"""
         try:
-            if ats_type == 'greenhouse':
-                return self.greenhouse_scraper.scrape_jobs(companies, location)
-            elif ats_type == 'lever':
-                return self.lever_scraper.scrape_jobs(companies, location)
-            elif ats_type == 'workable':
-                return self.workable_scraper.scrape_jobs(companies, location)
-            elif ats_type == 'smartrecruiters':
-                return self.smartrecruiters_scraper.scrape_jobs(companies, location)
-            else:
-                logger.warning(f"Unknown ATS type: {ats_type}")
-                return []
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+    
+    def _process_board_deltas(self, db: Session, source: str, boards: Dict[str, Optional[List[Dict]]],
+                              on_board_saved: Optional[Callable[[str], object]] = None) -> int:
+        """Apply only what changed on each board since its last snapshot: insert new
+        jobs, refresh changed ones and deactivate jobs that vanished from the board.
+        Boards that failed to fetch or answered 304 (None) are left untouched, and a
+        board whose new jobs or updates failed to save keeps its old snapshot so they
+        are retried; a failing board does not stop the others. Jobs without a
+        source_url cannot be tracked across snapshots and are skipped.
+        `on_board_saved(board)` runs for every board whose content is fully committed.
+        """
+        fetched = {board: jobs for board, jobs in boards.items() if jobs is not None}
+        if not fetched:
+            return 0
+        
+        snapshots = {
+            snapshot.board: snapshot for snapshot in db.query(BoardSnapshot).filter(
+                BoardSnapshot.source == source,
+                BoardSnapshot.board.in_(list(fetched))
+            )
+        }
+        
+        new_jobs, changed_count, vanished_count = [], 0, 0
+        updates = {}
+        unchanged = []
+        now = datetime.utcnow()
+        
+        for board, jobs in fetched.items():
+            tracked = [job for job in jobs if job.get('source_url')]
+            if len(tracked) < len(jobs):
+                logger.warning(f"{source} board {board}: skipping {len(jobs) - len(tracked)} jobs without a source_url")
+            versions = {job['source_url']: job_version(job) for job in tracked}
+            fingerprint = board_fingerprint(versions)
+            snapshot = snapshots.get(board)
+            
+            if snapshot is not None and snapshot.fingerprint == fingerprint:
+                unchanged.append(board)
+                logger.info(f"{source} board {board} unchanged ({len(versions)} jobs), skipping")
+                continue
+            
+            previous = (snapshot.job_versions if snapshot is not None else None) or {}
+            board_new = [job for job in tracked if job['source_url'] not in previous]
+            board_changed = [
+                job for job in tracked
+                if job['source_url'] in previous and previous[job['source_url']] != versions[job['source_url']]
+            ]
+            board_vanished = previous.keys() - versions.keys()
+            new_jobs.extend(board_new)
+            changed_count += len(board_changed)
+            vanished_count += len(board_vanished)
+            updates[board] = (fingerprint, versions, board_new, board_changed, board_vanished)
+        
+        processed_count, failed_urls = self._save_jobs(db, new_jobs, source)
+        
+        saved = []
+        deactivated = 0
+        try:
+            for board in unchanged:
+                snapshots[board].checked_at = now
+            db.commit()
+            saved.extend(unchanged)
         except Exception as e:
-            logger.error(f"Error scraping {ats_type}: {e}")
-            return []
+            logger.error(f"Error recording checks of unchanged {source} boards: {e}")
+            db.rollback()
+        
+        for board, (fingerprint, versions, board_new, board_changed, board_vanished) in updates.items():
+            try:
+                new_urls = [job['source_url'] for job in board_new]
+                self._reactivate_jobs(db, new_urls)
+                processed_count += self._update_changed_jobs(db, board_changed)
+                deactivated += self._deactivate_jobs(db, board_vanished)
+                if failed_urls.intersection(new_urls):
+                    logger.warning(f"{source} board {board}: new jobs failed to save, keeping its snapshot for a retry")
+                    continue
+                snapshot = snapshots.get(board)
+                if snapshot is None:
+                    snapshot = BoardSnapshot(source=source, board=board)
+                    db.add(snapshot)
+                snapshot.fingerprint = fingerprint
+                snapshot.job_versions = versions
+                snapshot.job_count = len(versions)
+                snapshot.checked_at = now
+                snapshot.changed_at = now
+                db.commit()
+                saved.append(board)
+            except Exception as e:
+                logger.error(f"Error applying changes of {source} board {board}, keeping its snapshot for a retry: {e}")
+                db.rollback()
+        
+        if on_board_saved is not None:
+            for board in saved:
+                on_board_saved(board)
+        
+        logger.info(
+            f"{source}: {len(updates)}/{len(fetched)} boards changed, {len(new_jobs)} new, "
+            f"{changed_count} changed, {vanished_count} vanished ({deactivated} deactivated)"
+        )
+        return processed_count
+    
+    def _update_changed_jobs(self, db: Session, jobs: List[Dict]) -> int:
+        """Refresh stored jobs whose posting changed on the board, re-running visa analysis"""
+        if not jobs:
+            return 0
+        
+        existing = {
+            job.source_url: job for job in
+            db.query(Job).filter(Job.source_url.in_([job_data['source_url'] for job_data in jobs]))
+        }
+        analyses = analyze_jobs_visa_friendliness(
+            (job_data.get('title', ''), job_data.get('description', '')) for job_data in jobs
+        )
+        
+        updated = 0
+        for job_data, visa_analysis in zip(jobs, analyses):
+            job = existing.get(job_data['source_url'])
+            if job is None:
+                continue
+            job.title = job_data.get('title', '')
+            job.description = job_data.get('description', '')
+            job.location = job_data.get('location', '')
+            job.city = job_data.get('city')
+            job.state = job_data.get('state')
+            job.employment_type = job_data.get('employment_type')
+            job.posted_date = job_data.get('posted_date')
+            job.visa_sponsorship = visa_analysis['is_visa_friendly']
+            job.visa_sponsorship_confidence = visa_analysis['confidence_score']
+            job.international_student_friendly = visa_analysis['is_student_friendly']
+            job.is_active = True
+            updated += 1
+        
+        db.commit()
+        return updated
+    
+    def _reactivate_jobs(self, db: Session, source_urls: List[str]) -> int:
+        """Reactivate previously vanished jobs that are back on their board"""
+        if not source_urls:
+            return 0
+        count = db.query(Job).filter(
+            Job.source_url.in_(source_urls),
+            Job.is_active == False
+        ).update({Job.is_active: True}, synchronize_session=False)
+        db.commit()
+        return count
+    
+    def _deactivate_jobs(self, db: Session, source_urls: Set[str]) -> int:
+        """Mark jobs that disappeared from their board as inactive"""
+        if not source_urls:
+            return 0
+        count = db.query(Job).filter(
+            Job.source_url.in_(list(source_urls)),
+            Job.is_active == True
+        ).update({Job.is_active: False}, synchronize_session=False)
+        db.commit()
+        return count
     
     def _process_and_save_jobs(self, db: Session, jobs: List[Dict], source_type: str) -> int:
-        """Process and save jobs to database with enhanced analysis"""
+        """Process and save jobs to database with enhanced analysis; returns rows inserted"""
+        return self._save_jobs(db, jobs, source_type)[0]
+    
+    def _save_jobs(self, db: Session, jobs: List[Dict], source_type: str) -> Tuple[int, Set[Optional[str]]]:
+        """Save jobs in batches, each committed on its own; each batch costs a handful
+        of queries regardless of size. Returns (rows inserted, source_urls of failed batches).
+        """
         processed_count = 0
+        failed_urls: Set[Optional[str]] = set()
+        jobs = iter(jobs)
         
-        for job_data in jobs:
+        while True:
+            batch = list(islice(jobs, SAVE_BATCH_SIZE))
+            if not batch:
+                break
             try:
-                # Check for duplicates
-                existing_job = db.query(Job).filter(
-                    or_(
-                        Job.source_url == job_data.get('source_url'),
-                        and_(
-                            Job.title == job_data.get('title'),
-                            Job.company_id == self._get_or_create_company(db, job_data, source_type).id
-                        )
-                    )
-                ).first()
-                
-                if existing_job:
-                    continue
-                
-                # Get or create company
-                company = self._get_or_create_company(db, job_data, source_type)
-                
-                # Enhanced visa analysis
-                visa_analysis = analyze_job_visa_friendliness(
-                    job_data.get('title', ''),
-                    job_data.get('description', '')
-                )
-                
-                # Create job record
-                job = Job(
-                    title=job_data.get('title', ''),
-                    description=job_data.get('description', ''),
-                    company_id=company.id,
-                    location=job_data.get('location', ''),
-                    city=job_data.get('city'),
-                    state=job_data.get('state'),
-                    salary_min=job_data.get('salary_min'),
-                    salary_max=job_data.get('salary_max'),
-                    salary_currency=job_data.get('salary_currency', 'AUD'),
-                    employment_type=job_data.get('employment_type'),
-                    source_website=job_data.get('source_website', ''),
-                    source_url=job_data.get('source_url', ''),
-                    source_job_id=job_data.get('source_job_id', ''),
-                    posted_date=job_data.get('posted_date'),
-                    visa_sponsorship=visa_analysis['is_visa_friendly'],
-                    visa_sponsorship_confidence=visa_analysis['confidence_score'],
-                    international_student_friendly=visa_analysis['is_student_friendly'],
-                    is_active=True
-                )
-                
-                db.add(job)
-                processed_count += 1
-                
-                if processed_count % 50 == 0:
-                    db.commit()
-                    logger.info(f"Processed {processed_count} jobs from {source_type}")
-                
+                processed_count += self._save_job_batch(db, batch, source_type)
+                db.commit()
+                logger.info(f"Processed {processed_count} jobs from {source_type}")
             except Exception as e:
-                logger.error(f"Error processing job from {source_type}: {e}")
+                logger.error(f"Error processing job batch from {source_type}: {e}")
+                db.rollback()
+                failed_urls.update(job_data.get('source_url') for job_data in batch)
+        
+        if processed_count:
+            # New rows are in: don't wait for the matrix TTL to recommend them
+            recommendation_engine.invalidate()
+        return processed_count, failed_urls
+    
+    def _save_job_batch(self, db: Session, batch: List[Dict], source_type: str) -> int:
+        """Resolve companies, drop known jobs and bulk insert the rest; returns rows inserted"""
+        # Stage: drop repeats of the same posting within the batch
+        staged = []
+        seen_urls = set()
+        for job_data in batch:
+            source_url = job_data.get('source_url') or None
+            if source_url and source_url in seen_urls:
                 continue
+            seen_urls.add(source_url)
+            staged.append(job_data)
         
-        db.commit()
-        return processed_count
+        # Cached company lookup, one IN query for existing URLs, one for near-duplicates
+        companies = self._resolve_companies(db, staged, source_type)
+        
+        existing_urls = set()
+        if seen_urls - {None}:
+            existing_urls = {
+                url for (url,) in db.query(Job.source_url).filter(Job.source_url.in_(seen_urls - {None}))
+            }
+        
+        pending = []
+        for job_data in staged:
+            if job_data.get('source_url') in existing_urls:
+                continue
+            company = companies[job_data.get('company_name') or '']
+            pending.append((job_data, company))
+        
+        if not pending:
+            return 0
+        
+        # Reposts (same title or near-identical text at the same company) are stored flagged
+        fingerprints = [
+            job_fingerprint(company.id, job_data.get('title', ''), job_data.get('description', ''))
+            for job_data, company in pending
+        ]
+        duplicates = find_duplicates(db, fingerprints)
+        
+        # Enhanced visa analysis for the whole batch (fans out across processes when large)
+        analyses = analyze_jobs_visa_friendliness(
+            (job_data.get('title', ''), job_data.get('description', '')) for job_data, _ in pending
+        )
+        
+        rows = [
+            {
+                'title': job_data.get('title', ''),
+                'description': job_data.get('description', ''),
+                'company_id': company.id,
+                'location': job_data.get('location', ''),
+                'city': job_data.get('city'),
+                'state': job_data.get('state'),
+                'salary_min': job_data.get('salary_min'),
+                'salary_max': job_data.get('salary_max'),
+                'salary_currency': job_data.get('salary_currency', 'AUD'),
+                'employment_type': job_data.get('employment_type'),
+                'source_website': job_data.get('source_website', ''),
+                'source_url': job_data.get('source_url') or None,
+                'source_job_id': job_data.get('source_job_id', ''),
+                'posted_date': job_data.get('posted_date'),
+                'visa_sponsorship': visa_analysis['is_visa_friendly'],
+                'visa_sponsorship_confidence': visa_analysis['confidence_score'],
+                'international_student_friendly': visa_analysis['is_student_friendly'],
+                'is_active': True,
+                'is_duplicate': position in duplicates,
+                **fingerprint.columns(),
+            }
+            for position, ((job_data, company), visa_analysis, fingerprint)
+            in enumerate(zip(pending, analyses, fingerprints))
+        ]
+        
+        return self._insert_new_jobs(db, rows)
     
-    def _get_or_create_company(self, db: Session, job_data: Dict, source_type: str) -> Company:
-        """Get existing company or create new one with sponsor analysis"""
-        company_name = job_data.get('company_name', '')
+    def _insert_new_jobs(self, db: Session, rows: List[Dict]) -> int:
+        """INSERT ... ON CONFLICT (source_url) DO NOTHING as a single executemany"""
+        dialect = db.get_bind().dialect.name
+        if dialect == 'postgresql':
+            stmt = postgresql.insert(Job.__table__).on_conflict_do_nothing(index_elements=['source_url'])
+        elif dialect == 'sqlite':
+            stmt = sqlite.insert(Job.__table__).on_conflict_do_nothing(index_elements=['source_url'])
+        else:
+            stmt = Job.__table__.insert()
         
-        # Try to find existing company
-        company = db.query(Company).filter(Company.name.ilike(f"%{company_name}%")).first()
+        # RETURNING only yields rows that were actually inserted; index those for near-duplicate lookups
+        table = Job.__table__
+        inserted = db.execute(
+            stmt.returning(table.c.id, table.c.company_id, table.c.description_simhash), rows
+        ).all()
+        index_job_bands(db, inserted)
+        return len(inserted)
+    
+    def _resolve_companies(self, db: Session, jobs: List[Dict], source_type: str) -> Dict[str, CachedCompany]:
+        """Map every company name in the batch to a company via the shared company cache,
+        creating missing ones (with their sponsor check) in one flush
+        """
+        keys = {job_data.get('company_name') or '': company_key(job_data.get('company_name')) for job_data in jobs}
+        resolved = company_cache.lookup(db, set(keys.values()))
         
-        if not company:
-            # Check sponsor status
-            sponsor_status = check_company_sponsor_status(company_name)
-            
-            # Create new company
-            company = Company(
-                name=company_name,
-                website=job_data.get('company_website', ''),
-                location=job_data.get('location', ''),
-                is_accredited_sponsor=sponsor_status['is_accredited_sponsor'],
-                sponsor_confidence=sponsor_status['confidence'],
-                ats_type=source_type,
-                ats_company_id=job_data.get('company_id', company_name)
-            )
-            
-            # Add sponsor details if available
-            if sponsor_status['sponsor_info']:
-                info = sponsor_status['sponsor_info']
-                company.sponsor_abn = info.get('abn')
-                if info.get('approval_date'):
-                    try:
-                        company.sponsor_approval_date = datetime.fromisoformat(info['approval_date'])
-                    except:
-                        pass
-            
-            db.add(company)
-            db.commit()
-            
-            logger.info(f"Created company: {company_name} (Sponsor: {sponsor_status['is_accredited_sponsor']})")
+        for job_data in jobs:
+            company_name = job_data.get('company_name') or ''
+            if keys[company_name] not in resolved:
+                company = self._build_company(company_name, job_data, source_type)
+                db.add(company)
+                resolved[keys[company_name]] = company
+                logger.info(f"Created company: {company_name} (Sponsor: {company.is_accredited_sponsor})")
+        
+        # Assign ids to all new companies in one round-trip
+        db.flush()
+        for key, company in resolved.items():
+            if isinstance(company, Company):
+                resolved[key] = CachedCompany.from_company(company)
+                company_cache.stage(db, company)
+        
+        company_ids = {company.id for company in resolved.values()}
+        db.query(Company).filter(
+            Company.id.in_(company_ids),
+            or_(Company.ats_type.is_(None), Company.ats_type != source_type)
+        ).update({'ats_type': source_type, 'ats_last_scraped': datetime.utcnow()}, synchronize_session=False)
+        
+        return {company_name: resolved[key] for company_name, key in keys.items()}
+    
+    def _build_company(self, company_name: str, job_data: Dict, source_type: str) -> Company:
+        """Create (unsaved) company with sponsor analysis"""
+        # Check sponsor status
+        sponsor_status = check_company_sponsor_status(company_name)
         
-        # Update ATS information
-        if not company.ats_type or company.ats_type != source_type:
-            company.ats_type = source_type
-            company.ats_last_scraped = datetime.utcnow()
+        company = Company(
+            name=company_name,
+            website=job_data.get('company_website', ''),
+            location=job_data.get('location', ''),
+            is_accredited_sponsor=sponsor_status['is_accredited_sponsor'],
+            sponsor_confidence=sponsor_status['confidence'],
+            ats_type=source_type,
+            ats_company_id=job_data.get('company_id', company_name)
+        )
+        
+        # Add sponsor details if available
+        if sponsor_status['sponsor_info']:
+            info = sponsor_status['sponsor_info']
+            company.sponsor_abn = info.get('abn')
+            if info.get('approval_date'):
+                try:
+                    company.sponsor_approval_date = datetime.fromisoformat(info['approval_date'])
+                except:
+                    pass
         
         return company
     
@@ -270,31 +562,24 @@ class JobScrapingOrchestrator:
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=days)
             
+            # One grouped pass over the window instead of a count per source
+            by_source = db.query(
+                Job.source_website,
+                func.count(Job.id),
+                func.sum(case((Job.visa_sponsorship == True, 1), else_=0)),
+                func.sum(case((Job.international_student_friendly == True, 1), else_=0)),
+            ).filter(Job.scraped_at >= cutoff_date).group_by(Job.source_website).all()
+            
             stats = {
-                'total_jobs': db.query(Job).filter(Job.scraped_at >= cutoff_date).count(),
-                'visa_friendly': db.query(Job).filter(
-                    and_(Job.visa_sponsorship == True, Job.scraped_at >= cutoff_date)
-                ).count(),
-                'student_friendly': db.query(Job).filter(
-                    and_(Job.international_student_friendly == True, Job.scraped_at >= cutoff_date)
-                ).count(),
+                'total_jobs': sum(row[1] for row in by_source),
+                'visa_friendly': sum(int(row[2] or 0) for row in by_source),
+                'student_friendly': sum(int(row[3] or 0) for row in by_source),
                 'sponsor_companies': db.query(Company).filter(
                     Company.is_accredited_sponsor == True
                 ).count(),
-                'by_source': {}
+                'by_source': {source: count for source, count, _, _ in by_source}
             }
             
-            # Stats by source
-            sources = db.query(Job.source_website).filter(
-                Job.scraped_at >= cutoff_date
-            ).distinct().all()
-            
-            for (source,) in sources:
-                count = db.query(Job).filter(
-                    and_(Job.source_website == source, Job.scraped_at >= cutoff_date)
-                ).count()
-                stats['by_source'][source] = count
-            
             return stats
             
         finally:
@@ -0,0 +1,184 @@
+"""
+Full-text search index for jobs (SQLite FTS5 / PostgreSQL tsvector)
+"""
+
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import Index, Text, cast, event, func, literal_column, or_, select, text
+from sqlalchemy.orm import Query, Session
+
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "jobs_fts"
+PG_INDEX_NAME = "idx_jobs_search_tsv"
+
+# Column weights for bm25(): title, description, required_skills
+SQLITE_BM25_WEIGHTS = (10.0, 1.0, 5.0)
+
+SQLITE_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, required_skills,
+        content='jobs', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    # Keep the external-content index in sync with the jobs table
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON jobs BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, required_skills)
+        VALUES (new.id, new.title, new.description, new.required_skills);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON jobs BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, required_skills)
+        VALUES ('delete', old.id, old.title, old.description, old.required_skills);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description, required_skills ON jobs BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, required_skills)
+        VALUES ('delete', old.id, old.title, old.description, old.required_skills);
+        INSERT INTO {FTS_TABLE}(rowid, title, description, required_skills)
+        VALUES (new.id, new.title, new.description, new.required_skills);
+    END
+    """,
+]
+
+
+def search_document():
+    """Weighted tsvector expression over the searchable job columns (PostgreSQL).
+    The GIN index and the search query must use this exact expression.
+    """
+    return (
+        func.setweight(func.to_tsvector("english", func.coalesce(Job.title, "")), "A")
+        .op("||")(func.setweight(func.to_tsvector("english", func.coalesce(cast(Job.required_skills, Text), "")), "B"))
+        .op("||")(func.setweight(func.to_tsvector("english", func.coalesce(Job.description, "")), "C"))
+    )
+
+
+# GIN index for the Supabase PostgreSQL path; skipped on SQLite which uses FTS5
+jobs_search_index = Index(PG_INDEX_NAME, search_document(), postgresql_using="gin").ddl_if(dialect="postgresql")
+
+# Engines (by URL) that have a usable full-text index
+_available = {}
+
+
+def _create_sqlite_fts(connection, rebuild: bool = False) -> bool:
+    """Create the FTS5 table and sync triggers; optionally rebuild from jobs"""
+    try:
+        existed = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:name"),
+            {"name": FTS_TABLE},
+        ).first() is not None
+        for ddl in SQLITE_FTS_DDL:
+            connection.execute(text(ddl))
+        if rebuild or not existed:
+            connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')"))
+        return True
+    except Exception as e:
+        # SQLite builds without FTS5 fall back to LIKE search
+        logger.warning(f"Full-text index unavailable on SQLite: {e}")
+        return False
+
+
+@event.listens_for(Job.__table__, "after_create")
+def _jobs_after_create(target, connection, **kw):
+    """Create the FTS5 mirror whenever the jobs table is created (SQLite)"""
+    if connection.dialect.name == "sqlite":
+        _create_sqlite_fts(connection)
+
+
+def ensure_search_index(engine) -> bool:
+    """Create (or backfill) the full-text index on an existing database"""
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            ok = _create_sqlite_fts(conn)
+        elif conn.dialect.name == "postgresql":
+            try:
+                jobs_search_index.create(conn, checkfirst=True)
+                ok = True
+            except Exception as e:
+                logger.warning(f"Could not create {PG_INDEX_NAME}: {e}")
+                ok = False
+        else:
+            ok = False
+    _available[str(engine.url)] = ok
+    if ok:
+        logger.info(f"Full-text search index ready ({engine.dialect.name})")
+    return ok
+
+
+def rebuild_search_index(engine) -> None:
+    """Rebuild the SQLite FTS5 index from the jobs table (no-op on PostgreSQL)"""
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            _create_sqlite_fts(conn, rebuild=True)
+
+
+def search_index_available(db: Session) -> bool:
+    """Check (once per engine) whether the full-text index can be queried"""
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _available:
+        if bind.dialect.name == "sqlite":
+            _available[key] = db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:name"),
+                {"name": FTS_TABLE},
+            ).first() is not None
+        else:
+            _available[key] = bind.dialect.name == "postgresql"
+    return _available[key]
+
+
+def build_fts_query(term: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 MATCH expression (prefix match on every word)"""
+    tokens = re.findall(r"\w+", term or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{t}"*' for t in tokens)
+
+
+def apply_full_text_search(query: Query, db: Session, term: str, order_by_rank: bool = False) -> Query:
+    """Filter a Job query by full-text match, optionally ordering by relevance.
+    Falls back to substring matching when no index is available.
+    """
+    if not search_index_available(db):
+        return query.filter(
+            or_(
+                Job.title.contains(term),
+                Job.description.contains(term),
+                Job.required_skills.contains(term)
+            )
+        )
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        fts_query = build_fts_query(term)
+        if not fts_query:
+            return query
+        weights = ", ".join(str(w) for w in SQLITE_BM25_WEIGHTS)
+        matches = (
+            select(
+                literal_column("rowid").label("job_id"),
+                literal_column(f"bm25({FTS_TABLE}, {weights})").label("rank"),
+            )
+            .select_from(text(FTS_TABLE))
+            .where(literal_column(FTS_TABLE).op("MATCH")(fts_query))
+            .subquery("fts_matches")
+        )
+        query = query.join(matches, matches.c.job_id == Job.id)
+        # bm25() is lower-is-better
+        return query.order_by(matches.c.rank.asc(), Job.id.desc()) if order_by_rank else query
+
+    ts_query = func.plainto_tsquery("english", term)
+    document = search_document()
+    query = query.filter(document.op("@@")(ts_query))
+    if order_by_rank:
+        query = query.order_by(func.ts_rank_cd(document, ts_query).desc(), Job.id.desc())
+    return query
@@ -3,10 +3,16 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
 from app.models import Job, Company, VisaKeyword, ScrapingLog
 from app.schemas import JobCreate, CompanyCreate, JobFilter, JobSearchResponse
-from app.visa_keywords import analyze_job_visa_friendliness
+from app.visa_keywords import analyze_job_visa_friendliness, analyze_jobs_visa_friendliness
 from app.scrapers.orchestrator import JobScrapingOrchestrator
+from app.pagination import keyset_order, fetch_page, encode_cursor, job_count_cache, count_cache_key
+from app.job_stats import job_stats
+from app.company_cache import company_cache, resolve_company
+from app.job_archive import archive_expired_jobs
+from app.job_dedup import find_duplicate, job_fingerprint
 import logging
 from datetime import datetime, timedelta
+from collections import deque
 
 logger = logging.getLogger(__name__)
 
@@ -22,20 +28,25 @@ class JobService:
         self.db = db
     
     def create_or_get_company(self, company_name: str, **kwargs) -> Company:
-        """Create or get existing company"""
-        company = self.db.query(Company).filter(Company.name == company_name).first()
+        """Create or get existing company (resolved through the shared company cache)"""
+        cached = resolve_company(self.db, company_name)
+        company = self.db.get(Company, cached.id) if cached else None
         
         if not company:
             company_data = CompanyCreate(name=company_name, **kwargs)
             company = Company(**company_data.dict())
             self.db.add(company)
+            self.db.flush()
+            company_cache.stage(self.db, company)
             self.db.commit()
             self.db.refresh(company)
             
         return company
     
-    def process_scraped_job(self, job_data: Dict) -> Optional[Job]:
-        """Process and save a scraped job with visa analysis and enhanced duplicate detection"""
+    def process_scraped_job(self, job_data: Dict, analysis: Optional[Dict] = None) -> Optional[Job]:
+        """Process and save a scraped job with visa analysis and enhanced duplicate detection.
+        A precomputed visa analysis (see process_scraped_jobs) can be passed in.
+        """
         try:
             # Enhanced duplicate detection - check by source URL and title+company combination
             source_url = job_data.get('source_url')
@@ -52,26 +63,22 @@ class JobService:
                     logger.debug(f"Duplicate job found by URL, skipping: {title} at {source_url}")
                     return existing_job
             
-            # Secondary check: title + company combination (for cases where URL might be different)
-            if title and company_name:
-                existing_job = self.db.query(Job).join(Company).filter(
-                    Job.title.ilike(f"%{title}%"),
-                    Company.name.ilike(f"%{company_name}%"),
-                    Job.is_active == True
-                ).first()
-                
-                if existing_job:
-                    logger.debug(f"Duplicate job found by title+company, skipping: {title} at {company_name}")
-                    return existing_job
-            
             # Create or get company
             company = self.create_or_get_company(job_data['company_name'])
             
+            # Reposts under a different URL (same title or near-identical text at the
+            # same company) are kept but flagged
+            fingerprint = job_fingerprint(company.id, title, job_data.get('description', ''))
+            duplicate_of = find_duplicate(self.db, fingerprint)
+            if duplicate_of is not None:
+                logger.debug(f"Near-duplicate of job {duplicate_of}, flagging: {title} at {company_name}")
+            
             # Analyze visa friendliness using new system
-            analysis = analyze_job_visa_friendliness(
-                job_data.get('title', ''),
-                job_data.get('description', '')
-            )
+            if analysis is None:
+                analysis = analyze_job_visa_friendliness(
+                    job_data.get('title', ''),
+                    job_data.get('description', '')
+                )
             visa_sponsorship = analysis['is_visa_friendly']
             confidence = analysis['confidence_score']
             student_friendly = analysis['is_student_friendly']
@@ -88,7 +95,9 @@ class JobService:
                 'visa_sponsorship_confidence': confidence,
                 'international_student_friendly': student_friendly,
                 'required_skills': required_skills,
-                'preferred_skills': preferred_skills
+                'preferred_skills': preferred_skills,
+                'is_duplicate': duplicate_of is not None,
+                **fingerprint.columns()
             }
             
             # Remove company_name as it's not in the Job model
@@ -107,10 +116,70 @@ class JobService:
             self.db.rollback()
             return None
     
-    def search_jobs(self, filters: JobFilter, page: int = 1, per_page: int = 20) -> JobSearchResponse:
-        """Search jobs with filters"""
+    def process_scraped_jobs(self, jobs_data: List[Dict]) -> List[Optional[Job]]:
+        """Process a batch of scraped jobs, running visa analysis for the batch up front"""
+        analyses = analyze_jobs_visa_friendliness(
+            (job_data.get('title', ''), job_data.get('description', '')) for job_data in jobs_data
+        )
+        return [self.process_scraped_job(job_data, analysis)
+                for job_data, analysis in zip(jobs_data, analyses)]
+    
+    def reanalyze_visa_friendliness(self, batch_size: int = 500) -> int:
+        """Backfill visa analysis over all stored jobs (e.g. after a keyword change).
+        Returns the number of jobs whose flags changed.
+        """
+        queued = deque()
+        
+        def stored_jobs():
+            last_id = 0
+            while True:
+                rows = self.db.query(Job.id, Job.title, Job.description).filter(
+                    Job.id > last_id
+                ).order_by(Job.id).limit(batch_size).all()
+                if not rows:
+                    return
+                last_id = rows[-1].id
+                for row in rows:
+                    queued.append(row.id)
+                    yield row.title, row.description
+        
+        updated = 0
+        results = {}
+        
+        def flush() -> int:
+            changed = 0
+            for job in self.db.query(Job).filter(Job.id.in_(list(results))).all():
+                values = results[job.id]
+                if (job.visa_sponsorship, job.visa_sponsorship_confidence,
+                        job.international_student_friendly) != values:
+                    (job.visa_sponsorship, job.visa_sponsorship_confidence,
+                     job.international_student_friendly) = values
+                    changed += 1
+            self.db.commit()
+            results.clear()
+            return changed
+        
+        # One stream over the whole table so a process pool is reused across batches
+        for analysis in analyze_jobs_visa_friendliness(stored_jobs()):
+            results[queued.popleft()] = (
+                analysis['is_visa_friendly'],
+                analysis['confidence_score'],
+                analysis['is_student_friendly'],
+            )
+            if len(results) >= batch_size:
+                updated += flush()
+        if results:
+            updated += flush()
+        
+        logger.info(f"Re-analyzed visa friendliness: {updated} jobs updated")
+        return updated
+    
+    def search_jobs(self, filters: JobFilter, page: int = 1, per_page: int = 20,
+                    cursor: Optional[str] = None) -> JobSearchResponse:
+        """Search jobs with filters (offset pages, or keyset pages when a cursor is given)"""
         query = self.db.query(Job).filter(
             Job.is_active == True,
+            Job.is_duplicate.isnot(True),
             Job.source_website.in_(ALLOWED_SOURCES)
         )
         
@@ -172,12 +241,24 @@ class JobService:
                     )
                 )
         
-        # Get total count
-        total = query.count()
+        query = keyset_order(query)
         
-        # Apply pagination
-        offset = (page - 1) * per_page
-        jobs = query.offset(offset).limit(per_page).all()
+        if cursor:
+            # Keyset mode: reuse the cached total for this filter set
+            cache_key = count_cache_key(self.db, filters.dict())
+            total = job_count_cache.get_or_compute(cache_key, query.order_by(None).count)
+            jobs, next_cursor = fetch_page(query, per_page, cursor)
+        else:
+            # Get total count
+            total = query.order_by(None).count()
+            
+            # Apply pagination
+            offset = (page - 1) * per_page
+            jobs = query.offset(offset).limit(per_page + 1).all()
+            next_cursor = None
+            if len(jobs) > per_page:
+                jobs = jobs[:per_page]
+                next_cursor = encode_cursor(jobs[-1])
         
         total_pages = (total + per_page - 1) // per_page
         
@@ -186,37 +267,16 @@ class JobService:
             total=total,
             page=page,
             per_page=per_page,
-            total_pages=total_pages
+            total_pages=total_pages,
+            next_cursor=next_cursor
         )
     
     def get_job_stats(self) -> Dict:
-        """Get job statistics"""
-        total_jobs = self.db.query(Job).filter(
-            Job.is_active == True,
-            Job.source_website.in_(ALLOWED_SOURCES)
-        ).count()
-        visa_friendly = self.db.query(Job).filter(
-            and_(Job.is_active == True, Job.visa_sponsorship == True, Job.source_website.in_(ALLOWED_SOURCES))
-        ).count()
-        student_friendly = self.db.query(Job).filter(
-            and_(Job.is_active == True, Job.international_student_friendly == True, Job.source_website.in_(ALLOWED_SOURCES))
-        ).count()
-        
-        # Jobs by state
-        state_stats = self.db.query(
-            Job.state, func.count(Job.id)
-        ).filter(
-            Job.is_active == True,
-            Job.source_website.in_(ALLOWED_SOURCES)
-        ).group_by(Job.state).all()
-        
-        # Jobs by source
-        source_stats = self.db.query(
-            Job.source_website, func.count(Job.id)
-        ).filter(
-            Job.is_active == True,
-            Job.source_website.in_(ALLOWED_SOURCES)
-        ).group_by(Job.source_website).all()
+        """Get job statistics (from the materialized job_stats aggregate)"""
+        stats = job_stats.snapshot(self.db, ALLOWED_SOURCES)
+        total_jobs = stats['total_jobs']
+        visa_friendly = stats['visa_friendly_jobs']
+        student_friendly = stats['student_friendly_jobs']
         
         return {
             'total_jobs': total_jobs,
@@ -224,8 +284,8 @@ class JobService:
             'student_friendly_jobs': student_friendly,
             'visa_friendly_percentage': (visa_friendly / total_jobs * 100) if total_jobs > 0 else 0,
             'student_friendly_percentage': (student_friendly / total_jobs * 100) if total_jobs > 0 else 0,
-            'jobs_by_state': dict(state_stats),
-            'jobs_by_source': dict(source_stats)
+            'jobs_by_state': stats['jobs_by_state'],
+            'jobs_by_source': stats['jobs_by_source']
         }
 
 class ScrapingService:
@@ -261,14 +321,8 @@ class ScrapingService:
             raise
     
     def cleanup_old_jobs(self, days: int = 30):
-        """Remove jobs older than specified days"""
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
-        deleted_count = self.db.query(Job).filter(
-            Job.scraped_at < cutoff_date
-        ).delete()
-        
-        self.db.commit()
-        logger.info(f"Cleaned up {deleted_count} old jobs")
+        """Archive jobs that expired or were scraped more than `days` ago (in batches)"""
+        result = archive_expired_jobs(self.db, days=days)
+        logger.info(f"Cleaned up {result['archived']} old jobs")
         
-        return deleted_count
+        return result['archived']
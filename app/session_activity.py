@@ -0,0 +1,121 @@
+"""
+Write-behind session activity tracking: validations record touches in memory and
+a background thread flushes them every few seconds with one bulk UPDATE
+"""
+
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from .auth_models import UserSession
+
+logger = logging.getLogger(__name__)
+
+# Core executemany so sessions deleted or invalidated in the meantime are simply skipped
+_sessions = UserSession.__table__
+_TOUCH_STATEMENT = (
+    update(_sessions)
+    .where(_sessions.c.id == bindparam("b_id"), _sessions.c.is_active == True)
+    .values(expires_at=bindparam("b_expires_at"), last_activity=bindparam("b_last_activity"))
+)
+
+
+class SessionActivityBuffer:
+    """Latest (expires_at, last_activity) per session id, coalesced until flushed"""
+
+    def __init__(self, flush_interval_seconds: float = 5.0,
+                 session_factory: Optional[Callable[[], Session]] = None):
+        self.flush_interval_seconds = flush_interval_seconds
+        self.session_factory = session_factory
+        self._pending: Dict[int, Tuple[datetime, datetime]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def touch(self, session_id: int, expires_at: datetime, last_activity: Optional[datetime] = None):
+        with self._lock:
+            self._pending[session_id] = (expires_at, last_activity or datetime.utcnow())
+        self._ensure_flusher()
+
+    def pending_expiry(self, session_id: int) -> Optional[datetime]:
+        """Expiry recorded for a session but not yet written to the database"""
+        with self._lock:
+            entry = self._pending.get(session_id)
+        return entry[0] if entry else None
+
+    def discard(self, *session_ids: int):
+        """Drop pending touches of sessions that were logged out or invalidated"""
+        with self._lock:
+            for session_id in session_ids:
+                self._pending.pop(session_id, None)
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """Write all pending touches in a single executemany UPDATE"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        own_session = db is None
+        if own_session:
+            db = self.session_factory()
+        try:
+            db.execute(_TOUCH_STATEMENT, [
+                {"b_id": session_id, "b_expires_at": expires_at, "b_last_activity": last_activity}
+                for session_id, (expires_at, last_activity) in pending.items()
+            ])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to flush {len(pending)} session touches: {e}")
+            # Keep them for the next attempt unless a newer touch has arrived
+            with self._lock:
+                for session_id, entry in pending.items():
+                    self._pending.setdefault(session_id, entry)
+            return 0
+        finally:
+            if own_session:
+                db.close()
+        return len(pending)
+
+    def _ensure_flusher(self):
+        if self.session_factory is None or (self._thread and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="session-activity-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._wakeup.wait(self.flush_interval_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Session activity flusher error: {e}")
+
+    def stop(self):
+        """Stop the flusher thread and write whatever is still pending"""
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval_seconds)
+        if self.session_factory is not None:
+            self.flush()
+
+
+def _default_session() -> Session:
+    from .database import SessionLocal
+    return SessionLocal()
+
+
+session_activity = SessionActivityBuffer(
+    flush_interval_seconds=float(os.getenv("SESSION_TOUCH_FLUSH_INTERVAL", "5")),
+    session_factory=_default_session,
+)
+atexit.register(session_activity.stop)
@@ -6,11 +6,14 @@ import hashlib
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from fastapi import Request, HTTPException, status
 import logging
 
 from .auth_models import User, UserSession
 from .database import get_db
+from .principal_cache import principal_cache
+from .session_activity import session_activity
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +27,10 @@ class SessionService:
         self.session_cleanup_interval_hours = 24
     
     def create_session(self, user: User, request: Request) -> UserSession:
-        """Create a new session with security metadata"""
-        # Clean up old sessions first
-        self.cleanup_expired_sessions()
+        """Create a new session with security metadata.
+        Expired-session cleanup runs periodically (SessionMiddleware / SessionCleanupService),
+        not on login.
+        """
         self.enforce_session_limit(user.id)
         
         # Generate secure session token
@@ -49,6 +53,7 @@ class SessionService:
         self.db.add(session)
         self.db.commit()
         self.db.refresh(session)
+        principal_cache.invalidate_user(user.id)
         
         logger.info(f"Created session for user {user.id} from IP {ip_address}")
         return session
@@ -63,8 +68,9 @@ class SessionService:
         if not session:
             return None
         
-        # Check if session is expired
-        if session.expires_at < datetime.utcnow():
+        # Check if session is expired (a touch may not have been flushed yet)
+        expires_at = session_activity.pending_expiry(session.id) or session.expires_at
+        if expires_at < datetime.utcnow():
             self.invalidate_session(session_token)
             return None
         
@@ -83,9 +89,13 @@ class SessionService:
         return session
     
     def refresh_session(self, session: UserSession) -> UserSession:
-        """Extend session expiry time"""
-        session.expires_at = datetime.utcnow() + timedelta(minutes=self.session_timeout_minutes)
-        self.db.commit()
+        """Extend session expiry time (written behind in batches by session_activity)"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(minutes=self.session_timeout_minutes)
+        session_activity.touch(session.id, expires_at, now)
+        # Reflect the new values without marking the row dirty for this request's commit
+        set_committed_value(session, "expires_at", expires_at)
+        set_committed_value(session, "last_activity", now)
         return session
     
     def invalidate_session(self, session_token: str) -> bool:
@@ -97,6 +107,8 @@ class SessionService:
         if session:
             session.is_active = False
             self.db.commit()
+            session_activity.discard(session.id)
+            principal_cache.invalidate_user(session.user_id)
             logger.info(f"Invalidated session {session.id} for user {session.user_id}")
             return True
         
@@ -104,25 +116,59 @@ class SessionService:
     
     def invalidate_all_user_sessions(self, user_id: int) -> int:
         """Invalidate all sessions for a user (logout from all devices)"""
-        count = self.db.query(UserSession).filter(
+        session_ids = [session_id for (session_id,) in self.db.query(UserSession.id).filter(
             UserSession.user_id == user_id,
             UserSession.is_active == True
-        ).update({"is_active": False})
+        )]
+        count = self.db.query(UserSession).filter(
+            UserSession.id.in_(session_ids)
+        ).update({"is_active": False}, synchronize_session=False) if session_ids else 0
         
         self.db.commit()
+        session_activity.discard(*session_ids)
+        principal_cache.invalidate_user(user_id)
         logger.info(f"Invalidated {count} sessions for user {user_id}")
         return count
     
     def get_user_sessions(self, user_id: int) -> List[UserSession]:
-        """Get all active sessions for a user"""
-        return self.db.query(UserSession).filter(
+        """Get all active sessions for a user, with expiries extended by unflushed touches"""
+        now = datetime.utcnow()
+        sessions = []
+        for session in self.db.query(UserSession).filter(
             UserSession.user_id == user_id,
-            UserSession.is_active == True,
-            UserSession.expires_at > datetime.utcnow()
-        ).order_by(UserSession.created_at.desc()).all()
+            UserSession.is_active == True
+        ).order_by(UserSession.created_at.desc()):
+            pending = session_activity.pending_expiry(session.id)
+            if pending:
+                set_committed_value(session, "expires_at", pending)
+            if session.expires_at > now:
+                sessions.append(session)
+        return sessions
+    
+    def has_active_session(self, user_id: int) -> bool:
+        """Whether the user has at least one unexpired active session"""
+        now = datetime.utcnow()
+        if self.db.query(
+            self.db.query(UserSession.id).filter(
+                UserSession.user_id == user_id,
+                UserSession.is_active == True,
+                UserSession.expires_at > now
+            ).exists()
+        ).scalar():
+            return True
+        # Touches only extend expiries: check those not yet flushed for sessions the database shows as expired
+        return any(
+            (session_activity.pending_expiry(session_id) or now) > now
+            for (session_id,) in self.db.query(UserSession.id).filter(
+                UserSession.user_id == user_id,
+                UserSession.is_active == True
+            )
+        )
     
     def cleanup_expired_sessions(self) -> int:
         """Clean up expired sessions"""
+        # Write pending touches first so sessions kept alive by them are not expired
+        session_activity.flush(self.db)
         count = self.db.query(UserSession).filter(
             UserSession.expires_at < datetime.utcnow()
         ).update({"is_active": False})
@@ -142,27 +188,24 @@ class SessionService:
         return count + deleted_count
     
     def enforce_session_limit(self, user_id: int) -> int:
-        """Enforce maximum sessions per user"""
-        active_sessions = self.db.query(UserSession).filter(
+        """Enforce maximum sessions per user (invalidates the oldest in one UPDATE)"""
+        stale_ids = [session_id for (session_id,) in self.db.query(UserSession.id).filter(
             UserSession.user_id == user_id,
             UserSession.is_active == True,
             UserSession.expires_at > datetime.utcnow()
-        ).order_by(UserSession.created_at.desc()).all()
-        
-        if len(active_sessions) >= self.max_sessions_per_user:
-            # Invalidate oldest sessions
-            sessions_to_invalidate = active_sessions[self.max_sessions_per_user-1:]
-            invalidated_count = 0
-            
-            for session in sessions_to_invalidate:
-                session.is_active = False
-                invalidated_count += 1
-            
+        ).order_by(UserSession.created_at.desc()).offset(self.max_sessions_per_user - 1)]
+        if not stale_ids:
+            return 0
+        invalidated_count = self.db.query(UserSession).filter(
+            UserSession.id.in_(stale_ids)
+        ).update({"is_active": False}, synchronize_session=False)
+        
+        if invalidated_count:
             self.db.commit()
+            session_activity.discard(*stale_ids)
+            principal_cache.invalidate_user(user_id)
             logger.info(f"Invalidated {invalidated_count} old sessions for user {user_id}")
-            return invalidated_count
-        
-        return 0
+        return invalidated_count
     
     def get_session_info(self, session_token: str) -> Optional[Dict[str, Any]]:
         """Get session information for display"""
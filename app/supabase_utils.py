@@ -1,8 +1,16 @@
+import asyncio
+import io
 import os
 import logging
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Optional, Tuple, Union
 from supabase import create_client, Client
 import uuid
+import weakref
 from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
@@ -24,31 +32,168 @@ def supabase_configured() -> bool:
     """Check if Supabase is properly configured."""
     return bool(_get_supabase_url() and _get_supabase_service_key())
 
+# One long-lived client per (url, key); its HTTP connection pool is reused across requests
+_client: Optional[Client] = None
+_client_key: Optional[Tuple[str, str]] = None
+_client_lock = threading.Lock()
+
 def get_supabase_client() -> Optional[Client]:
-    """Get Supabase client if configured."""
+    """Get the shared Supabase client if configured."""
+    global _client, _client_key
     if not supabase_configured():
         return None
     
+    key = (_get_supabase_url(), _get_supabase_service_key())
+    client = _client
+    if client is not None and _client_key == key:
+        return client
+    
+    with _client_lock:
+        if _client is not None and _client_key == key:
+            return _client
+        try:
+            # Create client with minimal configuration to avoid proxy issues
+            from supabase.lib.client_options import ClientOptions
+            
+            options = ClientOptions(
+                schema='public',
+                auto_refresh_token=True,
+                persist_session=True
+            )
+            
+            _client = create_client(
+                supabase_url=key[0],
+                supabase_key=key[1],
+                options=options
+            )
+            _client_key = key
+            return _client
+        except Exception as e:
+            logger.error(f"Failed to create Supabase client: {e}")
+            return None
+
+def reset_supabase_client():
+    """Drop the shared client so the next call builds a fresh one."""
+    global _client, _client_key
+    with _client_lock:
+        _client = None
+        _client_key = None
+
+# Uploads are streamed to storage from the request's own spooled temp file
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 10MB
+UPLOAD_SNIFF_BYTES = 2048  # enough for MIME detection
+
+class UploadTooLarge(ValueError):
+    """Raised by stage_upload when an upload is larger than its size limit."""
+
+class StagedUpload:
+    """An uploaded file, size-checked and rewound, streamed as is to storage."""
+
+    def __init__(self, stream: BinaryIO, size: int, head: bytes):
+        self.stream = stream
+        self.size = size
+        self.head = head  # first UPLOAD_SNIFF_BYTES bytes, for MIME sniffing
+        self._readers: list = []
+
+    def open(self) -> Union[bytes, io.BufferedReader]:
+        """The body in a form storage3 uploads as is (it only accepts bytes,
+        BufferedReader and FileIO): bytes while the spooled upload is still in
+        memory, otherwise a BufferedReader over its disk file.
+        """
+        self.stream.seek(0)
+        if isinstance(self.stream, (io.BufferedReader, io.FileIO)):
+            return self.stream
+        if getattr(self.stream, '_rolled', True) is False:
+            return self.stream.read()
+        try:
+            fd = self.stream.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return self.stream.read()
+        self.stream.flush()
+        # Shares the spooled file's descriptor, so nothing is copied
+        reader = open(fd, 'rb', closefd=False)
+        reader.seek(0)
+        self._readers.append(reader)
+        return reader
+
+    def cleanup(self):
+        for reader in self._readers:
+            reader.close()
+        self._readers.clear()
+        # Closing the spooled file deletes its disk copy, if it rolled over to one
+        self.stream.close()
+
+    def __enter__(self) -> "StagedUpload":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cleanup()
+
+# The supabase client is synchronous: uploads, URL signing, staging and MIME
+# sniffing run on this bounded pool (per process) instead of the event loop
+STORAGE_IO_WORKERS = int(os.getenv("SUPABASE_IO_WORKERS", "8"))
+# Uploads may hold at most this many pool threads, leaving the rest for URL resolution
+MAX_CONCURRENT_UPLOADS = int(os.getenv("SUPABASE_MAX_CONCURRENT_UPLOADS", "4"))
+
+_storage_executor = ThreadPoolExecutor(max_workers=STORAGE_IO_WORKERS, thread_name_prefix="storage-io")
+# One upload semaphore per event loop: an asyncio.Semaphore is bound to the loop that first waits on it
+_upload_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+_upload_slots_lock = threading.Lock()
+
+def _loop_upload_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    with _upload_slots_lock:
+        slots = _upload_slots.get(loop)
+        if slots is None:
+            slots = _upload_slots[loop] = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+        return slots
+
+async def run_storage_io(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking storage call on the storage pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_storage_executor, partial(func, *args, **kwargs))
+
+async def resolve_storage_url_async(storage_path: Optional[str]) -> Optional[str]:
+    """resolve_storage_url for async endpoints, off the event loop."""
+    if not storage_path or storage_path.startswith('http'):
+        return storage_path
+    return await run_storage_io(resolve_storage_url, storage_path)
+
+def _stage_file(source: BinaryIO, max_bytes: Optional[int]) -> StagedUpload:
     try:
-        # Create client with minimal configuration to avoid proxy issues
-        from supabase.lib.client_options import ClientOptions
-        
-        options = ClientOptions(
-            schema='public',
-            auto_refresh_token=True,
-            persist_session=True
-        )
-        
-        return create_client(
-            supabase_url=_get_supabase_url(),
-            supabase_key=_get_supabase_service_key(),
-            options=options
-        )
-    except Exception as e:
-        logger.error(f"Failed to create Supabase client: {e}")
-        return None
+        # The request body is already spooled: its size is a seek away, no copy needed
+        source.seek(0, os.SEEK_END)
+        size = source.tell()
+        if max_bytes is not None and size > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+        source.seek(0)
+        head = source.read(UPLOAD_SNIFF_BYTES)
+        source.seek(0)
+    except BaseException:
+        source.close()
+        raise
+    return StagedUpload(source, size, head)
+
+async def stage_upload(file, max_bytes: Optional[int] = MAX_UPLOAD_BYTES) -> StagedUpload:
+    """Check an UploadFile against `max_bytes` (UploadTooLarge) and capture its
+    first bytes for MIME sniffing, without reading or copying the rest of it.
+    """
+    return await run_storage_io(_stage_file, file.file, max_bytes)
 
-async def upload_resume(user_id: int, content: bytes, filename: str) -> Optional[str]:
+def _put_object(client: Client, path: str, content: Union[bytes, StagedUpload], content_type: str):
+    # Staged uploads are sent as bytes or a reader over their disk file (see StagedUpload.open)
+    body = content.open() if isinstance(content, StagedUpload) else content
+    return client.storage.from_("master").upload(
+        path,
+        body,
+        file_options={"content-type": content_type}
+    )
+
+async def _upload_object(client: Client, path: str, content: Union[bytes, StagedUpload], content_type: str):
+    async with _loop_upload_slots():
+        return await run_storage_io(_put_object, client, path, content, content_type)
+
+async def upload_resume(user_id: int, content: Union[bytes, StagedUpload], filename: str) -> Optional[str]:
     """Upload resume to Supabase storage using master bucket."""
     if not supabase_configured():
         logger.warning("Supabase not configured, cannot upload resume")
@@ -64,11 +209,7 @@ async def upload_resume(user_id: int, content: bytes, filename: str) -> Optional
         unique_filename = f"resumes/resume_{user_id}_{uuid.uuid4()}.{file_ext}"
         
         # Upload to master bucket with resumes/ prefix
-        result = client.storage.from_("master").upload(
-            unique_filename,
-            content,
-            file_options={"content-type": "application/pdf"}
-        )
+        result = await _upload_object(client, unique_filename, content, "application/pdf")
         
         # Handle the result properly
         if hasattr(result, 'error') and result.error:
@@ -82,7 +223,7 @@ async def upload_resume(user_id: int, content: bytes, filename: str) -> Optional
         logger.error(f"Error uploading resume: {e}")
         return None
 
-async def upload_company_logo(user_id: int, content: bytes, filename: str) -> Optional[str]:
+async def upload_company_logo(user_id: int, content: Union[bytes, StagedUpload], filename: str) -> Optional[str]:
     """Upload company logo to Supabase storage using master bucket."""
     if not supabase_configured():
         logger.warning("Supabase not configured, cannot upload company logo")
@@ -98,11 +239,7 @@ async def upload_company_logo(user_id: int, content: bytes, filename: str) -> Op
         unique_filename = f"company-logos/logo_{user_id}_{uuid.uuid4()}.{file_ext}"
         
         # Upload to master bucket with company-logos/ prefix
-        result = client.storage.from_("master").upload(
-            unique_filename,
-            content,
-            file_options={"content-type": f"image/{file_ext}"}
-        )
+        result = await _upload_object(client, unique_filename, content, f"image/{file_ext}")
         
         # Handle the result properly
         if hasattr(result, 'error') and result.error:
@@ -116,7 +253,7 @@ async def upload_company_logo(user_id: int, content: bytes, filename: str) -> Op
         logger.error(f"Error uploading company logo: {e}")
         return None
 
-async def upload_job_document(user_id: int, job_id: int, content: bytes, filename: str) -> Optional[str]:
+async def upload_job_document(user_id: int, job_id: int, content: Union[bytes, StagedUpload], filename: str) -> Optional[str]:
     """Upload job document to Supabase storage using master bucket."""
     if not supabase_configured():
         logger.warning("Supabase not configured, cannot upload job document")
@@ -132,11 +269,7 @@ async def upload_job_document(user_id: int, job_id: int, content: bytes, filenam
         unique_filename = f"job-documents/job_{job_id}_{user_id}_{uuid.uuid4()}.{file_ext}"
         
         # Upload to master bucket with job-documents/ prefix
-        result = client.storage.from_("master").upload(
-            unique_filename,
-            content,
-            file_options={"content-type": "application/pdf"}
-        )
+        result = await _upload_object(client, unique_filename, content, "application/pdf")
         
         # Handle the result properly
         if hasattr(result, 'error') and result.error:
@@ -150,7 +283,7 @@ async def upload_job_document(user_id: int, job_id: int, content: bytes, filenam
         logger.error(f"Error uploading job document: {e}")
         return None
 
-async def upload_visa_document(user_id: int, document_type: str, content: bytes, filename: str) -> Optional[str]:
+async def upload_visa_document(user_id: int, document_type: str, content: Union[bytes, StagedUpload], filename: str) -> Optional[str]:
     """Upload visa document to Supabase storage using master bucket."""
     if not supabase_configured():
         logger.warning("Supabase not configured, cannot upload visa document")
@@ -177,11 +310,7 @@ async def upload_visa_document(user_id: int, document_type: str, content: bytes,
         elif file_ext == 'docx':
             content_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
         
-        result = client.storage.from_("master").upload(
-            unique_filename,
-            content,
-            file_options={"content-type": content_type}
-        )
+        result = await _upload_object(client, unique_filename, content, content_type)
         
         # Handle the result properly
         if hasattr(result, 'error') and result.error:
@@ -195,6 +324,74 @@ async def upload_visa_document(user_id: int, document_type: str, content: bytes,
         logger.error(f"Error uploading visa document: {e}")
         return None
 
+class SignedURLCache:
+    """Signed URLs keyed by (file path, TTL), reused until shortly before they expire.
+    Kept in least-recently-used order: lookups move an entry to the back, and
+    puts evict from the front while entries there are expired or the cache is full.
+    """
+
+    def __init__(self, max_entries: int = 4096, refresh_margin: float = 0.1, min_margin_seconds: int = 30):
+        self.max_entries = max_entries
+        self.refresh_margin = refresh_margin
+        self.min_margin_seconds = min_margin_seconds
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str, ttl: int) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get((file_path, ttl))
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[(file_path, ttl)]
+                return None
+            self._entries.move_to_end((file_path, ttl))
+            return entry[1]
+
+    def put(self, file_path: str, ttl: int, url: str):
+        margin = max(ttl * self.refresh_margin, self.min_margin_seconds)
+        if ttl <= margin:
+            return
+        key = (file_path, ttl)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + ttl - margin, url)
+            now = time.monotonic()
+            while self._entries:
+                oldest_key, (usable_until, _) = next(iter(self._entries.items()))
+                if usable_until > now and len(self._entries) <= self.max_entries:
+                    break
+                del self._entries[oldest_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+signed_url_cache = SignedURLCache(max_entries=int(os.getenv("SUPABASE_SIGNED_URL_CACHE_SIZE", "4096")))
+
+
+def _signed_url_ttl() -> int:
+    return int(os.getenv('SUPABASE_SIGNED_URL_TTL', '3600'))  # Default 1 hour
+
+
+def _storage_private() -> bool:
+    return os.getenv('SUPABASE_STORAGE_PRIVATE', 'false').lower() == 'true'
+
+
+def _extract_signed_url(result) -> Optional[str]:
+    """Pull the URL out of a create_signed_url(s) result (dict or string)"""
+    if isinstance(result, dict):
+        # Try different possible keys for the URL
+        return result.get('signedURL') or result.get('signedUrl') or result.get('url')
+    if isinstance(result, str):
+        return result
+    return None
+
+
 def resolve_storage_url(storage_path: Optional[str]) -> Optional[str]:
     """Resolves a storage path to a full URL using master bucket."""
     if not storage_path:
@@ -214,21 +411,21 @@ def resolve_storage_url(storage_path: Optional[str]) -> Optional[str]:
                 file_path = storage_path[8:]  # Remove '/master/' prefix
                 
                 # Check if storage is private - use signed URLs for security
-                storage_private = os.getenv('SUPABASE_STORAGE_PRIVATE', 'false').lower() == 'true'
+                storage_private = _storage_private()
                 if storage_private:
                     # Use signed URL for private storage (more secure)
                     try:
-                        ttl = int(os.getenv('SUPABASE_SIGNED_URL_TTL', '3600'))  # Default 1 hour
+                        ttl = _signed_url_ttl()
+                        cached_url = signed_url_cache.get(file_path, ttl)
+                        if cached_url:
+                            return cached_url
                         signed_url_result = client.storage.from_("master").create_signed_url(file_path, ttl)
                         if signed_url_result:
                             # Extract the actual URL from the result (could be dict or string)
-                            if isinstance(signed_url_result, dict):
-                                # Try different possible keys for the URL
-                                signed_url = signed_url_result.get('signedURL') or signed_url_result.get('signedUrl') or signed_url_result.get('url')
-                                if signed_url:
-                                    return signed_url
-                            elif isinstance(signed_url_result, str):
-                                return signed_url_result
+                            signed_url = _extract_signed_url(signed_url_result)
+                            if signed_url:
+                                signed_url_cache.put(file_path, ttl, signed_url)
+                                return signed_url
                             logger.warning("Could not extract URL from signed URL result")
                         else:
                             logger.warning("Signed URL creation returned None, falling back to public URL")
@@ -247,3 +444,37 @@ def resolve_storage_url(storage_path: Optional[str]) -> Optional[str]:
                     return storage_path  # Return original path as last resort
     
     return storage_path
+
+
+def resolve_storage_urls(storage_paths: Iterable[Optional[str]]) -> Dict[str, Optional[str]]:
+    """Resolve many storage paths at once, keyed by path in input order.
+    Private master-bucket paths missing from the cache are signed with a single
+    create_signed_urls call; everything else goes through resolve_storage_url.
+    """
+    paths = list(dict.fromkeys(path for path in storage_paths if path))
+    resolved: Dict[str, Optional[str]] = {}
+
+    if paths and supabase_configured() and _storage_private():
+        ttl = _signed_url_ttl()
+        pending: Dict[str, str] = {}
+        for path in paths:
+            if path.startswith('/master/'):
+                cached_url = signed_url_cache.get(path[8:], ttl)
+                if cached_url:
+                    resolved[path] = cached_url
+                else:
+                    pending[path[8:]] = path
+        client = get_supabase_client() if pending else None
+        if client:
+            try:
+                results = client.storage.from_("master").create_signed_urls(list(pending), ttl) or []
+                for item in results:
+                    file_path = item.get('path') if isinstance(item, dict) else None
+                    signed_url = _extract_signed_url(item)
+                    if file_path in pending and signed_url and not item.get('error'):
+                        signed_url_cache.put(file_path, ttl, signed_url)
+                        resolved[pending[file_path]] = signed_url
+            except Exception as e:
+                logger.warning(f"Failed to create signed URLs in bulk: {e}, resolving individually")
+
+    return {path: resolved[path] if path in resolved else resolve_storage_url(path) for path in paths}
@@ -0,0 +1,172 @@
+"""
+Buffered JobView ingestion: views are queued in memory and written to job_views
+in bulk by a background thread, every `flush_interval_ms` or `flush_rows` rows.
+When the queue is full new views are only counted, not stored. A batch whose write
+fails is retried on later flushes, up to `max_attempts` writes, and then counted
+as failed.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .auth_models import JobView
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+class JobViewBuffer:
+    """Bounded queue of pending JobView rows with a background bulk flusher"""
+
+    def __init__(self, max_queue: int = 10000, flush_rows: int = 500, flush_interval_ms: int = 1000,
+                 session_factory: Optional[Callable[[], Session]] = None, max_attempts: int = 3):
+        self.max_queue = max_queue
+        self.flush_rows = flush_rows
+        self.flush_interval_ms = flush_interval_ms
+        self.session_factory = session_factory
+        self.max_attempts = max_attempts
+        self._queue: deque = deque()
+        # (attempts so far, rows) of batches whose write failed, retried before new views
+        self._retry: deque = deque()
+        self._retry_rows = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.counters = Counter()
+        # Views that could not be queued under overload, per job
+        self.overflow: Counter = Counter()
+
+    def submit(self, job_id: int, user_id: Optional[int] = None, referrer: Optional[str] = None,
+               viewed_at: Optional[datetime] = None, **fields) -> bool:
+        """Queue a view; returns False when it was dropped because the queue is full"""
+        row = {'job_id': job_id, 'user_id': user_id, 'referrer': referrer,
+               'viewed_at': viewed_at or datetime.utcnow(), **fields}
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self.counters['dropped'] += 1
+                self.overflow[job_id] += 1
+                return False
+            self._queue.append(row)
+            self.counters['accepted'] += 1
+            queued = len(self._queue)
+        if queued >= self.flush_rows:
+            self._wakeup.set()
+        self._ensure_flusher()
+        return True
+
+    def __len__(self) -> int:
+        return len(self._queue) + self._retry_rows
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """Write everything queued so far in bulk inserts of up to `flush_rows` rows.
+        Stops at the first failed batch, which is kept for the next flush.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    if self._retry:
+                        attempts, batch = self._retry.popleft()
+                        self._retry_rows -= len(batch)
+                    else:
+                        attempts = 0
+                        batch = [self._queue.popleft() for _ in range(min(self.flush_rows, len(self._queue)))]
+                if not batch:
+                    return written
+                count = self._write_batch(batch, db)
+                if count is None:
+                    self._requeue(batch, attempts + 1)
+                    return written
+                written += count
+
+    def _requeue(self, batch, attempts: int):
+        with self._lock:
+            if attempts < self.max_attempts and self._retry_rows + len(batch) <= self.max_queue:
+                self._retry.appendleft((attempts, batch))
+                self._retry_rows += len(batch)
+                self.counters['retried'] += len(batch)
+                return
+            self.counters['failed'] += len(batch)
+        logger.error(f"Dropped {len(batch)} job views after {attempts} failed writes")
+
+    def _write_batch(self, batch, db: Optional[Session]) -> Optional[int]:
+        """Insert one batch; returns the rows written, or None when the write failed"""
+        own_session = db is None
+        if own_session:
+            db = self.session_factory()
+        try:
+            # Views for jobs that no longer exist are discarded in one lookup
+            job_ids = {row['job_id'] for row in batch}
+            existing = {job_id for (job_id,) in db.query(Job.id).filter(Job.id.in_(job_ids))}
+            rows = [row for row in batch if row['job_id'] in existing]
+            if len(rows) < len(batch):
+                self.counters['unknown_job'] += len(batch) - len(rows)
+            if rows:
+                db.execute(insert(JobView), rows)
+            db.commit()
+            self.counters['written'] += len(rows)
+            return len(rows)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to write {len(batch)} job views: {e}")
+            return None
+        finally:
+            if own_session:
+                db.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.counters, 'queued': len(self._queue), 'retrying': self._retry_rows}
+
+    def _ensure_flusher(self):
+        if self.session_factory is None or (self._thread and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._stopping or (self._thread and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name="job-view-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval_ms / 1000)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Job view flusher error: {e}")
+
+    def stop(self):
+        """Stop the flusher thread and write whatever is still queued"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval_ms / 1000 + 1)
+        if self.session_factory is not None:
+            self.flush()
+        if len(self):
+            logger.error(f"Shutting down with {len(self)} job views not written")
+
+
+def _default_session() -> Session:
+    from .database import SessionLocal
+    return SessionLocal()
+
+
+job_view_buffer = JobViewBuffer(
+    max_queue=int(os.getenv("JOB_VIEW_QUEUE_MAX", "10000")),
+    flush_rows=int(os.getenv("JOB_VIEW_FLUSH_ROWS", "500")),
+    flush_interval_ms=int(os.getenv("JOB_VIEW_FLUSH_INTERVAL_MS", "1000")),
+    session_factory=_default_session,
+)
+atexit.register(job_view_buffer.stop)
@@ -23,6 +23,10 @@ from .supabase_utils import (
     supabase_configured,
     resolve_storage_url,
     get_supabase_client,
+    stage_upload,
+    UploadTooLarge,
+    run_storage_io,
+    resolve_storage_url_async,
 )
 import logging
 import os
@@ -196,21 +200,18 @@ async def upload_visa_document(
     if any(char in file.filename for char in ['..', '/', '\\', '<', '>', ':', '"', '|', '?', '*']):
         raise HTTPException(status_code=400, detail="Invalid filename characters")
 
-    # Read content once
+    # Enforce the 10MB limit on the spooled upload without copying it
     try:
-        content = await file.read()
+        staged = await stage_upload(file)
+    except UploadTooLarge:
+        raise HTTPException(status_code=400, detail="File size exceeds 10MB limit")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read file: {str(e)}")
     
-    # Validate file size (10MB limit)
-    max_size = 10 * 1024 * 1024  # 10MB in bytes
-    if len(content) > max_size:
-        raise HTTPException(status_code=400, detail="File size exceeds 10MB limit")
-    
     # Validate MIME type for additional security (optional)
     try:
         import magic
-        mime_type = magic.from_buffer(content, mime=True)
+        mime_type = await run_storage_io(magic.from_buffer, staged.head, mime=True)
         if mime_type not in allowed_mime_types:
             logger.warning(f"Invalid MIME type detected: {mime_type}")
             # Don't fail for MIME type mismatch, just log it
@@ -222,27 +223,28 @@ async def upload_visa_document(
         # Continue without MIME validation if it fails
 
     # Use Supabase storage with master bucket (proper visa document upload)
-    if supabase_configured():
-        try:
-            logger.info(f"Starting VEVO upload for user {current_user.id}, document_type: {document_type}")
-            # Use the proper visa document upload function
-            vevo_url_value = await supabase_upload_visa_document(current_user.id, document_type, content, file.filename)
-            logger.info(f"Supabase upload result: {vevo_url_value}")
+    with staged:
+        if supabase_configured():
+            try:
+                logger.info(f"Starting VEVO upload for user {current_user.id}, document_type: {document_type}")
+                # Use the proper visa document upload function
+                vevo_url_value = await supabase_upload_visa_document(current_user.id, document_type, staged, file.filename)
+                logger.info(f"Supabase upload result: {vevo_url_value}")
             
-            if not vevo_url_value:
-                logger.error("Supabase upload returned None - client creation or upload failed")
+                if not vevo_url_value:
+                    logger.error("Supabase upload returned None - client creation or upload failed")
+                    raise HTTPException(status_code=500, detail="File upload service is temporarily unavailable. Please try again later.")
+            except Exception as e:
+                logger.error(f"Supabase upload error: {e}")
+                import traceback
+                logger.error(f"Full traceback: {traceback.format_exc()}")
                 raise HTTPException(status_code=500, detail="File upload service is temporarily unavailable. Please try again later.")
-        except Exception as e:
-            logger.error(f"Supabase upload error: {e}")
-            import traceback
-            logger.error(f"Full traceback: {traceback.format_exc()}")
-            raise HTTPException(status_code=500, detail="File upload service is temporarily unavailable. Please try again later.")
-    else:
-        logger.error("Supabase not configured - missing environment variables")
-        raise HTTPException(
-            status_code=503, 
-            detail="File upload service is currently unavailable. Please contact support or try again later."
-        )
+        else:
+            logger.error("Supabase not configured - missing environment variables")
+            raise HTTPException(
+                status_code=503, 
+                detail="File upload service is currently unavailable. Please contact support or try again later."
+            )
 
     # Update user profile (exactly like resume upload)
     try:
@@ -267,7 +269,7 @@ async def upload_visa_document(
             raise HTTPException(status_code=500, detail=f"Database error updating VEVO document URL: {str(e)}")
 
     # For response, resolve to public/signed URL
-    resolved_url = resolve_storage_url(current_user.vevo_document_url)
+    resolved_url = await resolve_storage_url_async(current_user.vevo_document_url)
     logger.info(f"User {current_user.id} uploaded VEVO document: {resolved_url}")
     logger.info(f"Stored URL: {current_user.vevo_document_url}")
     logger.info(f"Resolved URL: {resolved_url}")
@@ -276,7 +278,7 @@ async def upload_visa_document(
         "document_url": resolved_url,
         "vevo_document_url": resolved_url,  # Keep both for compatibility
         "file_name": file.filename,
-        "file_size": len(content)
+        "file_size": staged.size
     }
 
 @router.get("/health")
@@ -300,7 +302,7 @@ async def visa_health_check():
         }
 
 @router.get("/documents")
-async def list_visa_documents(
+def list_visa_documents(
     current_user: User = Depends(get_current_student),
     db: Session = Depends(get_db)
 ):
@@ -148,6 +148,13 @@ def ensure_schema_compatibility():
 
 ensure_schema_compatibility()
 
+# Full-text search index for /api/jobs/search (FTS5 on SQLite, GIN tsvector on PostgreSQL)
+from app.search_index import ensure_search_index
+try:
+    ensure_search_index(engine)
+except Exception as e:
+    logger.warning(f"Full-text search index setup failed: {e}")
+
 app = FastAPI(
     title="Joborra - Australian Job Scraping API",
     description="Scalable job scraping service for Australia with visa-friendly filtering",
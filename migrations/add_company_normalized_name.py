@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Migration: Add normalized_name field to companies table
+Date: 2026-10-16
+Description: Adds an indexed normalized_name column (lowercased, whitespace-collapsed company name)
+used by the company resolution cache instead of name scans, and backfills existing rows.
+
+Usage:
+  python -m migrations.add_company_normalized_name
+
+Runs against app.database.engine (DATABASE_URL), so works on SQLite and Postgres.
+Idempotent: the column and index are only added when missing, and only rows without
+a normalized_name are backfilled.
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app.database import engine, SessionLocal
+from app.models import Company, company_key
+
+
+def backfill_normalized_names(db, batch_size: int = 1000) -> int:
+    """Fill companies.normalized_name in id order, one executemany UPDATE per batch
+    (plain SQL, so companies.updated_at is left alone)
+    """
+    filled = 0
+    last_id = 0
+    while True:
+        rows = db.query(Company.id, Company.name).filter(
+            Company.id > last_id, Company.normalized_name.is_(None)
+        ).order_by(Company.id).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        db.execute(
+            text("UPDATE companies SET normalized_name = :normalized_name WHERE id = :id"),
+            [{'id': row.id, 'normalized_name': company_key(row.name)} for row in rows]
+        )
+        db.commit()
+        filled += len(rows)
+    return filled
+
+
+def run_migration():
+    """Add and backfill normalized_name on the companies table"""
+    print("Starting migration: Add normalized_name field to companies table...")
+    columns = {column['name'] for column in inspect(engine).get_columns('companies')}
+    with engine.begin() as conn:
+        if 'normalized_name' not in columns:
+            conn.execute(text("ALTER TABLE companies ADD COLUMN normalized_name VARCHAR(255)"))
+            print("✅ Added normalized_name column")
+        else:
+            print("⚠️  normalized_name column already exists")
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_companies_normalized_name ON companies (normalized_name)"))
+        print("✅ Ensured ix_companies_normalized_name index")
+
+    db = SessionLocal()
+    try:
+        filled = backfill_normalized_names(db)
+        print(f"✅ Backfilled normalized_name for {filled} companies")
+    finally:
+        db.close()
+    print("✅ Migration completed successfully!")
+
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,45 @@
+"""
+Add near-duplicate fingerprints to jobs: jobs.dedup_key, jobs.description_simhash
+and the job_simhash_bands LSH table, then fingerprint existing jobs.
+
+Usage:
+  python -m migrations.add_job_fingerprints
+
+Idempotent: existing columns, indexes and tables are left alone, and only jobs
+without a dedup_key are backfilled.
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app.database import engine, SessionLocal
+from app.models import JobSimhashBand
+from app.job_dedup import backfill_fingerprints
+
+
+def run_migration():
+    columns = {column['name'] for column in inspect(engine).get_columns('jobs')}
+    with engine.begin() as conn:
+        if 'dedup_key' not in columns:
+            conn.execute(text("ALTER TABLE jobs ADD COLUMN dedup_key VARCHAR(32)"))
+            print("✓ Added jobs.dedup_key")
+        if 'description_simhash' not in columns:
+            conn.execute(text("ALTER TABLE jobs ADD COLUMN description_simhash BIGINT"))
+            print("✓ Added jobs.description_simhash")
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_jobs_dedup_key ON jobs (dedup_key)"))
+    JobSimhashBand.__table__.create(bind=engine, checkfirst=True)
+    print("✓ job_simhash_bands table ready")
+
+    db = SessionLocal()
+    try:
+        filled = backfill_fingerprints(db)
+        print(f"✓ Fingerprinted {filled} existing jobs")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run_migration()
@@ -19,7 +19,7 @@ from sqlalchemy import func
 
 # Use the shared SQLAlchemy session and models (points to Supabase when DATABASE_URL is Postgres)
 from app.database import SessionLocal
-from app.models import Job
+from app.models import Job, BoardSnapshot
 
 # Setup logging
 logging.basicConfig(
@@ -40,22 +40,36 @@ class JobScrapingScheduler:
         self.last_run_file = "last_scraping_run.json"
         self.scraping_script = "simple_scraping.py"
         
-    def get_existing_job_urls(self) -> Set[str]:
-        """Get all existing job URLs from database to avoid duplicates"""
-        existing_urls: Set[str] = set()
+    def get_board_snapshot_summary(self) -> Dict[str, Dict]:
+        """Per-source incremental scraping state. Deduplication happens per board
+        against stored snapshots (see JobScrapingOrchestrator._process_board_deltas),
+        so nothing here loads every job URL into memory.
+        """
+        summary: Dict[str, Dict] = {}
+        db = None
         try:
             db = SessionLocal()
-            urls = db.query(Job.source_url).filter(Job.source_url.isnot(None)).all()
-            existing_urls = {u[0] for u in urls if u and u[0]}
-            logger.info(f"Found {len(existing_urls)} existing job URLs in database")
+            rows = db.query(
+                BoardSnapshot.source,
+                func.count(BoardSnapshot.id),
+                func.coalesce(func.sum(BoardSnapshot.job_count), 0),
+                func.max(BoardSnapshot.checked_at)
+            ).group_by(BoardSnapshot.source).all()
+            for source, boards, jobs, last_checked in rows:
+                summary[source] = {
+                    "boards": int(boards),
+                    "tracked_jobs": int(jobs),
+                    "last_checked": last_checked.isoformat() if last_checked else None
+                }
         except Exception as e:
-            logger.error(f"Error fetching existing job URLs: {e}")
+            logger.error(f"Error fetching board snapshots: {e}")
         finally:
-            try:
-                db.close()
-            except Exception:
-                pass
-        return existing_urls
+            if db:
+                try:
+                    db.close()
+                except Exception:
+                    pass
+        return summary
     
     def get_last_run_info(self) -> Dict:
         """Get information about the last scraping run"""
@@ -181,15 +195,14 @@ class JobScrapingScheduler:
         logger.info("=== SCHEDULED SCRAPING JOB COMPLETED ===")
     
     def cleanup_old_jobs(self):
-        """Remove jobs older than 30 days to keep database fresh"""
+        """Archive expired jobs (and those scraped over 30 days ago) to keep database fresh"""
         db = None
         try:
+            from app.job_archive import archive_expired_jobs
             db = SessionLocal()
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            deleted_count = db.query(Job).filter(Job.scraped_at < thirty_days_ago).delete(synchronize_session=False)
-            db.commit()
-            if deleted_count:
-                logger.info(f"Cleaned up {deleted_count} jobs older than 30 days")
+            result = archive_expired_jobs(db, days=30)
+            if result['archived'] or result['deactivated']:
+                logger.info(f"Archived {result['archived']} expired jobs, deactivated {result['deactivated']} with applications")
         except Exception as e:
             logger.error(f"Error cleaning up old jobs: {e}")
             try:
@@ -204,6 +217,29 @@ class JobScrapingScheduler:
                 except Exception:
                     pass
     
+    def compact_job_views(self):
+        """Roll raw job views up into daily buckets and prune old raw events"""
+        db = None
+        try:
+            from app.job_analytics import compact_job_views
+            db = SessionLocal()
+            result = compact_job_views(db)
+            if result['rolled_up'] or result['pruned']:
+                logger.info(f"Compacted {result['rolled_up']} job views, pruned {result['pruned']}")
+        except Exception as e:
+            logger.error(f"Error compacting job views: {e}")
+            try:
+                if db:
+                    db.rollback()
+            except Exception:
+                pass
+        finally:
+            if db:
+                try:
+                    db.close()
+                except Exception:
+                    pass
+    
     def run_daily_maintenance(self):
         """Run daily maintenance tasks"""
         logger.info("=== RUNNING DAILY MAINTENANCE ===")
@@ -248,10 +284,14 @@ class JobScrapingScheduler:
         # Also allow manual trigger for testing
         schedule.every().day.at("10:00").do(self.run_scraping_job)  # 10 AM for testing
         
+        # Compact job views into rollups every hour
+        schedule.every().hour.do(self.compact_job_views)
+        
         logger.info("Scheduled jobs:")
         logger.info("  - Scraping job: Every day at 2:00 AM (runs every alternate day)")
         logger.info("  - Daily maintenance: Every day at 1:00 AM")
         logger.info("  - Test scraping: Every day at 10:00 AM")
+        logger.info("  - Job view compaction: Every hour")
         
         # Run initial maintenance
         self.run_daily_maintenance()
@@ -290,6 +330,9 @@ def main():
             print(f"Last run: {last_run_info.get('last_run_date', 'Never')}")
             print(f"Jobs scraped in last run: {last_run_info.get('jobs_scraped', 0)}")
             print(f"Should run today: {scheduler.should_run_scraping()}")
+            for source, state in scheduler.get_board_snapshot_summary().items():
+                print(f"Boards tracked ({source}): {state['boards']} boards, "
+                      f"{state['tracked_jobs']} jobs, last checked {state['last_checked']}")
             return
     
     # Start the scheduler
@@ -226,3 +226,47 @@ def test_pagination(test_client):
 def test_scraping_endpoints(test_client):
     """Test scraping endpoints (removed)"""
     pass
+
+def test_job_search_full_text(test_client):
+    """Test full-text search matching and relevance ordering"""
+    response = test_client.get("/jobs/search?search=graduate")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["jobs"][0]["title"] == "Graduate Developer"
+    
+    # Prefix matching on each word, title hits rank above description hits
+    response = test_client.get("/jobs/search?search=develop")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 2
+    assert data["jobs"][0]["title"] == "Graduate Developer"
+    
+    # Punctuation in user input must not break the MATCH syntax
+    response = test_client.get('/jobs/search?search="python (dev*')
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+    
+    response = test_client.get("/jobs/search?search=sponsorship&sort=newest")
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+
+def test_cursor_pagination(test_client):
+    """Test keyset pagination via next_cursor"""
+    response = test_client.get("/jobs/search?per_page=1")
+    assert response.status_code == 200
+    first = response.json()
+    assert len(first["jobs"]) == 1
+    assert first["next_cursor"]
+    
+    response = test_client.get(f"/jobs/search?per_page=1&cursor={first['next_cursor']}")
+    assert response.status_code == 200
+    second = response.json()
+    assert second["total"] == 2
+    assert len(second["jobs"]) == 1
+    assert second["jobs"][0]["id"] != first["jobs"][0]["id"]
+    assert second["next_cursor"] is None
+    
+    # Malformed cursors are rejected rather than silently restarting
+    response = test_client.get("/jobs/search?cursor=not-a-cursor")
+    assert response.status_code == 400
@@ -222,3 +222,995 @@ def test_scraping_service_cleanup(test_db_with_data):
     assert deleted_count == 0
     remaining_jobs = test_db_with_data.query(Job).count()
     assert remaining_jobs == 2
+
+def test_job_service_search_cursor(test_db_with_data):
+    """Test keyset pagination in JobService"""
+    service = JobService(test_db_with_data)
+    
+    filters = JobFilter()
+    first = service.search_jobs(filters, per_page=1)
+    assert first.next_cursor is not None
+    
+    second = service.search_jobs(filters, per_page=1, cursor=first.next_cursor)
+    assert second.total == 2
+    assert len(second.jobs) == 1
+    assert second.jobs[0].id != first.jobs[0].id
+    assert second.next_cursor is None
+
+def test_job_service_batch_processing_and_reanalysis(test_db_with_data):
+    """Test batch job processing and visa re-analysis backfill"""
+    service = JobService(test_db_with_data)
+    
+    jobs = service.process_scraped_jobs([
+        {'title': 'Backend Engineer', 'company_name': 'AI Corp', 'description': 'Visa sponsorship offered',
+         'source_website': 'test.com', 'source_url': 'https://test.com/job/10', 'source_job_id': '10'},
+        {'title': 'Duplicate Job', 'company_name': 'Tech Corp', 'description': 'Test description',
+         'source_website': 'test.com', 'source_url': 'https://test.com/job/1', 'source_job_id': '1'},
+    ])
+    assert jobs[0].visa_sponsorship is True
+    assert jobs[1].title == "Software Engineer"
+    
+    # Seeded flags disagree with the analyzer for the second seeded job
+    updated = service.reanalyze_visa_friendliness(batch_size=2)
+    assert updated >= 1
+    assert service.reanalyze_visa_friendliness() == 0
+
+def test_orchestrator_bulk_save(test_db_with_data):
+    """Test staged bulk insert of scraped jobs"""
+    from app.scrapers.orchestrator import JobScrapingOrchestrator
+    orchestrator = JobScrapingOrchestrator()
+    
+    jobs = [
+        {'title': 'Platform Engineer', 'company_name': 'Tech Corp', 'description': 'Visa sponsorship offered',
+         'source_website': 'greenhouse.io', 'source_url': 'https://boards.greenhouse.io/x/1'},
+        {'title': 'Platform Engineer', 'company_name': 'Tech Corp', 'description': 'Visa sponsorship offered',
+         'source_website': 'greenhouse.io', 'source_url': 'https://boards.greenhouse.io/x/1'},
+        {'title': 'Data Engineer', 'company_name': 'Brand New Co', 'description': 'Graduate role',
+         'source_website': 'greenhouse.io', 'source_url': 'https://boards.greenhouse.io/y/2'},
+        {'title': 'Software Engineer', 'company_name': 'Tech Corp', 'description': 'Repost',
+         'source_website': 'greenhouse.io', 'source_url': 'https://boards.greenhouse.io/x/3'},
+    ]
+    assert orchestrator._process_and_save_jobs(test_db_with_data, jobs, 'greenhouse') == 3
+    assert orchestrator._process_and_save_jobs(test_db_with_data, jobs, 'greenhouse') == 0
+    
+    job = test_db_with_data.query(Job).filter(Job.source_url == 'https://boards.greenhouse.io/x/1').one()
+    assert job.company.name == "Tech Corp"
+    assert job.visa_sponsorship is True
+    assert job.is_duplicate is False
+    # Repost of the seeded Software Engineer job under a new URL is kept but flagged
+    repost = test_db_with_data.query(Job).filter(Job.source_url == 'https://boards.greenhouse.io/x/3').one()
+    assert repost.is_duplicate is True
+    from app.models import JobSimhashBand
+    assert test_db_with_data.query(JobSimhashBand).filter(JobSimhashBand.job_id == repost.id).count() == 8
+    assert test_db_with_data.query(Company).filter(Company.name == "Brand New Co").count() == 1
+
+def test_async_ats_fetch_concurrent():
+    """Test concurrent ATS board fetching through the shared async fetcher"""
+    import asyncio
+    import httpx
+    from app.scrapers.ats_scraper import GreenhouseScraper, LeverScraper
+    from app.scrapers.async_fetcher import AsyncFetcher
+    
+    def handler(request):
+        if request.url.host == "boards-api.greenhouse.io":
+            token = request.url.path.split("/")[3]
+            return httpx.Response(200, json={"jobs": [
+                {"id": 1, "title": f"{token} engineer", "content": "Visa sponsorship",
+                 "absolute_url": f"https://boards.greenhouse.io/{token}/1", "location": {"name": "Sydney, NSW"}}
+            ]})
+        if request.url.path.endswith("/missing"):
+            return httpx.Response(404)
+        return httpx.Response(200, json=[{"id": "a", "text": "Lever role", "hostedUrl": "https://jobs.lever.co/x/a"}])
+    
+    async def run():
+        async with AsyncFetcher(rate_per_host=100, transport=httpx.MockTransport(handler)) as fetcher:
+            return await asyncio.gather(
+                GreenhouseScraper().scrape_jobs_async(fetcher, ["acme", "globex"]),
+                LeverScraper().scrape_jobs_async(fetcher, ["initech", "missing"]),
+            )
+    
+    greenhouse_jobs, lever_jobs = asyncio.run(run())
+    assert [j['title'] for j in greenhouse_jobs] == ["acme engineer", "globex engineer"]
+    assert greenhouse_jobs[0]['city'] == "Sydney"
+    assert [j['source_url'] for j in lever_jobs] == ["https://jobs.lever.co/x/a"]
+
+def test_ats_scraper_hooks_are_abstract():
+    """Test that a vendor scraper missing a board hook fails at instantiation"""
+    from app.scrapers.ats_scraper import ATSScraper
+    from app.scrapers.adzuna_scraper import AdzunaScraper
+    
+    class Incomplete(ATSScraper):
+        def board_url(self, company):
+            return f"https://example.com/{company}"
+        
+        def parse_job_details(self, job_element):
+            return {}
+    
+    with pytest.raises(TypeError):
+        Incomplete()
+    adzuna = AdzunaScraper("id", "key")
+    assert adzuna.board_url("graduate").startswith("https://api.adzuna.com/v1/api/jobs/au/search/1?")
+    assert adzuna._board_postings({"results": [{"id": 1}]}) == [{"id": 1}]
+
+def test_async_fetch_conditional_cache(tmp_path):
+    """Test ETag revalidation and cache-served 304 responses"""
+    import asyncio
+    import httpx
+    from app.scrapers.ats_scraper import GreenhouseScraper
+    from app.scrapers.async_fetcher import AsyncFetcher
+    from app.scrapers.http_cache import HTTPCache
+    
+    requests_seen = []
+    
+    def handler(request):
+        requests_seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"ETag": '"v1"'}, json={"jobs": [
+            {"id": 1, "title": "Engineer", "content": "", "absolute_url": "https://boards.greenhouse.io/acme/1"}
+        ]})
+    
+    cache = HTTPCache(str(tmp_path / "cache.sqlite3"))
+    scraper = GreenhouseScraper()
+    
+    async def run():
+        async with AsyncFetcher(rate_per_host=100, transport=httpx.MockTransport(handler), cache=cache) as fetcher:
+            first = await scraper.fetch_company_jobs(fetcher, "acme")
+            # Not cached until the caller has saved the board
+            unsaved = await scraper.fetch_company_jobs(fetcher, "acme")
+            fetcher.pending_cache_writes.commit(scraper.board_url("acme"))
+            second = await scraper.fetch_company_jobs(fetcher, "acme")
+            response = await fetcher.get(scraper.board_url("acme"))
+            return first, unsaved, second, response
+    
+    first, unsaved, second, response = asyncio.run(run())
+    assert len(first) == 1 and len(unsaved) == 1
+    assert second == []  # unchanged board is not re-parsed
+    assert response.from_cache and response.json()["jobs"][0]["id"] == 1
+    assert requests_seen == [None, None, '"v1"', '"v1"']
+    
+    # Revalidation does not extend an entry's life past the TTL
+    stored_at = cache.get(scraper.board_url("acme")).stored_at
+    cache.touch(scraper.board_url("acme"))
+    assert cache.get(scraper.board_url("acme")).stored_at == stored_at
+    
+    small = HTTPCache(str(tmp_path / "small.sqlite3"), max_bytes=1)
+    assert small.store("https://x/1", {"ETag": "a"}, b"x" * 10) is False
+    cache.clear()
+    assert cache.get(scraper.board_url("acme")) is None
+
+def test_orchestrator_board_deltas(test_db_with_data):
+    """Test incremental board processing: new, changed, unchanged and vanished jobs"""
+    from app.scrapers.orchestrator import JobScrapingOrchestrator
+    orchestrator = JobScrapingOrchestrator()
+    db = test_db_with_data
+    
+    def posting(n, description="Graduate role"):
+        return {'title': f'Role {n}', 'company_name': 'Acme', 'description': description,
+                'source_website': 'greenhouse.io', 'source_url': f'https://boards.greenhouse.io/acme/{n}'}
+    
+    assert orchestrator._process_board_deltas(db, 'greenhouse', {'acme': [posting(1), posting(2)], 'down': None}) == 2
+    # Unchanged board: nothing to do
+    assert orchestrator._process_board_deltas(db, 'greenhouse', {'acme': [posting(1), posting(2)]}) == 0
+    
+    # Job 1 changed, job 2 vanished, job 3 is new
+    changed = posting(1, "Now with visa sponsorship")
+    assert orchestrator._process_board_deltas(db, 'greenhouse', {'acme': [changed, posting(3)]}) == 2
+    
+    jobs = {job.source_url.rsplit('/', 1)[1]: job for job in db.query(Job).filter(Job.source_website == 'greenhouse.io')}
+    assert jobs['1'].visa_sponsorship is True
+    assert jobs['2'].is_active is False
+    assert jobs['3'].is_active is True
+    
+    # Vanished job returns to the board
+    orchestrator._process_board_deltas(db, 'greenhouse', {'acme': [changed, posting(2), posting(3)]})
+    db.refresh(jobs['2'])
+    assert jobs['2'].is_active is True
+
+def test_orchestrator_board_retry_after_failed_save(test_db_with_data, monkeypatch):
+    """Test that a board whose new jobs fail to save is retried on the next run"""
+    from app.models import BoardSnapshot
+    from app.scrapers import orchestrator as orchestrator_module
+    orchestrator = orchestrator_module.JobScrapingOrchestrator()
+    db = test_db_with_data
+    
+    def posting(board, n):
+        return {'title': f'{board} role {n}', 'company_name': board.title(), 'description': 'Graduate role',
+                'source_website': 'greenhouse.io', 'source_url': f'https://boards.greenhouse.io/{board}/{n}'}
+    
+    boards = {'acme': [posting('acme', 1)], 'globex': [posting('globex', 1)]}
+    original_save = orchestrator._save_job_batch
+    
+    def flaky_save(db, batch, source_type):
+        if any('/acme/' in job['source_url'] for job in batch):
+            raise RuntimeError("database unavailable")
+        return original_save(db, batch, source_type)
+    
+    monkeypatch.setattr(orchestrator_module, "SAVE_BATCH_SIZE", 1)
+    monkeypatch.setattr(orchestrator, "_save_job_batch", flaky_save)
+    saved_boards = []
+    assert orchestrator._process_board_deltas(db, 'greenhouse', boards, on_board_saved=saved_boards.append) == 1
+    assert saved_boards == ['globex']
+    assert {s.board for s in db.query(BoardSnapshot)} == {'globex'}
+    
+    # Next run: the failed board is new again, the saved one is unchanged
+    monkeypatch.undo()
+    saved_boards.clear()
+    assert orchestrator._process_board_deltas(db, 'greenhouse', boards, on_board_saved=saved_boards.append) == 1
+    assert sorted(saved_boards) == ['acme', 'globex']
+    assert db.query(Job).filter(Job.source_url == 'https://boards.greenhouse.io/acme/1').count() == 1
+
+def test_orchestrator_board_failure_is_isolated(test_db_with_data, monkeypatch):
+    """Test a board whose updates fail keeps its snapshot without stopping the others,
+    and that jobs without a source_url are not re-inserted on every change
+    """
+    from app.models import BoardSnapshot
+    from app.scrapers.orchestrator import JobScrapingOrchestrator
+    orchestrator = JobScrapingOrchestrator()
+    db = test_db_with_data
+    
+    def posting(board, n, description='Graduate role', source_url=True):
+        return {'title': f'{board} role {n}', 'company_name': board.title(), 'description': description,
+                'source_website': 'greenhouse.io',
+                'source_url': f'https://boards.greenhouse.io/{board}/{n}' if source_url else ''}
+    
+    orchestrator._process_board_deltas(db, 'greenhouse', {
+        'acme': [posting('acme', 1)], 'globex': [posting('globex', 1), posting('globex', 'x', source_url=False)],
+    })
+    fingerprints = {s.board: s.fingerprint for s in db.query(BoardSnapshot)}
+    
+    original_update = orchestrator._update_changed_jobs
+    
+    def failing_update(db, jobs):
+        if any('/acme/' in job['source_url'] for job in jobs):
+            raise RuntimeError("deadlock detected")
+        return original_update(db, jobs)
+    
+    monkeypatch.setattr(orchestrator, "_update_changed_jobs", failing_update)
+    changed = {
+        'acme': [posting('acme', 1, 'Now with visa sponsorship')],
+        'globex': [posting('globex', 1, 'Now with visa sponsorship'), posting('globex', 2),
+                   posting('globex', 'x', source_url=False)],
+    }
+    saved_boards = []
+    assert orchestrator._process_board_deltas(db, 'greenhouse', changed, on_board_saved=saved_boards.append) == 2
+    assert saved_boards == ['globex']
+    snapshots = {s.board: s.fingerprint for s in db.query(BoardSnapshot)}
+    assert snapshots['acme'] == fingerprints['acme']
+    assert snapshots['globex'] != fingerprints['globex']
+    assert db.query(Job).filter(Job.source_url == '').count() == 0
+    
+    # The failed board is retried on the next run
+    monkeypatch.undo()
+    saved_boards.clear()
+    assert orchestrator._process_board_deltas(db, 'greenhouse', changed, on_board_saved=saved_boards.append) == 1
+    assert sorted(saved_boards) == ['acme', 'globex']
+    acme = db.query(Job).filter(Job.source_url == 'https://boards.greenhouse.io/acme/1').one()
+    assert acme.description == 'Now with visa sponsorship'
+
+def test_candidate_index_top_k(test_db_with_data):
+    """Test inverted-index candidate ranking and re-indexing on profile updates"""
+    from app.auth_models import User, UserRole
+    from app.candidate_index import CandidateIndex, candidate_index
+    db = test_db_with_data
+    
+    def student(n, **fields):
+        return User(email=f"s{n}@uni.edu", username=f"s{n}", hashed_password="x", full_name=f"Student {n}",
+                    role=UserRole.STUDENT, **fields)
+    
+    db.add_all([
+        student(1, skills='["Python", "SQL"]', preferred_locations="Sydney"),
+        student(2, skills="python, react", work_authorization="student_visa"),
+        student(3, skills="java"),
+        User(email="e@corp.com", username="emp", hashed_password="x", full_name="Emp",
+             role=UserRole.EMPLOYER, skills="python"),
+    ])
+    db.commit()
+    
+    index = CandidateIndex()
+    ranked = index.top_candidates(db, limit=10, required_skills=["python"], location_tokens=["sydney"])
+    assert ranked == [(3.5, 1), (3.0, 2)]
+    
+    # Student-friendly jobs give everyone the flat bonus; the remainder fills by id
+    ranked = index.top_candidates(db, limit=3, visa_sponsorship=True, student_friendly=True)
+    assert ranked == [(1.0, 2), (0.5, 1), (0.5, 3)]
+    
+    # Profile changes are picked up by the shared index without a rebuild
+    candidate_index.top_candidates(db, limit=1)
+    user = db.query(User).filter(User.username == "s3").one()
+    user.skills = "python"
+    db.flush()
+    assert [uid for _, uid in candidate_index.top_candidates(db, limit=5, required_skills=["python"])] == [1, 2]
+    db.commit()
+    assert [uid for _, uid in candidate_index.top_candidates(db, limit=5, required_skills=["python"])] == [1, 2, 3]
+    
+    # Edits that are rolled back never reach the index
+    user = db.query(User).filter(User.username == "s1").one()
+    user.skills = "cobol"
+    db.flush()
+    db.rollback()
+    assert [uid for _, uid in candidate_index.top_candidates(db, limit=5, required_skills=["python"])] == [1, 2, 3]
+    assert candidate_index.top_candidates(db, limit=5, required_skills=["cobol"]) == []
+
+def test_recommendation_engine_matches_reference(test_db_with_data):
+    """Test vectorized job scoring against the per-job reference scorer"""
+    from types import SimpleNamespace
+    from app.api import calculate_job_match_score
+    from app.recommendations import JobFeatureMatrix, RecommendationEngine
+    db = test_db_with_data
+    
+    db.add_all([
+        Job(title=f"Job {n}", source_website="test.com", source_url=f"https://test.com/job/r{n}",
+            visa_sponsorship=n % 2 == 0, international_student_friendly=n % 3 == 0,
+            required_skills="python, sql" if n % 4 == 0 else "java")
+        for n in range(12)
+    ])
+    db.commit()
+    
+    user = SimpleNamespace(visa_status="student_visa", work_authorization="requires_sponsorship", skills="Python")
+    engine = RecommendationEngine()
+    top = engine.recommend(db, user, 5, ["test.com"])
+    
+    jobs = db.query(Job).filter(Job.is_active == True).order_by(Job.id).all()
+    expected = sorted(jobs, key=lambda j: calculate_job_match_score(user, j), reverse=True)[:5]
+    assert [j.id for j in top] == [j.id for j in expected]
+    
+    matrix = JobFeatureMatrix.from_rows([])
+    assert matrix.top_k(user, 5) == []
+
+def test_recommendation_matrix_invalidated_on_commit(test_db_with_data):
+    """Test the shared matrix drops after committed ORM and Core job writes, not before,
+    and leaves out duplicates
+    """
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert
+    from app.job_archive import archive_expired_jobs
+    from app.recommendations import recommendation_engine
+    db = test_db_with_data
+    
+    def matrix_ids():
+        return recommendation_engine.matrix(db, ["test.com"]).ids.tolist()
+    
+    recommendation_engine.invalidate()
+    assert matrix_ids() == [1, 2]
+    
+    # ORM changes count once committed; rolled back ones never do
+    db.add(Job(title="Repost", source_website="test.com", source_url="https://test.com/dup", is_duplicate=True))
+    db.add(Job(title="Fresh", source_website="test.com", source_url="https://test.com/fresh"))
+    db.flush()
+    assert recommendation_engine._matrix is not None
+    db.commit()
+    assert recommendation_engine._matrix is None
+    fresh_ids = matrix_ids()
+    assert len(fresh_ids) == 3  # the flagged repost is left out
+    db.add(Job(title="Abandoned", source_website="test.com", source_url="https://test.com/abandoned"))
+    db.flush()
+    db.rollback()
+    assert recommendation_engine._matrix is not None
+    
+    # Core inserts, like the scraper's ON CONFLICT DO NOTHING path, are picked up too
+    db.execute(insert(Job.__table__), [{'title': "Bulk", 'source_website': "test.com",
+                                        'source_url': "https://test.com/bulk", 'is_active': True}])
+    assert recommendation_engine._matrix is not None
+    db.commit()
+    assert len(matrix_ids()) == 4
+    
+    # Archived jobs drop out without waiting for the TTL
+    db.query(Job).filter(Job.source_url == "https://test.com/bulk").update(
+        {Job.expires_at: datetime.utcnow() - timedelta(days=1)})
+    db.commit()
+    assert len(matrix_ids()) == 4
+    assert archive_expired_jobs(db, pause=0)['archived'] == 1
+    assert matrix_ids() == fresh_ids
+
+def test_principal_cache_get_current_user(test_db_with_data):
+    """Test cached principals skip the DB and are dropped on logout and profile updates"""
+    from sqlalchemy import event
+    from fastapi.security import HTTPAuthorizationCredentials
+    from starlette.requests import Request
+    from app.auth import AuthService, get_current_user
+    from app.auth_models import User, UserRole
+    from app.principal_cache import principal_cache
+    from app.session_service import SessionService
+    db = test_db_with_data
+    
+    user = User(email="s@uni.edu", username="s", hashed_password="x", full_name="Student",
+                role=UserRole.STUDENT)
+    db.add(user)
+    db.commit()
+    request = Request({"type": "http", "headers": [], "client": ("127.0.0.1", 1)})
+    auth_service = AuthService(db)
+    session = SessionService(db).create_session(user, request)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=auth_service.create_access_token(user))
+    
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    engine = db.get_bind()
+    
+    principal_cache.clear()
+    assert get_current_user(request, credentials, db).id == user.id
+    assert len(principal_cache) == 1
+    
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        db.expunge_all()
+        cached_user = get_current_user(request, credentials, db)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert statements == []
+    assert cached_user.full_name == "Student"
+    
+    # Changes to the cached instance are persisted and evict the entry
+    cached_user.full_name = "Renamed"
+    db.commit()
+    assert len(principal_cache) == 0
+    assert get_current_user(request, credentials, db).full_name == "Renamed"
+    
+    # Logout evicts it as well
+    assert auth_service.logout_user(session.session_token)
+    assert len(principal_cache) == 0
+
+def test_session_touch_write_behind(test_db_with_data):
+    """Test session validations are buffered and flushed in one batch"""
+    from datetime import datetime, timedelta
+    from starlette.requests import Request
+    from app.auth_models import User, UserRole, UserSession
+    from app.session_activity import session_activity
+    from app.session_service import SessionService
+    db = test_db_with_data
+    
+    user = User(email="s@uni.edu", username="s", hashed_password="x", full_name="Student",
+                role=UserRole.STUDENT)
+    db.add(user)
+    db.commit()
+    request = Request({"type": "http", "headers": [], "client": ("127.0.0.1", 1)})
+    service = SessionService(db)
+    sessions = [service.create_session(user, request) for _ in range(6)]
+    
+    # Login keeps at most max_sessions_per_user active sessions
+    assert len(service.get_user_sessions(user.id)) == service.max_sessions_per_user
+    assert not db.get(UserSession, sessions[0].id).is_active
+    
+    # Make the newest session nearly expired in the database, then validate it
+    session = sessions[-1]
+    db.query(UserSession).filter(UserSession.id == session.id).update(
+        {"expires_at": datetime.utcnow() + timedelta(seconds=5)})
+    db.commit()
+    assert service.validate_session(session.session_token, request) is not None
+    assert service.validate_session(session.session_token, request) is not None
+    pending = session_activity.pending_expiry(session.id)
+    assert pending > datetime.utcnow() + timedelta(minutes=29)
+    
+    db.expire_all()
+    assert db.get(UserSession, session.id).expires_at < pending
+    assert session_activity.flush(db) == 1
+    db.expire_all()
+    assert db.get(UserSession, session.id).expires_at == pending
+    assert session_activity.pending_expiry(session.id) is None
+    
+    # Unflushed touches count as activity when listing and checking sessions
+    active = [s.id for s in sessions[1:]]
+    db.query(UserSession).filter(UserSession.id.in_(active)).update(
+        {"expires_at": datetime.utcnow() - timedelta(seconds=1)}, synchronize_session=False)
+    db.commit()
+    assert not service.has_active_session(user.id)
+    service.refresh_session(db.get(UserSession, session.id))
+    assert service.has_active_session(user.id)
+    assert [s.id for s in service.get_user_sessions(user.id)] == [session.id]
+    
+    # Logging out drops the pending touch, and a touch never revives an invalidated session
+    service.invalidate_session(session.session_token)
+    assert session_activity.pending_expiry(session.id) is None
+    session_activity.touch(session.id, datetime.utcnow() + timedelta(minutes=30))
+    assert session_activity.flush(db) == 1
+    db.expire_all()
+    assert db.get(UserSession, session.id).expires_at < datetime.utcnow()
+    assert not service.has_active_session(user.id)
+
+def test_job_stats_incremental(test_db_with_data):
+    """Test the materialized job stats follow inserts, updates, deletes and bulk statements"""
+    from app.job_stats import job_stats
+    from app.services import ALLOWED_SOURCES
+    db = test_db_with_data
+    
+    def matches_reconcile(stats):
+        job_stats.invalidate()
+        fresh = job_stats.snapshot(db, ALLOWED_SOURCES)
+        assert stats.pop('avg_visa_confidence') == pytest.approx(fresh.pop('avg_visa_confidence'))
+        return stats == fresh
+    
+    before = job_stats.snapshot(db, ALLOWED_SOURCES)
+    assert matches_reconcile(dict(before))
+    assert before['total_jobs'] == 2
+    
+    job = Job(title="Grad", company_id=1, state="Victoria", employment_type="full-time",
+              visa_sponsorship=True, visa_sponsorship_confidence=0.6, international_student_friendly=True,
+              source_website="test.com", source_url="https://test.com/job/3")
+    db.add(job)
+    db.commit()
+    assert job_stats.snapshot(db, ALLOWED_SOURCES)['total_jobs'] == 3
+    
+    job.state = "Queensland"
+    db.get(Job, 1).is_active = False
+    db.commit()
+    incremental = job_stats.snapshot(db, ALLOWED_SOURCES)
+    assert incremental['total_jobs'] == 2
+    assert incremental['jobs_by_state'].get("Queensland") == 1
+    assert matches_reconcile(incremental)
+    
+    # Rolled-back changes are not applied
+    job.is_active = False
+    db.flush()
+    db.rollback()
+    assert job_stats.snapshot(db, ALLOWED_SOURCES)['total_jobs'] == 2
+    
+    db.delete(db.get(Job, job.id))
+    db.commit()
+    assert matches_reconcile(job_stats.snapshot(db, ALLOWED_SOURCES))
+    
+    # Bulk statements force a reconcile on the next read
+    db.query(Job).update({Job.is_active: True}, synchronize_session=False)
+    db.commit()
+    assert job_stats.snapshot(db, ALLOWED_SOURCES)['total_jobs'] == 2
+
+def test_employer_job_analytics_grouped(test_db_with_data):
+    """Test job analytics are aggregated across all jobs in a fixed number of queries"""
+    from datetime import datetime, timedelta
+    from sqlalchemy import event
+    from app.job_analytics import collect_job_analytics
+    from app.auth_models import User, UserRole, JobView, JobApplication, JobFavorite
+    db = test_db_with_data
+    
+    employer = User(email="e@corp.com", username="emp", hashed_password="x", full_name="Emp",
+                    role=UserRole.EMPLOYER)
+    student = User(email="s@uni.edu", username="s", hashed_password="x", full_name="Student",
+                   role=UserRole.STUDENT)
+    db.add_all([employer, student])
+    db.commit()
+    db.add_all([
+        JobView(job_id=1, user_id=student.id, referrer="search"),
+        JobView(job_id=1, user_id=student.id, referrer="search"),
+        JobView(job_id=1, user_id=employer.id),
+        JobView(job_id=1, user_id=None, referrer="email"),
+        JobView(job_id=1, user_id=None, viewed_at=datetime.utcnow() - timedelta(days=60)),
+        JobApplication(job_id=1, user_id=student.id),
+        JobFavorite(job_id=1, user_id=student.id),
+        JobFavorite(job_id=2, user_id=student.id),
+    ])
+    db.commit()
+    
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        analytics = collect_job_analytics(db, [1, 2])
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    
+    first = analytics[1]
+    assert [first[k] for k in ('total_views', 'unique_views', 'student_views', 'anonymous_views')] == [5, 2, 2, 2]
+    assert first['views_by_referrer'] == {"search": 2, "direct": 2, "email": 1}
+    assert sum(first['views_by_date'].values()) == 4
+    assert (first['applications_count'], first['favorites_count']) == (1, 1)
+    second = analytics[2]
+    assert (second['total_views'], second['applications_count'], second['favorites_count']) == (0, 0, 1)
+    assert second['views_by_referrer'] == {}
+    assert len(statements) == 7
+    
+    # Compaction rolls everything into daily buckets, prunes old raw views, and reads agree
+    from app.job_analytics import compact_job_views
+    result = compact_job_views(db, lag_minutes=0, retention_days=30)
+    assert (result['rolled_up'], result['viewers'], result['pruned']) == (5, 2, 1)
+    assert db.query(JobView).count() == 4
+    assert collect_job_analytics(db, [1, 2]) == analytics
+    
+    # New views after the watermark are merged in from the live tail
+    db.add(JobView(job_id=1, user_id=student.id, referrer="email"))
+    db.commit()
+    merged = collect_job_analytics(db, [1, 2])[1]
+    assert [merged[k] for k in ('total_views', 'unique_views', 'student_views')] == [6, 2, 3]
+    assert merged['views_by_referrer'] == {"search": 2, "direct": 2, "email": 2}
+    assert sum(merged['views_by_date'].values()) == 5
+    assert compact_job_views(db, lag_minutes=0)['rolled_up'] == 1
+    assert collect_job_analytics(db, [1, 2])[1] == merged
+
+def test_application_listings_batched(test_db_with_data, monkeypatch):
+    """Test application listings load a page in one query and sign its resumes in one storage call"""
+    import sys
+    import types
+    from sqlalchemy import event
+    from app.auth_models import User, UserRole, JobApplication
+    try:
+        import supabase  # noqa: F401
+    except ImportError:
+        stub = types.ModuleType("supabase")
+        stub.Client = object
+        stub.create_client = lambda *args, **kwargs: None
+        monkeypatch.setitem(sys.modules, "supabase", stub)
+    from app import supabase_utils
+    from app.auth_api import list_student_applications, list_employer_applications
+    db = test_db_with_data
+    
+    signed = []
+    
+    class Bucket:
+        def create_signed_urls(self, paths, ttl):
+            signed.append(list(paths))
+            return [{'path': path, 'signedURL': f"https://signed/{path}", 'error': None} for path in paths]
+    
+    client = types.SimpleNamespace(storage=types.SimpleNamespace(from_=lambda bucket: Bucket()))
+    monkeypatch.setattr(supabase_utils, "supabase_configured", lambda: True)
+    monkeypatch.setattr(supabase_utils, "_storage_private", lambda: True)
+    monkeypatch.setattr(supabase_utils, "get_supabase_client", lambda: client)
+    supabase_utils.signed_url_cache.clear()
+    
+    employer = User(email="e@corp.com", username="emp", hashed_password="x", full_name="Emp",
+                    role=UserRole.EMPLOYER, company_name="Tech Corp")
+    students = [
+        User(email=f"s{n}@uni.edu", username=f"s{n}", hashed_password="x", full_name=f"Student {n}",
+             role=UserRole.STUDENT, university="UNSW", resume_url=f"/master/resumes/profile_{n}.pdf")
+        for n in range(3)
+    ]
+    db.add_all([employer] + students)
+    db.commit()
+    db.query(Job).update({Job.posted_by_user_id: employer.id})
+    db.add_all([
+        JobApplication(job_id=1, user_id=students[0].id, resume_url="/master/resumes/app_0.pdf"),
+        JobApplication(job_id=2, user_id=students[0].id, resume_url=None),
+        JobApplication(job_id=1, user_id=students[1].id, resume_url="https://cdn.example.com/cv.pdf"),
+        JobApplication(job_id=2, user_id=students[2].id, resume_url="/master/resumes/app_2.pdf"),
+    ])
+    db.commit()
+    db.refresh(employer)
+    db.refresh(students[0])
+    
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        mine = list_student_applications(limit=None, offset=0, current_user=students[0], db=db)
+        student_statements, student_signed = len(statements), list(signed)
+        page = list_employer_applications(limit=2, offset=1, current_user=employer, db=db)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    
+    assert [(a.job_id, a.resume_url) for a in mine] == [(1, "https://signed/resumes/app_0.pdf"), (2, None)]
+    assert mine[0].job["title"] == "Software Engineer"
+    assert mine[0].job["company"]["name"] == "Tech Corp"
+    assert student_statements == 1
+    assert student_signed == [["resumes/app_0.pdf"]]
+    
+    assert [(a.job_id, a.user["full_name"]) for a in page] == [(2, "Student 0"), (1, "Student 1")]
+    assert page[0].resume_url is None
+    assert page[0].user["resume_url"] == "https://signed/resumes/profile_0.pdf"
+    assert page[1].resume_url == "https://cdn.example.com/cv.pdf"
+    assert page[1].user["resume_url"] == "https://signed/resumes/profile_1.pdf"
+    assert page[1].user["university"] == "UNSW"
+    assert page[1].job["company"]["name"] == "Tech Corp"
+    assert len(statements) - student_statements == 1
+    assert signed[1:] == [["resumes/profile_0.pdf", "resumes/profile_1.pdf"]]
+
+def test_job_view_compaction_is_batched(test_db_with_data):
+    """Test a first compaction over a raw-view backlog commits per time window and prune batch"""
+    from datetime import datetime, timedelta
+    from sqlalchemy import event
+    from app.auth_models import JobView
+    from app.job_analytics import collect_job_analytics, compact_job_views, rollup_watermark
+    db = test_db_with_data
+    
+    now = datetime.utcnow()
+    db.add_all([
+        JobView(job_id=1 + n % 2, user_id=None, referrer="search", viewed_at=now - timedelta(days=40 - n, hours=n))
+        for n in range(8)
+    ] + [JobView(job_id=1, user_id=None, viewed_at=now - timedelta(hours=2))])
+    db.commit()
+    before = collect_job_analytics(db, [1, 2])
+    
+    commits = []
+    listener = lambda session: commits.append(session)
+    event.listen(db, "after_commit", listener)
+    try:
+        result = compact_job_views(db, lag_minutes=0, retention_days=30, window_hours=72, prune_batch_size=3)
+    finally:
+        event.remove(db, "after_commit", listener)
+    
+    assert (result['rolled_up'], result['pruned']) == (9, 8)
+    # Initial watermark, one commit per 3-day window over the 40-day backlog, then 3 prune batches
+    assert len(commits) == 1 + 14 + 3
+    assert rollup_watermark(db) >= now
+    assert db.query(JobView).count() == 1
+    assert collect_job_analytics(db, [1, 2]) == before
+
+def test_job_view_buffer_bulk_flush(test_db_with_data):
+    """Test queued job views are written in bulk and overflow is only counted"""
+    from app.auth_models import JobView
+    from app.view_ingest import JobViewBuffer
+    db = test_db_with_data
+    
+    buffer = JobViewBuffer(max_queue=5, flush_rows=2)
+    assert all(buffer.submit(job_id=1, referrer="search") for _ in range(3))
+    assert buffer.submit(job_id=2)
+    assert buffer.submit(job_id=999)
+    assert not buffer.submit(job_id=1)
+    assert db.query(JobView).count() == 0
+    
+    assert buffer.flush(db) == 4
+    assert db.query(JobView).filter(JobView.job_id == 1, JobView.referrer == "search").count() == 3
+    assert db.query(JobView).filter(JobView.job_id == 2).count() == 1
+    stats = buffer.stats()
+    assert (stats['written'], stats['unknown_job'], stats['dropped'], stats['queued']) == (4, 1, 1, 0)
+    assert buffer.overflow == {1: 1}
+
+def test_job_view_buffer_retries_failed_batches(test_db_with_data, monkeypatch):
+    """Test a failed batch is kept and retried, and counted once it exhausts its attempts"""
+    import sys
+    import types
+    from fastapi import HTTPException
+    from app.auth_models import JobView
+    from app.view_ingest import JobViewBuffer
+    db = test_db_with_data
+    
+    buffer = JobViewBuffer(flush_rows=2, max_attempts=2)
+    for _ in range(3):
+        buffer.submit(job_id=1)
+    
+    def failing_execute(*args, **kwargs):
+        raise RuntimeError("database is locked")
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(db, "execute", failing_execute)
+        assert buffer.flush(db) == 0
+    assert len(buffer) == 3
+    assert buffer.stats()['retrying'] == 2
+    
+    # The failed batch goes first on the next flush
+    assert buffer.flush(db) == 3
+    assert db.query(JobView).count() == 3
+    assert (buffer.counters['retried'], buffer.counters['failed'], len(buffer)) == (2, 0, 0)
+    
+    # Out of attempts: the batch is dropped and counted
+    buffer.submit(job_id=1)
+    with monkeypatch.context() as patch:
+        patch.setattr(db, "execute", failing_execute)
+        assert buffer.flush(db) == 0
+        assert buffer.flush(db) == 0
+    assert (buffer.counters['failed'], len(buffer)) == (1, 0)
+    
+    # Views of unknown jobs are rejected up front
+    try:
+        import supabase  # noqa: F401
+    except ImportError:
+        stub = types.ModuleType("supabase")
+        stub.Client = object
+        stub.create_client = lambda *args, **kwargs: None
+        monkeypatch.setitem(sys.modules, "supabase", stub)
+    from app.auth_api import track_job_view
+    from app.auth_schemas import JobViewCreate
+    user = types.SimpleNamespace(id=None)
+    with pytest.raises(HTTPException) as missing:
+        track_job_view(job_id=999, view_data=JobViewCreate(job_id=999), current_user=user, db=db)
+    assert missing.value.status_code == 404
+
+def test_sponsor_name_index_matches_scan(tmp_path):
+    """Test indexed sponsor fuzzy and substring lookups against a full scan"""
+    from difflib import SequenceMatcher
+    from app.accredited_sponsors import AccreditedSponsorManager
+    
+    csv_path = tmp_path / "accredited_sponsors.csv"
+    csv_path.write_text(
+        "company_name,abn,status\n"
+        "Atlassian Pty Ltd,1,active\n"
+        "Canva Pty Ltd,2,active\n"
+        "Canvas Group,3,active\n"
+        "Commonwealth Bank of Australia,4,active\n"
+        "Woolworths Limited,5,active\n"
+        "Xero Australia,6,active\n"
+    )
+    manager = AccreditedSponsorManager(data_dir=str(tmp_path))
+    assert manager.load_sponsors_from_csv()
+    
+    for query in ["Atlasian", "Canva Australia", "Commonwealth Bnk", "Woolworth", "xer"]:
+        normalized = manager.normalize_company_name(query)
+        expected = sorted(
+            (r, name) for name in manager.sponsors_set
+            if (r := SequenceMatcher(None, normalized, name).ratio()) >= 0.7
+        )
+        found = manager.find_similar_sponsors(query, threshold=0.7)
+        assert [(m['similarity'], m['sponsor_name']) for m in found] == sorted(expected, key=lambda m: -m[0])
+    
+    assert manager.find_similar_sponsors("Canva", threshold=0.7, limit=1)[0]['sponsor_name'] == "canva"
+    assert [r['sponsor_name'] for r in manager.search_sponsors("canv")] == ["canva", "canvas"]
+    assert [r['sponsor_name'] for r in manager.search_sponsors("er")] == ["xero"]
+    assert manager.search_sponsors("zzz") == []
+
+def test_sponsor_snapshot_reused_until_csv_changes(tmp_path, monkeypatch):
+    """Test vectorized sponsor loading and the CSV-hash keyed snapshot"""
+    import pandas as pd
+    from app import accredited_sponsors
+    from app.accredited_sponsors import AccreditedSponsorManager
+    
+    csv_path = tmp_path / "accredited_sponsors.csv"
+    csv_path.write_text("company_name,abn\nAcme Pty Ltd,1\n\"Foo-Bar Group, Australia\",2\n,3\n")
+    manager = AccreditedSponsorManager(data_dir=str(tmp_path))
+    assert manager.load_sponsors_from_csv()
+    names = ["Acme Pty Ltd", "Foo-Bar Group, Australia"]
+    assert list(manager.sponsors_data) == [manager.normalize_company_name(n) for n in names]
+    assert manager.normalize_company_names(pd.Series(names)).tolist() == list(manager.sponsors_data)
+    snapshot_path = tmp_path / "accredited_sponsors.snapshot.npz"
+    assert snapshot_path.exists()
+    
+    def no_parse(*args, **kwargs):
+        raise AssertionError("CSV parsed despite an up-to-date snapshot")
+    monkeypatch.setattr(accredited_sponsors.pd, "read_csv", no_parse)
+    cached = AccreditedSponsorManager(data_dir=str(tmp_path))
+    assert cached.load_sponsors_from_csv()
+    assert cached.sponsors_data == manager.sponsors_data
+    assert cached.find_similar_sponsors("Acme")[0]['data']['abn'] == 1
+    assert cached.name_index.postings == manager.name_index.postings
+    assert list(cached.name_index.gram_counts) == list(manager.name_index.gram_counts)
+    
+    # A file at the snapshot path is never unpickled; anything unreadable means a re-parse
+    import pickle
+    snapshot_path.write_bytes(pickle.dumps({'version': accredited_sponsors.SNAPSHOT_VERSION}))
+    assert AccreditedSponsorManager(data_dir=str(tmp_path))._read_snapshot(
+        csv_path, AccreditedSponsorManager._file_digest(csv_path)) is None
+    
+    monkeypatch.undo()
+    csv_path.write_text("company_name,abn\nGlobex Limited,7\n")
+    fresh = AccreditedSponsorManager(data_dir=str(tmp_path))
+    assert fresh.load_sponsors_from_csv()
+    assert fresh.sponsors_set == {"globex"}
+
+def test_company_cache_resolution(test_db_with_data, monkeypatch):
+    """Test companies resolve by normalized name through the shared cache, once per name"""
+    from sqlalchemy import event
+    from app.company_cache import company_cache
+    from app.scrapers import orchestrator as orchestrator_module
+    db = test_db_with_data
+    
+    checks = []
+    monkeypatch.setattr(orchestrator_module, "check_company_sponsor_status", lambda name: checks.append(name) or {
+        'is_accredited_sponsor': True, 'sponsor_info': None, 'similar_sponsors': [], 'confidence': 0.95})
+    orchestrator = orchestrator_module.JobScrapingOrchestrator()
+    
+    def posting(n, company):
+        return {'title': f'Role {n}', 'company_name': company, 'description': 'Graduate role',
+                'source_website': 'greenhouse.io', 'source_url': f'https://boards.greenhouse.io/c/{n}'}
+    
+    assert orchestrator._process_and_save_jobs(db, [posting(n, "Globex") for n in range(3)], 'greenhouse') == 3
+    assert checks == ["Globex"]
+    globex = db.query(Company).filter(Company.normalized_name == "globex").one()
+    assert globex.is_accredited_sponsor is True and globex.ats_type == 'greenhouse'
+    
+    # Later runs resolve known names (any case/spacing) without touching companies
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        assert orchestrator._process_and_save_jobs(db, [posting(3, "  GLOBEX "), posting(4, "Globex")], 'greenhouse') == 2
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert checks == ["Globex"]
+    assert not [s for s in statements if "FROM companies" in s]
+    assert {job.company_id for job in db.query(Job).filter(Job.source_website == 'greenhouse.io')} == {globex.id}
+    
+    # Companies from a rolled-back transaction are never cached
+    company = Company(name="Initech")
+    db.add(company)
+    db.flush()
+    company_cache.stage(db, company)
+    db.rollback()
+    service = JobService(db)
+    assert service.create_or_get_company("initech").name == "initech"
+    assert service.create_or_get_company("Tech  Corp").id == 1
+
+def test_job_near_duplicate_detection(test_db_with_data):
+    """Test fingerprint-based near-duplicate flagging for reworded reposts"""
+    from app.job_dedup import find_duplicates, hamming, job_fingerprint, simhash
+    db = test_db_with_data
+    service = JobService(db)
+    
+    description = ("Join our platform team building data pipelines in Python and SQL. You will design services, "
+                   "review code, mentor graduates and work closely with product managers across Sydney and Melbourne. "
+                   "We offer flexible hours, a learning budget and visa sponsorship for the right candidate.")
+    assert hamming(simhash(description), simhash(description.replace("flexible hours", "flexible  hours!"))) == 0
+    
+    original = service.process_scraped_job({
+        'title': 'Backend Engineer', 'company_name': 'Tech Corp', 'description': description,
+        'source_website': 'test.com', 'source_url': 'https://test.com/job/10'})
+    assert original.is_duplicate is False and original.dedup_key is not None
+    
+    # Same title, different URL: flagged
+    same_title = service.process_scraped_job({
+        'title': 'backend engineer!', 'company_name': 'Tech Corp', 'description': 'Short blurb',
+        'source_website': 'test.com', 'source_url': 'https://test.com/job/11'})
+    assert same_title.is_duplicate is True
+    
+    # Reworded title, near-identical description: flagged via the SimHash bands
+    reworded = description.replace("flexible hours", "flexible working hours")
+    fingerprint = job_fingerprint(original.company_id, 'Backend Software Engineer', reworded)
+    assert fingerprint.dedup_key != original.dedup_key
+    assert find_duplicates(db, [fingerprint]) == {0: original.id}
+    repost = service.process_scraped_job({
+        'title': 'Backend Software Engineer', 'company_name': 'Tech Corp', 'description': reworded,
+        'source_website': 'test.com', 'source_url': 'https://test.com/job/13'})
+    assert repost.is_duplicate is True
+    
+    # Different company or different text: not a duplicate
+    other = service.process_scraped_job({
+        'title': 'Backend Engineer', 'company_name': 'Finance Corp', 'description': description,
+        'source_website': 'test.com', 'source_url': 'https://test.com/job/12'})
+    assert other.is_duplicate is False
+    unrelated = job_fingerprint(original.company_id, 'Barista', 'Make coffee and serve customers at our Bondi cafe on weekends.')
+    assert find_duplicates(db, [unrelated]) == {}
+    
+    # Repeats within one batch point at nothing stored
+    assert find_duplicates(db, [unrelated, unrelated]) == {1: None}
+    
+    # Duplicates stay out of search results
+    results = service.search_jobs(JobFilter(title="backend"))
+    assert {job.id for job in results.jobs} == {original.id, other.id}
+
+def test_archive_expired_jobs(test_db_with_data):
+    """Test batched archival of expired jobs and their dependents"""
+    from datetime import datetime, timedelta
+    from app.auth_models import User, UserRole, JobView, JobApplication, JobFavorite
+    from app.job_archive import archive_expired_jobs
+    from app.models import ArchivedJob, JobSimhashBand
+    from sqlalchemy import event
+    db = test_db_with_data
+    
+    now = datetime.utcnow()
+    old = now - timedelta(days=40)
+    student = User(email="s@uni.edu", username="s", hashed_password="x", full_name="Student",
+                   role=UserRole.STUDENT)
+    db.add(student)
+    description = "Join our data team building Python pipelines for customer analytics in {}."
+    jobs = [
+        Job(title=f"Old {n}", company_id=1, source_website="test.com", source_url=f"https://test.com/old/{n}",
+            description=description.format(f"office {n}"), scraped_at=old)
+        for n in range(5)
+    ] + [
+        Job(title="Expired", company_id=2, source_website="test.com", source_url="https://test.com/expired",
+            description=description.format("Sydney"), expires_at=now - timedelta(days=1)),
+        Job(title="Old but open", company_id=2, source_website="test.com", source_url="https://test.com/open",
+            description=description.format("Perth"), scraped_at=old, expires_at=now + timedelta(days=10)),
+        Job(title="Old with applicants", company_id=2, source_website="test.com", source_url="https://test.com/applied",
+            description=description.format("Hobart"), scraped_at=old),
+    ]
+    db.add_all(jobs)
+    db.commit()
+    expired_id, applied = jobs[5].id, jobs[7]
+    open_id = jobs[6].id
+    assert db.query(JobSimhashBand).filter(JobSimhashBand.job_id == expired_id).count() > 0
+    db.add_all([
+        JobFavorite(job_id=jobs[0].id, user_id=student.id),
+        JobView(job_id=jobs[0].id, user_id=None),
+        JobApplication(job_id=applied.id, user_id=student.id),
+    ])
+    db.commit()
+    
+    result = archive_expired_jobs(db, days=30, batch_size=2, pause=0)
+    assert result == {'archived': 6, 'deactivated': 1}
+    
+    remaining = {job.title: job for job in db.query(Job)}
+    assert set(remaining) == {"Software Engineer", "Graduate Analyst", "Old but open", "Old with applicants"}
+    assert remaining["Old with applicants"].is_active is False
+    assert db.query(JobFavorite).count() == 0 and db.query(JobView).count() == 0
+    assert db.query(JobApplication).count() == 1
+    assert db.query(JobSimhashBand).filter(JobSimhashBand.job_id == expired_id).count() == 0
+    assert db.query(JobSimhashBand).filter(JobSimhashBand.job_id == open_id).count() > 0
+    
+    archived = db.query(ArchivedJob).filter(ArchivedJob.job_id == expired_id).one()
+    assert archived.title == "Expired" and archived.data['source_url'] == "https://test.com/expired"
+    assert db.query(ArchivedJob).count() == 6
+    
+    # Nothing left to do on a second run: the kept job is not selected again
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        assert archive_expired_jobs(db, days=30, pause=0) == {'archived': 0, 'deactivated': 0}
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert len(statements) == 2
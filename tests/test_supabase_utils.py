@@ -0,0 +1,255 @@
+import asyncio
+import io
+import sys
+import tempfile
+import types
+
+import pytest
+from fastapi import UploadFile
+
+
+@pytest.fixture
+def supabase_utils(monkeypatch):
+    """app.supabase_utils, importable without the supabase package (a stub stands in)"""
+    try:
+        import supabase  # noqa: F401
+    except ImportError:
+        stub = types.ModuleType("supabase")
+        stub.Client = object
+        stub.create_client = lambda *args, **kwargs: None
+        monkeypatch.setitem(sys.modules, "supabase", stub)
+    from app import supabase_utils
+    supabase_utils.signed_url_cache.clear()
+    return supabase_utils
+
+
+class CountingReads:
+    """File wrapper recording how many bytes were read through it"""
+
+    def __init__(self, f):
+        self._f = f
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self._f.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+def make_upload(content: bytes, spool_size: int = 1024) -> UploadFile:
+    spooled = tempfile.SpooledTemporaryFile(max_size=spool_size)
+    spooled.write(content)
+    spooled.seek(0)
+    return UploadFile(file=CountingReads(spooled), filename="resume.pdf")
+
+
+def test_stage_upload_rejects_oversized_files(supabase_utils):
+    """Test the size limit is enforced without reading the upload, and the file is released"""
+    upload = make_upload(b"x" * 50000)
+    with pytest.raises(supabase_utils.UploadTooLarge):
+        asyncio.run(supabase_utils.stage_upload(upload, max_bytes=4096))
+    assert upload.file.bytes_read <= 4096
+    assert upload.file.closed
+
+    # Exactly at the limit is fine
+    staged = asyncio.run(supabase_utils.stage_upload(make_upload(b"x" * 4096), max_bytes=4096))
+    assert staged.size == 4096
+
+
+class Storage3Bucket:
+    """Mirrors storage3 0.6 SyncBucketProxy.upload: bytes, BufferedReader and FileIO
+    are sent as is, anything else is treated as a path and opened
+    """
+
+    def __init__(self):
+        self.uploaded = {}
+
+    def upload(self, path, file, file_options=None):
+        if isinstance(file, (io.BufferedReader, bytes, io.FileIO)):
+            body = file
+        else:
+            body = open(file, "rb")
+        self.uploaded[path] = (body if isinstance(body, bytes) else body.read(), file_options)
+
+
+def test_stage_upload_streams_the_spooled_file(supabase_utils):
+    """Test head/size capture, streaming the same file to storage and cleanup"""
+    content = b"%PDF-1.7\n" + bytes(range(256)) * 40
+    upload = make_upload(content)
+    assert upload.file._rolled  # past the spool size: backed by a disk temp file
+
+    bucket = Storage3Bucket()
+    client = types.SimpleNamespace(storage=types.SimpleNamespace(from_=lambda name: bucket))
+
+    staged = asyncio.run(supabase_utils.stage_upload(upload))
+    assert staged.size == len(content)
+    assert staged.head == content[:supabase_utils.UPLOAD_SNIFF_BYTES]
+    assert upload.file.bytes_read == supabase_utils.UPLOAD_SNIFF_BYTES  # no copy of the body
+    with staged:
+        supabase_utils._put_object(client, "resumes/r.pdf", staged, "application/pdf")
+        assert upload.file.bytes_read == supabase_utils.UPLOAD_SNIFF_BYTES  # read through a shared descriptor
+    assert bucket.uploaded["resumes/r.pdf"] == (content, {"content-type": "application/pdf"})
+    assert upload.file.closed  # its disk copy goes with it
+
+    # A spool still in memory is sent as bytes
+    small = make_upload(b"%PDF-1.4 small", spool_size=1024 * 1024)
+    with asyncio.run(supabase_utils.stage_upload(small)) as staged:
+        supabase_utils._put_object(client, "resumes/s.pdf", staged, "application/pdf")
+    assert bucket.uploaded["resumes/s.pdf"][0] == b"%PDF-1.4 small"
+    assert not small.file._rolled
+    assert small.file.closed
+
+
+def test_uploads_run_off_the_event_loop_and_are_capped(supabase_utils, monkeypatch):
+    """Test slow uploads leave the event loop free and never exceed MAX_CONCURRENT_UPLOADS"""
+    import threading
+    import time
+
+    state = {'running': 0, 'peak': 0}
+    lock = threading.Lock()
+
+    class Bucket:
+        def upload(self, path, body, file_options):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.2)  # blocking, like the real client
+            with lock:
+                state['running'] -= 1
+
+        def get_public_url(self, path):
+            return f"https://cdn.example.com/{path}"
+
+    client = types.SimpleNamespace(storage=types.SimpleNamespace(from_=lambda bucket: Bucket()))
+    monkeypatch.setattr(supabase_utils, "supabase_configured", lambda: True)
+    monkeypatch.setattr(supabase_utils, "get_supabase_client", lambda: client)
+    monkeypatch.setattr(supabase_utils, "_storage_private", lambda: False)
+    limit = supabase_utils.MAX_CONCURRENT_UPLOADS
+    uploads = limit + 3
+
+    async def run():
+        started = time.monotonic()
+        tasks = [asyncio.create_task(supabase_utils.upload_resume(n, b"%PDF", "cv.pdf")) for n in range(uploads)]
+        await asyncio.sleep(0.05)
+        # Another request's storage call still gets a pool thread while the uploads are in flight
+        url = await supabase_utils.resolve_storage_url_async("/master/company-logos/logo.png")
+        served_after = time.monotonic() - started
+        paths = await asyncio.gather(*tasks)
+        return url, served_after, paths
+
+    url, served_after, paths = asyncio.run(run())
+    assert url == "https://cdn.example.com/company-logos/logo.png"
+    assert served_after < 0.15
+    assert all(path.startswith("/master/resumes/resume_") for path in paths)
+    assert state['peak'] == limit
+
+    # A later event loop (another test client, a reload) gets its own semaphore
+    state['peak'] = 0
+    url, served_after, paths = asyncio.run(run())
+    assert all(path and path.startswith("/master/resumes/resume_") for path in paths)
+    assert state['peak'] == limit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_signed_url_cache_refreshes_before_expiry(supabase_utils, monkeypatch):
+    """Test cached signed URLs stop being served a margin before the URL itself expires"""
+    clock = FakeClock()
+    monkeypatch.setattr(supabase_utils.time, "monotonic", clock)
+    cache = supabase_utils.SignedURLCache(refresh_margin=0.1, min_margin_seconds=30)
+
+    cache.put("resumes/a.pdf", 3600, "https://signed/a?1")
+    assert cache.get("resumes/a.pdf", 3600) == "https://signed/a?1"
+    assert cache.get("resumes/a.pdf", 60) is None  # keyed by TTL too
+
+    clock.now += 3600 - 360 - 1  # margin is 10% of the TTL
+    assert cache.get("resumes/a.pdf", 3600) == "https://signed/a?1"
+    clock.now += 1
+    assert cache.get("resumes/a.pdf", 3600) is None
+    assert len(cache) == 0
+
+    # Short TTLs keep at least min_margin_seconds; TTLs inside the margin are not cached
+    cache.put("resumes/b.pdf", 100, "https://signed/b")
+    clock.now += 69
+    assert cache.get("resumes/b.pdf", 100) == "https://signed/b"
+    clock.now += 1
+    assert cache.get("resumes/b.pdf", 100) is None
+    cache.put("resumes/c.pdf", 30, "https://signed/c")
+    assert len(cache) == 0
+
+
+def test_signed_url_cache_evicts_least_recently_used(supabase_utils, monkeypatch):
+    """Test a full cache drops the least recently used entry, and expired entries go first"""
+    clock = FakeClock()
+    monkeypatch.setattr(supabase_utils.time, "monotonic", clock)
+    cache = supabase_utils.SignedURLCache(max_entries=2)
+
+    cache.put("a", 3600, "url-a")
+    cache.put("b", 3600, "url-b")
+    assert cache.get("a", 3600) == "url-a"  # b is now least recently used
+    cache.put("c", 3600, "url-c")
+    assert len(cache) == 2
+    assert cache.get("b", 3600) is None
+    assert cache.get("a", 3600) == "url-a"
+    assert cache.get("c", 3600) == "url-c"
+
+    cache.put("short", 100, "url-short")  # evicts a, the least recently used
+    assert cache.get("a", 3600) is None
+    clock.now += 100
+    cache.put("d", 3600, "url-d")  # c is at the front and still valid: the cache is full, so it goes
+    assert cache.get("c", 3600) is None
+    assert cache.get("d", 3600) == "url-d"
+    assert cache.get("short", 100) is None  # expired
+    assert len(cache) == 1
+
+
+def test_resolve_storage_urls_signs_in_one_batch(supabase_utils, monkeypatch):
+    """Test private paths are signed with one create_signed_urls call, preserving input order,
+    skipping empty paths and passing full URLs through; a repeat is served from the cache
+    """
+    calls = []
+
+    class Bucket:
+        def create_signed_urls(self, paths, ttl):
+            calls.append((list(paths), ttl))
+            return [
+                {'path': path, 'signedURL': f"https://signed/{path}?ttl={ttl}", 'error': None}
+                for path in paths
+            ]
+
+        def create_signed_url(self, path, ttl):
+            raise AssertionError("signed one at a time")
+
+    client = types.SimpleNamespace(storage=types.SimpleNamespace(from_=lambda bucket: Bucket()))
+    monkeypatch.setattr(supabase_utils, "supabase_configured", lambda: True)
+    monkeypatch.setattr(supabase_utils, "_storage_private", lambda: True)
+    monkeypatch.setattr(supabase_utils, "get_supabase_client", lambda: client)
+    monkeypatch.setenv("SUPABASE_SIGNED_URL_TTL", "600")
+
+    paths = ["/master/resumes/b.pdf", None, "https://cdn.example.com/x.png", "", "/master/logos/a.png",
+             "/master/resumes/b.pdf"]
+    resolved = supabase_utils.resolve_storage_urls(paths)
+    assert list(resolved) == ["/master/resumes/b.pdf", "https://cdn.example.com/x.png", "/master/logos/a.png"]
+    assert resolved == {
+        "/master/resumes/b.pdf": "https://signed/resumes/b.pdf?ttl=600",
+        "https://cdn.example.com/x.png": "https://cdn.example.com/x.png",
+        "/master/logos/a.png": "https://signed/logos/a.png?ttl=600",
+    }
+    assert calls == [(["resumes/b.pdf", "logos/a.png"], 600)]
+
+    # Cached paths are not signed again; only the new one is
+    again = supabase_utils.resolve_storage_urls(["/master/logos/a.png", "/master/resumes/c.pdf", None])
+    assert list(again) == ["/master/logos/a.png", "/master/resumes/c.pdf"]
+    assert again["/master/logos/a.png"] == "https://signed/logos/a.png?ttl=600"
+    assert calls[1:] == [(["resumes/c.pdf"], 600)]
+    assert supabase_utils.resolve_storage_urls([None, ""]) == {}
+    assert len(calls) == 2
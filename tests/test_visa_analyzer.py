@@ -145,3 +145,63 @@ def test_job_level_heuristic(test_db_with_keywords):
     job_data['title'] = 'Senior Software Architect'
     result = analyzer._check_job_level_friendly(job_data)
     assert result is False
+
+def test_keyword_analyzer_positions_and_recompile():
+    """Test compiled keyword matching and recompilation on keyword changes"""
+    from app.visa_keywords import VisaKeywordAnalyzer
+    analyzer = VisaKeywordAnalyzer()
+    
+    result = analyzer.analyze_text("Visa sponsorship offered. Sponsorship for graduates.")
+    matches = {m.keyword: m.positions for m in result['positive_matches']}
+    assert matches['visa sponsorship'] == [0]
+    assert matches['sponsorship'] == [5, 26]
+    assert result['is_student_friendly'] is True
+    
+    analyzer.add_keyword("relocation package", "openness")
+    result = analyzer.analyze_text("Relocation package included")
+    assert [m.keyword for m in result['positive_matches']] == ["relocation package"]
+    
+    analyzer.remove_keyword("relocation package", "openness")
+    result = analyzer.analyze_text("Relocation package included")
+    assert result['positive_matches'] == []
+
+def test_keyword_matcher_automaton_matches_scan(monkeypatch):
+    """Test that the Aho-Corasick path finds the same positions as the str.find scan"""
+    from app import visa_keywords
+    if not visa_keywords.AHOCORASICK_AVAILABLE:
+        pytest.skip("pyahocorasick not installed")
+    
+    keywords = visa_keywords.VisaKeywordAnalyzer()._matcher.keywords + ["aa", "aaa", "a a"]
+    assert len(keywords) >= visa_keywords.AUTOMATON_MIN_KEYWORDS  # built-in set takes the automaton
+    automaton = visa_keywords.KeywordMatcher(keywords)
+    monkeypatch.setattr(visa_keywords, "AUTOMATON_MIN_KEYWORDS", len(keywords) + 1)
+    scan = visa_keywords.KeywordMatcher(keywords)
+    assert automaton._automaton is not None and scan._automaton is None
+    
+    texts = [
+        "visa sponsorship offered. sponsorship for graduates; subclass 485 and 482 visa welcome",
+        "aaaaa a a a must be an australian citizen only, nv1 clearance",
+        "internship internship internship graduate program graduate role",
+        "",
+    ]
+    for text in texts:
+        assert automaton.find_all(text) == scan.find_all(text)
+
+def test_batch_analysis_matches_single(monkeypatch):
+    """Test batch visa analysis in-process and across a process pool"""
+    from app import visa_keywords
+    
+    jobs = [
+        ("Graduate Developer", "Visa sponsorship available"),
+        ("Analyst", "Must be an Australian citizen"),
+        ("Engineer", None),
+    ] * 3
+    expected = [visa_keywords.analyze_job_visa_friendliness(t, d or '')['confidence_score'] for t, d in jobs]
+    
+    results = list(visa_keywords.analyze_jobs_visa_friendliness(jobs))
+    assert [r['confidence_score'] for r in results] == expected
+    
+    monkeypatch.setattr(visa_keywords, "BATCH_PROCESS_THRESHOLD", 4)
+    results = list(visa_keywords.analyze_jobs_visa_friendliness(iter(jobs), max_workers=2, chunk_size=2))
+    assert [r['confidence_score'] for r in results] == expected
+    assert results[0]['positive_matches'][0].keyword == 'sponsorship'